@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Командний рядок для локалізації EU5: статистика, неперекладені рядки,
+перевірка, експорт та імпорт без GUI (для збірки і pre-commit хуків).
+
+Папки мода та гри за замовчуванням беруться з конфігурації GUI.
+Приклади:
+
+    python tools/localization_cli.py stats --json
+    python tools/localization_cli.py untranslated --category units
+    python tools/localization_cli.py validate --game ".../game/localization"
+    python tools/localization_cli.py export -o entries.jsonl
+    python tools/localization_cli.py export --untranslated -o todo.xlf
+    python tools/localization_cli.py import todo.xlf
+    python tools/localization_cli.py accept-sources --game ".../game/localization"
+"""
+
+import os
+import sys
+import json
+import argparse
+import multiprocessing
+from pathlib import Path
+from typing import List, Optional
+
+from localization_core import (
+    CACHE_FILE, CATEGORY_NAMES, CONFIG_FILE, EXCHANGE_WRITERS, SOURCE_LANGUAGE,
+    LocalizationDatabase, LocalizationEntry, OriginalTextsDatabase, ScanCache, TagCache,
+    exchange_format, read_exchange, write_exchange,
+)
+
+# Папка мода, якщо її не вказано ні в параметрах, ні в конфігурації GUI
+DEFAULT_MOD_DIR = Path(__file__).resolve().parent.parent / 'main_menu' / 'localization' / 'dlc' / 'english'
+
+
+def load_config() -> dict:
+    """Конфігурація GUI (папки, кеш, кількість процесів); без файлу — порожня."""
+    try:
+        with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def open_database(args) -> LocalizationDatabase:
+    """Сканує мод (і оригінали, якщо вказано папку гри), використовуючи кеш GUI."""
+    config = load_config()
+    mod_dir = Path(args.mod or config.get('mod_directory') or DEFAULT_MOD_DIR)
+    if not mod_dir.is_dir():
+        raise SystemExit(f"Папку мода не знайдено: {mod_dir}")
+    game_dir = args.game or config.get('game_directory')
+    workers = args.workers or config.get('scan_workers', 0) or os.cpu_count() or 1
+
+    cache = None
+    if not args.no_cache and config.get('scan_cache', True):
+        cache = ScanCache(CACHE_FILE, config.get('scan_cache_verify_hash', False))
+        cache.load()
+
+    originals = None
+    if game_dir and Path(game_dir).is_dir():
+        originals = OriginalTextsDatabase()
+        originals.scan(Path(game_dir), SOURCE_LANGUAGE, cache=cache, workers=workers)
+        if args.language != SOURCE_LANGUAGE:
+            originals.load(args.language, cache=cache, workers=workers)
+
+    # Без журналу: командний рядок не відновлює і не записує правки GUI
+    db = LocalizationDatabase(mod_dir, use_mmap=True, journal_file=None)
+    db.originals = originals
+    db.scan(cache=cache, workers=workers)
+    if cache:
+        cache.save()
+    return db
+
+
+def entry_record(db: LocalizationDatabase, entry: LocalizationEntry) -> dict:
+    """Запис для JSON: шлях відносно папки мода, рядок з 1."""
+    return {
+        'key': entry.key,
+        'file': db.relative_path(entry.file_path),
+        'line': entry.line_number + 1,
+        'category': entry.category,
+        'value': entry.value,
+    }
+
+
+def print_json(data):
+    json.dump(data, sys.stdout, ensure_ascii=False, indent=2)
+    sys.stdout.write('\n')
+
+
+def cmd_stats(db: LocalizationDatabase, args) -> int:
+    total, translated = db.get_stats()
+    categories = {category: {'total': count, 'untranslated': untranslated}
+                  for category, (count, untranslated) in sorted(db.get_category_stats().items())}
+    # Звірка з оригіналами — лише якщо їх завантажено (--game)
+    sources = None
+    if db.originals:
+        sources = {'outdated': len(db.index.outdated), 'unverified': len(db.index.unverified)}
+    if args.json:
+        print_json({'total': total, 'translated': translated,
+                    'untranslated': total - translated, 'categories': categories,
+                    'sources': sources})
+        return 0
+
+    percent = translated / total * 100 if total else 0
+    print(f"Всього: {total}, перекладено: {translated} ({percent:.1f}%)")
+    if sources:
+        print(f"Застарілі: {sources['outdated']}, без звірки з оригіналом: {sources['unverified']}")
+    for category, counts in categories.items():
+        done = counts['total'] - counts['untranslated']
+        percent = done / counts['total'] * 100 if counts['total'] else 0
+        print(f"  {category:<20} {done:>7} / {counts['total']:<7} ({percent:.1f}%)")
+    return 0
+
+
+def cmd_untranslated(db: LocalizationDatabase, args) -> int:
+    entries = db.search(args.query or "", args.category, untranslated_only=True)
+    if args.limit:
+        entries = entries[:args.limit]
+    if args.json:
+        print_json([entry_record(db, entry) for entry in entries])
+        return 0
+    for entry in entries:
+        record = entry_record(db, entry)
+        print(f"{record['file']}:{record['line']}: {entry.key}: {entry.value}")
+    return 0
+
+
+def validation_issues(db: LocalizationDatabase, args) -> List[dict]:
+    """Теги, застарілі переклади, глосарій і русизми, впорядковані за файлом і рядком."""
+    issues = []
+
+    def add(entry: LocalizationEntry, kind: str, message: str):
+        record = entry_record(db, entry)
+        del record['value'], record['category']
+        record.update(kind=kind, message=message)
+        issues.append(record)
+
+    # Теги перевіряються лише за наявності оригіналів; незмінені пари беруться з кешу
+    tag_cache = None
+    if not args.no_cache:
+        tag_cache = TagCache()
+        tag_cache.load()
+    workers = args.workers or load_config().get('scan_workers', 0) or os.cpu_count() or 1
+    for issue in db.check_tags(tag_cache, workers):
+        if args.tag_order or issue.missing or issue.extra or issue.unbalanced:
+            add(issue.entry, 'tags', issue.summary)
+    if tag_cache:
+        tag_cache.save()
+
+    for doc_id in db.index.outdated:
+        add(db.index.entries[doc_id], 'outdated', "оригінал змінився після перекладу")
+    if db.glossary:
+        terms = db.glossary.terms
+        for entry, term_ids in db.glossary_issues.items():
+            for term_id in term_ids:
+                term, forms = terms[term_id]
+                add(entry, 'glossary', f"{term}: очікується {', '.join(forms)}")
+    if db.lexicon:
+        suggestions = db.lexicon.suggestions
+        for rule, entries in db.scan_lexicon():
+            for entry in entries:
+                add(entry, 'lexicon', f"{rule} -> {suggestions[rule]}")
+
+    issues.sort(key=lambda issue: (issue['file'], issue['line'], issue['kind']))
+    return issues
+
+
+def cmd_validate(db: LocalizationDatabase, args) -> int:
+    issues = validation_issues(db, args)
+    if args.json:
+        print_json(issues)
+    else:
+        for issue in issues:
+            print(f"{issue['file']}:{issue['line']}: {issue['key']}: "
+                  f"[{issue['kind']}] {issue['message']}")
+        if issues:
+            print(f"Проблем: {len(issues)}", file=sys.stderr)
+    # Переклади без хешу оригіналу — не помилка, але й не "актуальні"
+    if db.index.unverified:
+        print(f"Без звірки з оригіналом: {len(db.index.unverified)} "
+              f"(див. accept-sources)", file=sys.stderr)
+    return 1 if issues else 0
+
+
+def cmd_export(db: LocalizationDatabase, args) -> int:
+    """JSON Lines (один запис на рядок) або XLIFF/PO/CSV для перекладацьких програм."""
+    fmt = args.format or (exchange_format(args.output) if args.output else None) or 'jsonl'
+    entries = db.search(args.query or "", args.category, args.untranslated)
+    if fmt != 'jsonl':
+        if not args.output:
+            raise SystemExit(f"Для формату {fmt} потрібен файл (-o)")
+        count = write_exchange(db.exchange_units(entries, args.language), Path(args.output),
+                               fmt, args.language)
+        print(f"Експортовано: {count}", file=sys.stderr)
+        return 0
+
+    out = open(args.output, 'w', encoding='utf-8', newline='\n') if args.output else sys.stdout
+    try:
+        for entry in entries:
+            record = entry_record(db, entry)
+            if db.originals:
+                record['original'] = db.originals.get(entry.key, args.language)
+            out.write(json.dumps(record, ensure_ascii=False) + '\n')
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+
+def cmd_import(db: LocalizationDatabase, args) -> int:
+    """Застосовує переклади з XLIFF/PO/CSV; код виходу 1, якщо щось відхилено."""
+    path = Path(args.input)
+    fmt = args.format or exchange_format(path)
+    if fmt is None:
+        raise SystemExit(f"Невідомий формат файлу: {path.name} (вкажіть --format)")
+    if not path.is_file():
+        raise SystemExit(f"Файл не знайдено: {path}")
+    try:
+        result = db.import_units(read_exchange(path, fmt), check_tags=not args.force)
+    except ValueError as e:
+        raise SystemExit(f"Не вдалося прочитати файл: {e}")
+
+    rejected = [{'id': unit.id, 'file': unit.file, 'line': unit.line, 'message': message}
+                for unit, message in result.rejected]
+    unknown = [{'id': unit.id, 'file': unit.file, 'line': unit.line} for unit in result.unknown]
+    if args.json:
+        print_json({'applied': len(result.applied), 'unchanged': result.unchanged,
+                    'skipped': result.skipped, 'unknown': unknown, 'rejected': rejected})
+    else:
+        for issue in rejected:
+            print(f"{issue['file']}:{issue['line']}: {issue['id']}: {issue['message']}")
+        for issue in unknown:
+            print(f"{issue['file']}:{issue['line']}: {issue['id']}: ключа немає в моді")
+        print(f"Застосовано: {len(result.applied)}, без змін: {result.unchanged}, "
+              f"неготових: {result.skipped}, невідомих: {len(unknown)}, "
+              f"відхилено: {len(rejected)}", file=sys.stderr)
+    return 1 if rejected else 0
+
+
+def cmd_accept_sources(db: LocalizationDatabase, args) -> int:
+    """Записує хеші поточних оригіналів для перекладів без звірки (і застарілих з --all)."""
+    if not db.originals:
+        raise SystemExit("Потрібна папка оригіналів гри (--game)")
+    accepted = db.accept_sources(args.all)
+    if args.json:
+        print_json({'accepted': accepted, 'file': str(db.sources.path)})
+    else:
+        print(f"Звірено з оригіналами: {accepted} ({db.sources.path})", file=sys.stderr)
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    # Спільні параметри вказуються після команди: "stats --json"
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--mod', help="папка мода (за замовчуванням — з конфігурації GUI)")
+    common.add_argument('--game', help="папка локалізації гри (оригінали)")
+    common.add_argument('--language', default=SOURCE_LANGUAGE, help="мова оригіналів для експорту")
+    common.add_argument('--workers', type=int, default=0, help="кількість процесів сканування")
+    common.add_argument('--no-cache', action='store_true', help="не використовувати кеш сканування")
+    common.add_argument('--json', action='store_true', help="вивід у JSON")
+
+    parser = argparse.ArgumentParser(description="Локалізація EU5 без GUI")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    commands.add_parser('stats', parents=[common], help="статистика перекладу за категоріями")
+
+    untranslated = commands.add_parser('untranslated', parents=[common], help="неперекладені рядки")
+    untranslated.add_argument('--limit', type=int, default=0, help="не більше N рядків")
+
+    validate = commands.add_parser('validate', parents=[common],
+                                   help="перевірка; код виходу 1, якщо є проблеми")
+    validate.add_argument('--tag-order', action='store_true',
+                          help="повідомляти і про змінений порядок тегів")
+
+    export = commands.add_parser('export', parents=[common],
+                                 help="експорт рядків у JSON Lines, XLIFF, PO або CSV")
+    export.add_argument('-o', '--output', help="файл (за замовчуванням — stdout)")
+    export.add_argument('--format', choices=['jsonl'] + list(EXCHANGE_WRITERS),
+                        help="формат (за замовчуванням — за розширенням файлу, інакше jsonl)")
+    export.add_argument('--untranslated', action='store_true', help="лише неперекладені")
+
+    import_ = commands.add_parser('import', parents=[common],
+                                  help="імпорт перекладів з XLIFF, PO або CSV")
+    import_.add_argument('input', help="файл .xlf/.xliff, .po або .csv")
+    import_.add_argument('--format', choices=list(EXCHANGE_WRITERS),
+                         help="формат (за замовчуванням — за розширенням файлу)")
+    import_.add_argument('--force', action='store_true', help="не перевіряти теги")
+
+    accept = commands.add_parser('accept-sources', parents=[common],
+                                 help="вважати поточні оригінали звіреними (після патча гри)")
+    accept.add_argument('--all', action='store_true',
+                        help="також для застарілих перекладів (якщо їх уже переглянуто)")
+
+    for command in (untranslated, export):
+        command.add_argument('--category', default='all', choices=['all'] + CATEGORY_NAMES)
+        command.add_argument('--query', help="текст для пошуку (як у GUI)")
+    return parser
+
+
+COMMANDS = {
+    'stats': cmd_stats,
+    'untranslated': cmd_untranslated,
+    'validate': cmd_validate,
+    'export': cmd_export,
+    'import': cmd_import,
+    'accept-sources': cmd_accept_sources,
+}
+# Команди, що змінюють файли мода або хеші оригіналів; решта нічого не записує
+WRITING_COMMANDS = {'import', 'accept-sources'}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    # Консоль Windows за замовчуванням не в UTF-8
+    sys.stdout.reconfigure(encoding='utf-8')
+    db = open_database(args)
+    try:
+        return COMMANDS[args.command](db, args)
+    finally:
+        if args.command in WRITING_COMMANDS:
+            db.flush()
+
+
+if __name__ == '__main__':
+    multiprocessing.freeze_support()
+    sys.exit(main())
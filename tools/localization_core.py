@@ -0,0 +1,3331 @@
+"""
+Ядро інструменту локалізації EU5: парсинг yml, база перекладів, пошук,
+збереження, перевірки. Не залежить від tkinter — його використовують
+і GUI (localization_gui.py), і командний рядок (localization_cli.py).
+"""
+
+import os
+import re
+import sys
+import csv
+import json
+import codecs
+import pickle
+import mmap
+import hashlib
+import zlib
+import threading
+import time
+import multiprocessing
+from pathlib import Path
+from typing import List, Optional, Tuple, Dict, Set, Union, Iterable, Iterator, TextIO
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape, quoteattr
+from array import array
+from functools import lru_cache, partial
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from difflib import SequenceMatcher
+from fnmatch import fnmatch
+from itertools import compress, accumulate, groupby, chain
+from dataclasses import dataclass, field
+from concurrent.futures import ProcessPoolExecutor
+
+
+class StringTable:
+    """Таблиця інтернованих рядків: рядок <-> маленький int id."""
+
+    __slots__ = ('strings', 'ids')
+
+    def __init__(self):
+        self.strings: List[str] = []
+        self.ids: Dict[str, int] = {}
+
+    def intern(self, value: str) -> int:
+        """Повертає id рядка, додаючи його до таблиці за потреби."""
+        string_id = self.ids.get(value)
+        if string_id is None:
+            string_id = len(self.strings)
+            self.strings.append(value)
+            self.ids[value] = string_id
+        return string_id
+
+    def get_id(self, value: str) -> Optional[int]:
+        return self.ids.get(value)
+
+    def __getitem__(self, string_id: int) -> str:
+        return self.strings[string_id]
+
+
+# Спільні таблиці для шляхів файлів, категорій і версій ключів
+FILE_PATHS = StringTable()
+CATEGORIES = StringTable()
+VERSIONS = StringTable()
+
+
+class LocalizationEntry:
+    """Рядок локалізації.
+
+    Компактний запис без __dict__: шлях до файлу, категорія та версія
+    зберігаються як id у спільних таблицях FILE_PATHS/CATEGORIES/VERSIONS.
+    """
+
+    __slots__ = ('file_id', 'line_number', 'key', 'version_id', 'value',
+                 'category_id', 'is_translated')
+
+    def __init__(self, file_id: int, line_number: int, key: str, version_id: int,
+                 value: str, category_id: int, is_translated: bool):
+        self.file_id = file_id
+        self.line_number = line_number
+        self.key = key
+        self.version_id = version_id
+        self.value = value
+        self.category_id = category_id
+        self.is_translated = is_translated
+
+    @property
+    def file_path(self) -> str:
+        return FILE_PATHS[self.file_id]
+
+    @property
+    def category(self) -> str:
+        return CATEGORIES[self.category_id]
+
+    @property
+    def version(self) -> str:
+        return VERSIONS[self.version_id]
+
+    def __repr__(self) -> str:
+        return (f"LocalizationEntry({self.file_path!r}:{self.line_number + 1}, "
+                f"{self.key}:{self.version} {self.value!r})")
+
+
+# Regex patterns
+# Формат:  KEY:0 "value" або  KEY: "value" (без версії)
+LINE_PATTERN = re.compile(r'^(\s*)([A-Za-z0-9_]+):(\d*)\s*"(.*)"\s*$')
+# Той самий формат у сирих байтах для швидкого парсера. Кожен збіг — рівно один
+# рядок файлу (до \n включно); групи заповнені лише для рядків-записів
+YML_LINE_BYTES_PATTERN = re.compile(
+    rb'(?:[ \t]*([A-Za-z0-9_]+):([0-9]*)[ \t]*"([^\n]*)"[ \t\r]*(?=\n|\Z))?[^\n]*\n?')
+NEWLINE_BYTES_PATTERN = re.compile(rb'\n')
+CYRILLIC_PATTERN = re.compile(r'[а-яА-ЯіІїЇєЄґҐ]')
+# Класифікація технічних рядків (див. is_technical_string)
+TECHNICAL_PUNCTUATION_PATTERN = re.compile(r'[\s\,\.\:\;\-\+\=\%\(\)\/\\\'\"]+')
+UPPER_SNAKE_PATTERN = re.compile(r'^[A-Z][A-Z0-9_]*$')
+LOWER_SNAKE_PATTERN = re.compile(r'^[a-z][a-z0-9_]*$')
+IDENTIFIER_PATTERN = re.compile(r'^[A-Za-z][A-Za-z0-9_]*$')
+DIGITS_PATTERN = re.compile(r'^[\d]+$')
+NON_LETTER_PATTERN = re.compile(r'[\s\d\W]')
+
+# Типи тегів розмітки Paradox (див. tokenize_markup)
+TAG_VARIABLE = 'variable'  # $VAR$, $flavor_eng.240.historical_info$, $var|format$ тощо
+TAG_SCRIPT = 'script'  # [GetName], [ROOT.GetCountry.Custom('...')] тощо, з вкладеністю
+TAG_FORMAT = 'format'  # #R, #ONCLICK:..., #TOOLTIP:... тощо
+TAG_FORMAT_END = 'format_end'  # #! закриваючий тег
+TAG_ICON = 'icon'  # @icon!
+TAG_NEWLINE = 'newline'  # \n переноси рядків
+
+# Усі теги одним шаблоном; для "[" далі шукається парна дужка з урахуванням вкладеності.
+# Аргумент #КОДУ: триває до пробілу і може містити скрипти: #TOOLTIP:COUNTRY,[X.Custom('a')],X
+MARKUP_PATTERN = re.compile(r'\$[^$]+\$|\[|#!|#[A-Z]+(?::[^\s\[\]]*)?|@[a-z_]+!|\\n')
+FORMAT_ARG_PATTERN = re.compile(r'[^\s\[\]]*')
+BRACKET_PATTERN = re.compile(r'[\[\]]')
+# Символи розмітки, що не увійшли до жодного тегу: "[" без пари, "]", "$" без пари
+STRAY_MARKUP_PATTERN = re.compile(r'[\[\]$]')
+# Символи, з яких починається будь-який тег розмітки
+MARKUP_CHARS_PATTERN = re.compile(r'[$\[#@\\]')
+# Рядкові аргументи скриптів: [Concept('age','епосі')|e] — текст у лапках перекладається
+QUOTED_PATTERN = re.compile(r"'[^']*'")
+MARKUP_KINDS = {'$': TAG_VARIABLE, '[': TAG_SCRIPT, '@': TAG_ICON, '\\': TAG_NEWLINE}
+
+# Режими пошуку
+SEARCH_TEXT = 'text'
+SEARCH_WORD = 'word'
+SEARCH_REGEX = 'regex'
+SEARCH_FUZZY = 'fuzzy'
+SEARCH_MODES = {
+    SEARCH_TEXT: 'Текст',
+    SEARCH_WORD: 'Ціле слово',
+    SEARCH_REGEX: 'Регулярний вираз',
+    SEARCH_FUZZY: 'Нечіткий',
+}
+# Слова для нечіткого пошуку — лише літери
+WORD_PATTERN = re.compile(r'[^\W\d_]+')
+# Максимальна кількість помилок у слові для нечіткого пошуку
+FUZZY_MAX_DISTANCE = 2
+
+# Порядок літер українського алфавіту для сортування: літери переносяться в
+# область приватного використання Unicode у порядку абетки, апостроф ігнорується
+UKRAINIAN_ALPHABET = 'абвгґдеєжзиіїйклмнопрстуфхцчшщьюя'
+COLLATION_TABLE = {ord(char): 0xE000 + i for i, char in enumerate(UKRAINIAN_ALPHABET)}
+COLLATION_TABLE.update({ord("'"): None, ord('ʼ'): None, ord('’'): None})
+
+# У зібраному PyInstaller --onefile exe модуль розпаковано в тимчасову папку
+# (sys._MEIPASS), яку видаляють після виходу: файли, вкладені через --add-data,
+# читаються звідти, а все, що редактор записує, лежить поруч з exe
+if getattr(sys, 'frozen', False):
+    BUNDLE_DIR = Path(getattr(sys, '_MEIPASS', Path(sys.executable).parent))
+    STATE_DIR = Path(sys.executable).resolve().parent
+else:
+    BUNDLE_DIR = STATE_DIR = Path(__file__).parent
+
+
+def data_file(name: str) -> Path:
+    """Файл даних інструментів: поруч з exe (якщо його там змінено) або вкладений у збірку."""
+    local = STATE_DIR / name
+    return local if local.exists() else BUNDLE_DIR / name
+
+
+# Шлях до файлу конфігурації
+CONFIG_FILE = STATE_DIR / '.localization_gui_config.json'
+
+# Шлях до кешу сканування (поруч з конфігурацією)
+CACHE_FILE = STATE_DIR / '.localization_gui_cache.pickle'
+
+# Кеш перевірки тегів між запусками (див. TagCache)
+TAGS_CACHE_FILE = STATE_DIR / '.localization_tags_cache.pickle'
+
+# Журнал збережених змін (див. EditJournal)
+JOURNAL_FILE = STATE_DIR / '.localization_gui_journal.jsonl'
+
+# Хеші оригіналів на момент перекладу (у git поруч з інструментами, не в папці мода,
+# що йде гравцям; оновлюється лише збереженням/імпортом перекладу та accept_sources)
+SOURCES_FILE = STATE_DIR / 'source_hashes.tsv'
+# Мова, зміна оригіналу якою робить переклад застарілим
+SOURCE_LANGUAGE = 'english'
+
+# Глосарій проєкту, див. Glossary
+GLOSSARY_FILE = data_file('glossary.json')
+
+# Русизми, кальки та інша заборонена лексика, див. Lexicon
+LEXICON_FILE = data_file('lexicon.json')
+
+# Версія формату кешу. Збільшуйте при зміні парсера або правил is_translated()
+CACHE_VERSION = 3
+
+# Мінімальна кількість файлів для паралельного сканування (інакше пул не окупається)
+PARALLEL_MIN_FILES = 16
+# Мінімальна кількість пар для паралельної перевірки тегів
+PARALLEL_MIN_TAG_PAIRS = 20000
+
+# Доступні мови для референсу
+# Значення комбобоксу другої мови референсу, коли її не показано
+NO_LANGUAGE = '(немає)'
+
+AVAILABLE_LANGUAGES = ['english', 'french', 'german', 'spanish', 'russian', 'chinese', 'japanese', 'korean']
+# Коди мов для XLIFF/PO (мова перекладу — українська)
+LANGUAGE_CODES = {'english': 'en', 'french': 'fr', 'german': 'de', 'spanish': 'es', 'russian': 'ru',
+                  'chinese': 'zh', 'japanese': 'ja', 'korean': 'ko'}
+TARGET_LANGUAGE_CODE = 'uk'
+
+# Формати обміну з перекладачами (див. write_exchange/read_exchange): розширення -> формат
+EXCHANGE_FORMATS = {'.xlf': 'xliff', '.xliff': 'xliff', '.po': 'po', '.csv': 'csv'}
+XLIFF_NAMESPACE = 'urn:oasis:names:tc:xliff:document:2.0'
+CSV_COLUMNS = ['id', 'file', 'line', 'original', 'translation']
+
+
+def match_bracket(text: str, start: int) -> int:
+    """Повертає позицію після "]", парної до "[" у start, або -1."""
+    close = text.find(']', start)
+    if close == -1:
+        return -1
+    if text.find('[', start + 1, close) == -1:
+        return close + 1
+
+    # Вкладені дужки: [A.Custom('[B]')]
+    depth = 0
+    for bracket in BRACKET_PATTERN.finditer(text, start):
+        depth += 1 if bracket.group() == '[' else -1
+        if depth == 0:
+            return bracket.end()
+    return -1
+
+
+@lru_cache(maxsize=65536)
+def tokenize_markup(text: str) -> Tuple[Tuple[str, int, int], ...]:
+    """Розбирає розмітку за один прохід.
+
+    Повертає (тип, початок, кінець) кожного тегу в порядку появи.
+    Теги не перетинаються: вміст [...] (разом із вкладеними дужками)
+    є одним тегом. Результат кешується для кожного значення.
+    """
+    tags = []
+    pos = 0
+    length = len(text)
+    search = MARKUP_PATTERN.search
+
+    while True:
+        match = search(text, pos)
+        if not match:
+            break
+
+        start, end = match.span()
+        tag = match.group()
+
+        if tag == '[':
+            end = match_bracket(text, start)
+            if end == -1:
+                pos = start + 1
+                continue
+            kind = TAG_SCRIPT
+        elif tag[0] == '#':
+            if tag == '#!':
+                kind = TAG_FORMAT_END
+            else:
+                kind = TAG_FORMAT
+                # Скрипти всередині аргументу належать цьому ж тегу
+                while ':' in tag and end < length and text[end] == '[':
+                    close = match_bracket(text, end)
+                    if close == -1:
+                        break
+                    end = FORMAT_ARG_PATTERN.match(text, close).end()
+        else:
+            kind = MARKUP_KINDS[tag[0]]
+
+        tags.append((kind, start, end))
+        pos = end
+
+    return tuple(tags)
+
+
+@lru_cache(maxsize=65536)
+def strip_markup(text: str) -> str:
+    """Повертає текст без тегів розмітки."""
+    tags = tokenize_markup(text)
+    if not tags:
+        return text
+
+    parts = []
+    pos = 0
+    for _, start, end in tags:
+        parts.append(text[pos:start])
+        pos = end
+    parts.append(text[pos:])
+    return ''.join(parts)
+
+
+def is_technical_string(value: str) -> bool:
+    """Перевіряє чи рядок є технічним (не потребує перекладу)."""
+    stripped = value.strip()
+
+    if not stripped:
+        return True
+
+    # Перевіряємо чи рядок складається тільки з тегів
+    clean = strip_markup(stripped)
+
+    # Видаляємо пробіли та пунктуацію що залишились між тегами
+    clean = TECHNICAL_PUNCTUATION_PATTERN.sub('', clean)
+
+    if not clean:
+        return True
+
+    # UPPER_SNAKE_CASE
+    if UPPER_SNAKE_PATTERN.match(clean):
+        return True
+
+    # lower_snake_case
+    if LOWER_SNAKE_PATTERN.match(clean):
+        return True
+
+    # Mixed case without spaces - code identifier
+    if IDENTIFIER_PATTERN.match(clean) and ' ' not in stripped:
+        return True
+
+    # Тільки цифри
+    if DIGITS_PATTERN.match(clean):
+        return True
+
+    return False
+
+
+# Категорії у порядку показу у фільтрі
+CATEGORY_NAMES = [
+    'events/DHE', 'events/character', 'events/culture', 'events/other',
+    'interfaces', 'locations', 'missions', 'government', 'modifiers', 'units', 'other'
+]
+
+
+def get_category(file_path: str) -> str:
+    """Визначає категорію файла."""
+    path_lower = file_path.lower().replace('\\', '/')
+
+    if '/events/dhe/' in path_lower:
+        return 'events/DHE'
+    elif '/events/character/' in path_lower:
+        return 'events/character'
+    elif '/events/culture/' in path_lower:
+        return 'events/culture'
+    elif '/events/' in path_lower:
+        return 'events/other'
+    elif '/interfaces/' in path_lower:
+        return 'interfaces'
+    elif '/locations/' in path_lower:
+        return 'locations'
+    elif '/missions/' in path_lower:
+        return 'missions'
+    elif '/government/' in path_lower:
+        return 'government'
+    elif '/modifiers/' in path_lower:
+        return 'modifiers'
+    elif '/units/' in path_lower:
+        return 'units'
+    else:
+        return 'other'
+
+
+def collation_key(text: str) -> str:
+    """Ключ сортування без урахування регістру з українським порядком літер."""
+    return text.lower().translate(COLLATION_TABLE)
+
+
+def rule_cyrillic(value: str) -> Optional[bool]:
+    """Є кирилиця — перекладено (найчастіший випадок, тому перевіряється першим)."""
+    return True if CYRILLIC_PATTERN.search(value) else None
+
+
+def rule_technical(value: str) -> Optional[bool]:
+    """Технічний рядок не потребує перекладу."""
+    return True if is_technical_string(value) else None
+
+
+def rule_no_letters(value: str) -> Optional[bool]:
+    """Без тегів не лишилось літер — перекладати нічого."""
+    return True if not NON_LETTER_PATTERN.sub('', strip_markup(value)) else None
+
+
+class TranslationClassifier:
+    """Класифікатор статусу перекладу з кешем за значенням.
+
+    Правило — функція value -> Optional[bool]: True/False визначає статус,
+    None передає рішення наступному правилу. Якщо жодне правило не
+    спрацювало, рядок вважається неперекладеним. Додаткові правила
+    виконуються перед вбудованими. Щоб вони діяли і в пулі процесів
+    сканування, реєструйте їх під час імпорту модуля.
+    """
+
+    # Після цієї кількості значень кеш очищується, щоб не рости безмежно
+    MAX_CACHE_SIZE = 500_000
+
+    def __init__(self):
+        self.extra_rules: List = []
+        self.builtin_rules: List = [rule_cyrillic, rule_technical, rule_no_letters]
+        self._rules = list(self.builtin_rules)
+        self._cache: Dict[str, bool] = {}
+
+    def add_rule(self, rule):
+        """Додає правило (виконується перед вбудованими)."""
+        self.extra_rules.append(rule)
+        self._rules = self.extra_rules + self.builtin_rules
+        self._cache.clear()
+
+    @property
+    def signature(self) -> Tuple[str, ...]:
+        """Назви правил; зміна набору правил робить кеш сканування застарілим."""
+        return tuple(rule.__name__ for rule in self._rules)
+
+    def classify(self, value: str) -> bool:
+        """Повертає True, якщо рядок перекладений або не потребує перекладу."""
+        result = self._cache.get(value)
+        if result is None:
+            result = False
+            for rule in self._rules:
+                verdict = rule(value)
+                if verdict is not None:
+                    result = verdict
+                    break
+            if len(self._cache) >= self.MAX_CACHE_SIZE:
+                self._cache.clear()
+            self._cache[value] = result
+        return result
+
+    def classify_many(self, values: List[str]) -> List[bool]:
+        """Класифікує пакет значень; кожне унікальне значення — один раз."""
+        classify = self.classify
+        unique = {value: classify(value) for value in dict.fromkeys(values)}
+        return [unique[value] for value in values]
+
+    def clear_cache(self):
+        self._cache.clear()
+
+
+# Класифікатор за замовчуванням (у кожному процесі свій кеш)
+CLASSIFIER = TranslationClassifier()
+
+
+def is_translated(value: str) -> bool:
+    """Перевіряє чи рядок перекладений або не потребує перекладу."""
+    return CLASSIFIER.classify(value)
+
+
+def find_tags(text: str) -> List[str]:
+    """Знаходить теги в тексті."""
+    return [text[start:end] for _, start, end in tokenize_markup(text)]
+
+
+def comparable_tags(text: str) -> Tuple[List[str], int, int, str]:
+    """Теги для порівняння з оригіналом і баланс пар #X ... #!.
+
+    Рядкові аргументи скриптів замінюються на '' (їх перекладають).
+    Повертає (теги, найменша глибина, кінцева глибина форматування,
+    відсортовані символи [ ] $ поза тегами).
+    """
+    tags = []
+    stray = []
+    depth = min_depth = 0
+    pos = 0
+    for kind, start, end in tokenize_markup(text):
+        stray.extend(STRAY_MARKUP_PATTERN.findall(text, pos, start))
+        pos = end
+        tag = text[start:end]
+        if kind == TAG_SCRIPT:
+            tag = QUOTED_PATTERN.sub("''", tag)
+        elif kind == TAG_FORMAT:
+            depth += 1
+        elif kind == TAG_FORMAT_END:
+            depth -= 1
+            min_depth = min(min_depth, depth)
+        tags.append(tag)
+    stray.extend(STRAY_MARKUP_PATTERN.findall(text, pos))
+    return tags, min_depth, depth, ''.join(sorted(stray))
+
+
+def tag_parity(source: str, value: str) -> Optional[Tuple[Tuple[str, ...], Tuple[str, ...], bool, bool]]:
+    """Порівнює теги перекладу з оригіналом.
+
+    None — теги ті самі й у тому ж порядку. Інакше (відсутні, зайві,
+    змінено порядок, зламано пари #X ... #! або дужки і $ поза тегами).
+    Теги рахуються з повторами.
+    """
+    source_tags, source_min, source_depth, source_stray = comparable_tags(source)
+    value_tags, value_min, value_depth, value_stray = comparable_tags(value)
+    if source_tags == value_tags and source_stray == value_stray:
+        return None
+    source_counts, value_counts = Counter(source_tags), Counter(value_tags)
+    missing = tuple((source_counts - value_counts).elements())
+    extra = tuple((value_counts - source_counts).elements())
+    unbalanced = value_min < source_min or value_depth != source_depth or value_stray != source_stray
+    reordered = source_tags != value_tags and not missing and not extra
+    return missing, extra, reordered, unbalanced
+
+
+def check_tag_pairs(pairs: List[Tuple[str, str]]) -> list:
+    """tag_parity для пар (оригінал, переклад); виконується і в пулі процесів."""
+    return [tag_parity(source, value) for source, value in pairs]
+
+
+class ScanCache:
+    """Постійний кеш розпарсених файлів.
+
+    Запис файлу дійсний, поки збігаються шлях, розмір і mtime
+    (і, за бажанням, SHA-1 вмісту). Тоді файл не перечитується і не парситься.
+    """
+
+    def __init__(self, cache_file: Path = CACHE_FILE, verify_hash: bool = False):
+        self.cache_file = cache_file
+        self.verify_hash = verify_hash
+        # section -> {шлях: (розмір, mtime_ns, хеш або None, рядки)}
+        self.sections: Dict[str, Dict[str, tuple]] = {}
+        self.dirty = False
+        self.hits = 0
+        self.misses = 0
+        # Мови оригіналів довантажуються у фоновому потоці, поки кеш може зберігатися
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Завантажує кеш з диску. Пошкоджений або застарілий кеш ігнорується."""
+        self.sections = {}
+        try:
+            if self.cache_file.exists():
+                with open(self.cache_file, 'rb') as f:
+                    data = pickle.load(f)
+                if data.get('version') == CACHE_VERSION:
+                    self.sections = data['sections']
+                    # Статуси перекладу в кеші залежать від набору правил
+                    if data.get('classifier') != CLASSIFIER.signature:
+                        self.sections.pop('mod', None)
+        except Exception as e:
+            print(f"Помилка читання кешу {self.cache_file}: {e}", file=sys.stderr)
+            self.sections = {}
+
+    def save(self):
+        """Зберігає кеш на диск (атомарно, через тимчасовий файл)."""
+        with self._lock:
+            if not self.dirty:
+                return
+
+            # Прибираємо записи видалених файлів
+            for section in self.sections.values():
+                for path in [p for p in section if not os.path.exists(p)]:
+                    del section[path]
+
+            tmp_file = self.cache_file.with_name(self.cache_file.name + '.tmp')
+            try:
+                with open(tmp_file, 'wb') as f:
+                    pickle.dump({'version': CACHE_VERSION, 'classifier': CLASSIFIER.signature,
+                                 'sections': self.sections},
+                                f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_file, self.cache_file)
+                self.dirty = False
+            except Exception as e:
+                print(f"Помилка збереження кешу {self.cache_file}: {e}", file=sys.stderr)
+
+    def reset_stats(self):
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, section: str, file_path: Path, stat: os.stat_result):
+        """Повертає закешовані рядки файлу або None, якщо файл змінився."""
+        record = self.sections.get(section, {}).get(str(file_path))
+        if record is not None:
+            size, mtime_ns, digest, rows = record
+            if size == stat.st_size and mtime_ns == stat.st_mtime_ns:
+                if not self.verify_hash:
+                    self.hits += 1
+                    return rows
+                if digest is not None:
+                    try:
+                        with open(file_path, 'rb') as f:
+                            if content_digest(f.read()) == digest:
+                                self.hits += 1
+                                return rows
+                    except OSError:
+                        pass
+        self.misses += 1
+        return None
+
+    def put(self, section: str, file_path: Path, stat: os.stat_result, rows: list,
+            digest: Optional[str] = None):
+        """Запам'ятовує розпарсені рядки файлу."""
+        with self._lock:
+            self.sections.setdefault(section, {})[str(file_path)] = (
+                stat.st_size, stat.st_mtime_ns, digest, rows)
+            self.dirty = True
+
+
+def content_digest(raw: bytes) -> str:
+    """Хеш вмісту файлу для перевірки кешу."""
+    return hashlib.sha1(raw).hexdigest()
+
+
+def read_yml(file_path: Path) -> Tuple[bytes, bool, str]:
+    """Читає YML файл. Повертає (сирі байти, чи є BOM, текст)."""
+    with open(file_path, 'rb') as f:
+        raw = f.read()
+
+    has_bom = raw.startswith(codecs.BOM_UTF8)
+    content = raw[3:].decode('utf-8') if has_bom else raw.decode('utf-8')
+    return raw, has_bom, content
+
+
+def split_lines(text: str) -> List[str]:
+    """Ділить текст на рядки за \n, зберігаючи закінчення (як парсер YML)."""
+    lines = text.split('\n')
+    result = [line + '\n' for line in lines[:-1]]
+    if lines[-1]:
+        result.append(lines[-1])
+    return result
+
+
+def parse_yml_bytes(raw: bytes) -> List[Tuple[int, str, str, str]]:
+    """Знаходить записи KEY:0 "value" у сирих байтах файлу.
+
+    Повертає (номер рядка, key, version, value). Рядок — це відрізок до \n
+    (\r\n теж). Увесь розбір відбувається в одному findall, рядки без
+    запису не декодуються, а ключі, версії та значення декодуються трьома
+    викликами на файл, а не по одному на рядок.
+    """
+    start = 3 if raw.startswith(codecs.BOM_UTF8) else 0
+    lines = YML_LINE_BYTES_PATTERN.findall(memoryview(raw)[start:])
+    if not lines:
+        return []
+
+    keys, versions, values = zip(*lines)
+    # Порожній ключ (b'') — рядок без запису
+    line_numbers = list(compress(range(len(keys)), keys))
+    if not line_numbers:
+        return []
+
+    # Значення не містять \n, тож його можна використати як роздільник
+    return list(zip(
+        line_numbers,
+        b'\n'.join(compress(keys, keys)).decode('ascii').split('\n'),
+        b'\n'.join(compress(versions, keys)).decode('ascii').split('\n'),
+        b'\n'.join(compress(values, keys)).decode('utf-8').split('\n'),
+    ))
+
+
+def iter_yml_entries(raw: bytes):
+    """Як parse_yml_bytes, але також повертає байтові межі значення.
+
+    Повертає (номер рядка, key, version, value, початок value, кінець value).
+    """
+    start = 3 if raw.startswith(codecs.BOM_UTF8) else 0
+    body = memoryview(raw)[start:]
+    for line_num, match in enumerate(YML_LINE_BYTES_PATTERN.finditer(body)):
+        key = match.group(1)
+        if key:
+            value_start, value_end = match.span(3)
+            yield (line_num, key.decode('ascii'), match.group(2).decode('ascii'),
+                   match.group(3).decode('utf-8'), start + value_start, start + value_end)
+
+
+def atomic_write(file_path: str, data: bytes):
+    """Записує файл через тимчасовий файл з fsync і атомарною заміною."""
+    tmp_path = f'{file_path}.tmp'
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def replace_yml_values(raw: bytes, new_values: Dict[int, Tuple[str, str]]) -> Optional[bytes]:
+    """Замінює значення записів {номер рядка: (key, нове значення)}.
+
+    Усі інші байти (BOM, відступи, версії, закінчення рядків) лишаються
+    без змін. Повертає None, якщо якогось ключа немає на вказаному рядку.
+    """
+    parts = []
+    pos = 0
+    found = 0
+    for line_num, key, _, _, value_start, value_end in iter_yml_entries(raw):
+        replacement = new_values.get(line_num)
+        if replacement is None:
+            continue
+        if replacement[0] != key:
+            return None
+        parts.append(raw[pos:value_start])
+        parts.append(replacement[1].encode('utf-8'))
+        pos = value_end
+        found += 1
+
+    if found != len(new_values):
+        return None
+    parts.append(raw[pos:])
+    return b''.join(parts)
+
+
+# Функції парсингу рівня модуля, щоб їх можна було запускати в пулі процесів.
+# Повертають (рядки, хеш вмісту або None); при помилці рядки = None.
+
+def parse_original_file(file_path: str, with_digest: bool = False) -> Tuple[Optional[list], Optional[str]]:
+    """Парсить файл оригіналів у список (key, value)."""
+    try:
+        with open(file_path, 'rb') as f:
+            raw = f.read()
+        rows = [(key, value) for _, key, _, value in parse_yml_bytes(raw)]
+        return rows, content_digest(raw) if with_digest else None
+    except Exception as e:
+        print(f"Помилка читання {file_path}: {e}", file=sys.stderr)
+        return None, None
+
+
+def parse_mod_file(file_path: str, with_digest: bool = False) -> Tuple[Optional[list], Optional[str]]:
+    """Парсить файл мода у список (line_number, key, version, value, is_translated)."""
+    try:
+        with open(file_path, 'rb') as f:
+            raw = f.read()
+        rows = parse_yml_bytes(raw)
+
+        # Класифікуємо пакетом: повторювані значення рахуються один раз
+        statuses = CLASSIFIER.classify_many([row[3] for row in rows])
+        rows = [row + (status,) for row, status in zip(rows, statuses)]
+        return rows, content_digest(raw) if with_digest else None
+    except Exception as e:
+        print(f"Помилка читання {file_path}: {e}", file=sys.stderr)
+        return None, None
+
+
+def file_signature(stat: os.stat_result) -> Tuple[int, int]:
+    """Підпис файлу для виявлення змін: (розмір, mtime_ns)."""
+    return stat.st_size, stat.st_mtime_ns
+
+
+def scan_files(section: str, yml_files: List[Path], parse_func, progress_callback=None,
+               cache: Optional[ScanCache] = None, workers: int = 1,
+               signatures: Optional[Dict[str, Tuple[int, int]]] = None) -> List[Optional[list]]:
+    """Парсить файли з кешу, послідовно або в пулі процесів.
+
+    Результати повертаються в порядку yml_files, незалежно від порядку
+    завершення воркерів, тож злиття детерміноване. Якщо передано signatures,
+    туди записуються підписи файлів (знімаються до читання).
+    """
+    total = len(yml_files)
+    results: List[Optional[list]] = [None] * total
+    stats: Dict[int, os.stat_result] = {}
+    misses: List[int] = []
+    done = 0
+
+    for i, yml_file in enumerate(yml_files):
+        if cache or signatures is not None:
+            try:
+                stats[i] = yml_file.stat()
+            except OSError as e:
+                print(f"Помилка читання {yml_file}: {e}", file=sys.stderr)
+                continue
+            if signatures is not None:
+                signatures[str(yml_file)] = file_signature(stats[i])
+        if cache:
+            rows = cache.get(section, yml_file, stats[i])
+            if rows is not None:
+                results[i] = rows
+                done += 1
+                if progress_callback:
+                    progress_callback(done, total, yml_file.name)
+                continue
+        misses.append(i)
+
+    with_digest = bool(cache and cache.verify_hash)
+    paths = [str(yml_files[i]) for i in misses]
+
+    executor = None
+    if workers > 1 and len(paths) >= PARALLEL_MIN_FILES:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        parsed = executor.map(parse_func, paths, [with_digest] * len(paths),
+                              chunksize=max(1, len(paths) // (workers * 8)))
+    else:
+        parsed = (parse_func(path, with_digest) for path in paths)
+
+    try:
+        for i, (rows, digest) in zip(misses, parsed):
+            results[i] = rows
+            if cache and rows is not None:
+                cache.put(section, yml_files[i], stats[i], rows, digest)
+            done += 1
+            if progress_callback:
+                progress_callback(done, total, yml_files[i].name)
+    finally:
+        if executor:
+            executor.shutdown()
+
+    return results
+
+
+@dataclass
+class FileChanges:
+    """Зміни файлів відносно останнього сканування."""
+    files: List[Path]  # усі поточні файли в порядку rglob
+    changed: List[Path]
+    added: List[Path]
+    deleted: List[str]
+
+    def __bool__(self) -> bool:
+        return bool(self.changed or self.added or self.deleted)
+
+
+def detect_changes(root_dir: Path, pattern: str,
+                   known: Dict[str, Tuple[int, int]]) -> FileChanges:
+    """Порівнює файли на диску з відомими підписами (опитування stat)."""
+    files = list(root_dir.rglob(pattern))
+    changed = []
+    added = []
+    seen = set()
+
+    for yml_file in files:
+        path = str(yml_file)
+        seen.add(path)
+        try:
+            signature = file_signature(yml_file.stat())
+        except OSError:
+            continue
+        if path not in known:
+            added.append(yml_file)
+        elif known[path] != signature:
+            changed.append(yml_file)
+
+    deleted = [path for path in known if path not in seen]
+    return FileChanges(files, changed, added, deleted)
+
+
+class FileLines:
+    """Рядки файлу, повністю декодовані в пам'яті."""
+
+    def __init__(self, file_path: str):
+        _, self.has_bom, content = read_yml(Path(file_path))
+        self.file_path = file_path
+        self.lines = split_lines(content)
+
+    def __len__(self) -> int:
+        return len(self.lines)
+
+    def get(self, start: int, end: int) -> List[str]:
+        return self.lines[start:end]
+
+
+class MappedFileLines:
+    """Рядки файлу через mmap та індекс зсувів рядків.
+
+    У пам'яті тримається лише масив зсувів; потрібні рядки декодуються
+    на вимогу. Файл відображається тільки на час читання, щоб не блокувати
+    його для зовнішніх редакторів (Windows не дає змінювати відображений файл).
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.has_bom = False
+        self.offsets = array('Q')  # початок кожного рядка + кінець файлу
+        self._build_index()
+
+    def _read(self, start: int, end: int) -> bytes:
+        if end <= start:
+            return b''
+        with open(self.file_path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return mm[start:end]
+
+    def _build_index(self):
+        with open(self.file_path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                self.offsets = array('Q', [0])
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                self.has_bom = mm[:3] == codecs.BOM_UTF8
+                start = 3 if self.has_bom else 0
+                offsets = array('Q', [start])
+                offsets.extend(m.end() for m in NEWLINE_BYTES_PATTERN.finditer(mm, start))
+                if offsets[-1] != size:
+                    offsets.append(size)
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def get(self, start: int, end: int) -> List[str]:
+        end = min(end, len(self))
+        if start >= end:
+            return []
+        raw = self._read(self.offsets[start], self.offsets[end])
+        return split_lines(raw.decode('utf-8'))
+
+
+@dataclass
+class OriginalLanguage:
+    """Оригінали однієї мови: файли і стовпець значень за id ключа."""
+    files: List[str] = field(default_factory=list)  # порядок файлів визначає пріоритет ключів
+    # Файл -> (id ключів, значення) у порядку рядків
+    file_rows: Dict[str, Tuple[array, List[str]]] = field(default_factory=dict)
+    file_stats: Dict[str, Tuple[int, int]] = field(default_factory=dict)
+    values: List[Optional[str]] = field(default_factory=list)  # id ключа -> значення
+    count: int = 0
+
+
+class OriginalTextsDatabase:
+    """База даних оригінальних текстів з гри.
+
+    Ключі всіх мов зберігаються один раз у спільній таблиці keys, а кожна
+    завантажена мова — лише стовпець значень за id ключа. Мови
+    довантажуються за потреби (load() можна викликати з фонового потоку),
+    тож перемикання мови референсу не потребує повторного сканування.
+    """
+
+    def __init__(self):
+        self.root_dir: Optional[Path] = None
+        self.language = 'english'  # мова референсу за замовчуванням для get()
+        self.keys = StringTable()
+        self.languages: Dict[str, OriginalLanguage] = {}
+        # Таблиця ключів спільна, тож мови завантажуються й оновлюються по одній
+        self._lock = threading.Lock()
+
+    def scan(self, root_dir: Path, language: str = 'english', progress_callback=None,
+             cache: Optional[ScanCache] = None, workers: int = 1) -> int:
+        """Сканує оригінальні файли локалізації мови, забуваючи інші мови."""
+        with self._lock:
+            self.root_dir = root_dir
+            self.keys = StringTable()
+            self.languages = {}
+        self.language = language
+        return self.load(language, progress_callback, cache, workers)
+
+    def load(self, language: str, progress_callback=None,
+             cache: Optional[ScanCache] = None, workers: int = 1) -> int:
+        """Завантажує (або перечитує) мову; повертає кількість ключів у ній."""
+        yml_files = list(self.root_dir.rglob(f'*_l_{language}.yml'))
+        state = OriginalLanguage(files=[str(yml_file) for yml_file in yml_files])
+
+        results = scan_files('originals', yml_files, parse_original_file,
+                             progress_callback, cache, workers, state.file_stats)
+
+        with self._lock:
+            for path, rows in zip(state.files, results):
+                if rows is not None:
+                    state.file_rows[path] = self._intern_rows(rows)
+            self._rebuild_values(state)
+            self.languages[language] = state
+        return state.count
+
+    def is_loaded(self, language: str) -> bool:
+        return language in self.languages
+
+    def _intern_rows(self, rows: list) -> Tuple[array, List[str]]:
+        if not rows:
+            return array('i'), []
+        keys, values = zip(*rows)
+        return array('i', map(self.keys.intern, keys)), list(values)
+
+    def _rebuild_values(self, state: OriginalLanguage):
+        values: List[Optional[str]] = [None] * len(self.keys.strings)
+        count = 0
+        for path in state.files:
+            key_ids, file_values = state.file_rows.get(path, ((), ()))
+            for key_id, value in zip(key_ids, file_values):
+                # Зберігаємо тільки якщо ще немає (перший знайдений має пріоритет)
+                if values[key_id] is None:
+                    values[key_id] = value
+                    count += 1
+        state.values = values
+        state.count = count
+
+    def detect_changes(self) -> Dict[str, FileChanges]:
+        """Шукає змінені, нові та видалені файли завантажених мов: {мова: зміни}."""
+        if self.root_dir is None:
+            return {}
+        result = {}
+        for language, state in list(self.languages.items()):
+            changes = detect_changes(self.root_dir, f'*_l_{language}.yml', dict(state.file_stats))
+            if changes:
+                result[language] = changes
+        return result
+
+    def refresh(self, changes: Optional[Dict[str, FileChanges]] = None,
+                cache: Optional[ScanCache] = None) -> Dict[str, FileChanges]:
+        """Перечитує лише змінені файли оригіналів."""
+        if changes is None:
+            changes = self.detect_changes()
+
+        for language, language_changes in changes.items():
+            state = self.languages.get(language)
+            if state is None:
+                continue
+
+            to_parse = language_changes.changed + language_changes.added
+            results = scan_files('originals', to_parse, parse_original_file,
+                                 cache=cache, signatures=state.file_stats)
+
+            with self._lock:
+                for path in language_changes.deleted:
+                    state.file_rows.pop(path, None)
+                    state.file_stats.pop(path, None)
+                for yml_file, rows in zip(to_parse, results):
+                    state.file_rows[str(yml_file)] = self._intern_rows(rows or [])
+                state.files = [str(yml_file) for yml_file in language_changes.files]
+                self._rebuild_values(state)
+        return changes
+
+    def get_all(self, keys: List[str], language: Optional[str] = None) -> List[Optional[str]]:
+        """Як get() для списку ключів, але без накладних витрат на кожен виклик."""
+        state = self.languages.get(language or self.language)
+        if state is None:
+            return [None] * len(keys)
+        key_ids = self.keys.ids
+        values = state.values
+        size = len(values)
+        result = []
+        for key in keys:
+            key_id = key_ids.get(key)
+            result.append(values[key_id] if key_id is not None and key_id < size else None)
+        return result
+
+    def get(self, key: str, language: Optional[str] = None) -> Optional[str]:
+        """Повертає оригінальний текст за ключем (мовою референсу, якщо не вказано)."""
+        state = self.languages.get(language or self.language)
+        key_id = self.keys.get_id(key)
+        if state is None or key_id is None or key_id >= len(state.values):
+            return None
+        return state.values[key_id]
+
+
+class SearchResults(list):
+    """Результати пошуку; truncated — пошук зупинено через бюджет часу."""
+    truncated = False
+
+
+def budget_state(cancel: Optional[threading.Event], deadline: Optional[float]) -> Optional[str]:
+    """'cancel' — роботу скасовано, 'deadline' — вичерпано бюджет часу, None — можна далі."""
+    if cancel is not None and cancel.is_set():
+        return 'cancel'
+    if deadline is not None and time.monotonic() > deadline:
+        return 'deadline'
+    return None
+
+
+def edit_distance(a: str, b: str) -> int:
+    """Відстань Левенштейна (бітово-паралельний алгоритм Маєрса)."""
+    if not a:
+        return len(b)
+    mask = (1 << len(a)) - 1
+    last = 1 << (len(a) - 1)
+    peq: Dict[str, int] = {}
+    for i, char in enumerate(a):
+        peq[char] = peq.get(char, 0) | (1 << i)
+
+    pv, mv, score = mask, 0, len(a)
+    for char in b:
+        eq = peq.get(char, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & mask)
+        mh = pv & xh
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+        ph = ((ph << 1) | 1) & mask
+        mh = (mh << 1) & mask
+        pv = mh | (~(xv | ph) & mask)
+        mv = ph & xv
+    return score
+
+
+def fuzzy_max_distance(word: str) -> int:
+    """Скільки помилок допускається у слові: у коротких словах менше."""
+    if len(word) <= 3:
+        return 0
+    if len(word) <= 6:
+        return 1
+    return FUZZY_MAX_DISTANCE
+
+
+@lru_cache(maxsize=256)
+def compile_search_pattern(query: str, mode: str) -> re.Pattern:
+    """Компілює запит режиму "ціле слово" або "регулярний вираз".
+
+    Некоректний регулярний вираз піднімає re.error.
+    """
+    if mode == SEARCH_REGEX:
+        return re.compile(query, re.IGNORECASE)
+    return re.compile(rf'(?<!\w){re.escape(query)}(?!\w)', re.IGNORECASE)
+
+
+@dataclass
+class IndexSnapshot:
+    """Узгоджений стан SearchIndex для одного пошуку у фоновому потоці.
+
+    Індекс не змінює ці об'єкти на місці, а підміняє їх новими, тож знімок
+    лишається цілісним, поки головний потік зберігає записи. Корпус None —
+    ще не побудований (див. SearchIndex.prepare).
+    """
+    entries: List['LocalizationEntry']
+    doc_ids: Dict['LocalizationEntry', int]
+    corpus: Optional[str]
+    offsets: Optional[array]
+    overrides: Dict[int, str]
+    category_docs: Dict[int, Set[int]]
+    untranslated: Set[int]
+    outdated: Set[int]
+    fuzzy_cache: Dict[str, Tuple[str, ...]]
+
+
+@dataclass
+class SortOrder:
+    """Порядок усіх записів індексу за колонкою результатів.
+
+    keys — ключ сортування кожного запису (рахується один раз), order —
+    номери записів за (ключ, номер), rank — місце кожного запису в order
+    (None — ще не рахувалось). Після переміщення запису місця між старою
+    і новою позицією перераховуються лише при наступному зверненні (stale).
+    """
+    keys: list
+    order: array
+    rank: Optional[array] = None
+    stale: Optional[Tuple[int, int]] = None
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def __getitem__(self, position: int):
+        """(ключ, номер запису) на місці position — для bisect без копії порядку."""
+        doc_id = self.order[position]
+        return self.keys[doc_id], doc_id
+
+    def move(self, doc_id: int, key):
+        """Переносить запис на місце нового ключа двійковим пошуком."""
+        old = self.keys[doc_id]
+        if old == key:
+            return
+        old_position = bisect_left(self, (old, doc_id))
+        del self.order[old_position]
+        self.keys[doc_id] = key
+        position = bisect_left(self, (key, doc_id))
+        self.order.insert(position, doc_id)
+        # Зсуваються лише записи між старим і новим місцем
+        low, high = min(old_position, position), max(old_position, position) + 1
+        if self.stale is not None:
+            low, high = min(low, self.stale[0]), max(high, self.stale[1])
+        self.stale = (low, high)
+
+    def ranks(self) -> array:
+        """Місце кожного запису в order."""
+        if self.rank is None:
+            self.rank = array('I', bytes(self.order.itemsize * len(self.order)))
+            self.stale = (0, len(self.order))
+        if self.stale is not None:
+            low, high = self.stale
+            rank, order = self.rank, self.order
+            for position in range(low, high):
+                rank[order[position]] = position
+            self.stale = None
+        return self.rank
+
+
+class SearchIndex:
+    """Індекс для пошуку підрядка та фільтрів за категорією і статусом.
+
+    Усі записи зберігаються одним рядком у нижньому регістрі
+    ("key\\tvalue\\n..."), тож пошук — це str.find на рівні C, а не .lower()
+    кожного ключа й значення на кожен запит. Номер запису за позицією
+    збігу шукається бінарним пошуком у масиві зсувів.
+
+    Фільтри — множини номерів записів (категорія, неперекладені), їх
+    комбінація — перетин множин.
+
+    Корпус і фільтри будуються ліниво, при першому пошуку (GUI будує
+    корпус у фоні одразу після сканування): статистиці та командному
+    рядку без пошуку вони не потрібні.
+
+    Пошук іде у фоновому потоці, а записи змінює головний: зміни
+    підміняють множини й словники новими об'єктами під _lock, а пошук
+    працює зі знімком (snapshot), взятим під тим самим замком.
+    """
+
+    # Після скількох змінених записів корпус перебудовується
+    MAX_OVERRIDES = 1000
+    # Коротші запити збігаються майже з усім, і лінійний обхід швидший
+    MIN_QUERY_LENGTH = 3
+    # Менші вибірки фільтрів дешевше перевірити напряму, ніж шукати в корпусі
+    FACET_SCAN_LIMIT = 20_000
+    # Через стільки записів перевіряється, чи не скасовано пошук
+    CHUNK_SIZE = 8192
+    # Через стільки символів корпусу — те саме для пошуку в корпусі (навіть без збігів)
+    CHECK_CHARS = 1 << 20
+    # Вибірку, більшу за 1/N усіх записів, дешевше взяти з готового порядку, ніж сортувати
+    SORT_MERGE_RATIO = 16
+
+    def __init__(self):
+        self.entries: List[LocalizationEntry] = []
+        self.doc_ids: Dict[LocalizationEntry, int] = {}
+        # Корпус і зсуви записів у ньому; None — ще не побудовані
+        self.corpus: Optional[str] = None
+        self.offsets: Optional[array] = None
+        # Записи, змінені після build(): номер запису -> новий текст
+        self.overrides: Dict[int, str] = {}
+        # Фасети: категорія -> номери записів, номери неперекладених записів; None — не побудовані
+        self.category_docs: Optional[Dict[int, Set[int]]] = None
+        self.untranslated: Optional[Set[int]] = None
+        self.untranslated_counts: Dict[int, int] = {}
+        # Номери перекладених записів, оригінал яких змінився, і тих, для яких
+        # хешу оригіналу ще немає (задає LocalizationDatabase.check_sources)
+        self.outdated: Set[int] = set()
+        self.unverified: Set[int] = set()
+        # Для нечіткого пошуку: (корпус, його словник) та варіанти слів
+        self._vocabulary_text: Optional[Tuple[str, str]] = None
+        self._fuzzy_cache: Dict[str, Tuple[str, ...]] = {}
+        # Колонка -> порядок записів, рахується при першому сортуванні
+        self._sort_orders: Dict[str, SortOrder] = {}
+        self._lock = threading.Lock()
+        # Корпус будує лише один потік (фонова підготовка або перший пошук)
+        self._corpus_lock = threading.Lock()
+
+    @staticmethod
+    def _document(entry: LocalizationEntry) -> str:
+        return f'{entry.key}\t{entry.value}'.lower()
+
+    def build(self, entries: List[LocalizationEntry]):
+        """Задає записи індексу (порядок результатів — порядок entries).
+
+        Корпус і фільтри будуються пізніше, при першому пошуку.
+        """
+        entries = list(entries)
+        doc_ids = {entry: doc_id for doc_id, entry in enumerate(entries)}
+        # Усе підміняється разом, щоб пошук не побачив корпус однієї побудови із записами іншої
+        with self._lock:
+            self.entries = entries
+            self.doc_ids = doc_ids
+            self.corpus = None
+            self.offsets = None
+            self.overrides = {}
+            self.category_docs = None
+            self.untranslated = None
+            self.untranslated_counts = {}
+            self._vocabulary_text = None
+            self._fuzzy_cache = {}
+            self._sort_orders = {}
+
+    def _build_facets(self):
+        """Будує фільтри за поточними статусами записів (викликається під _lock)."""
+        category_docs: Dict[int, Set[int]] = {}
+        untranslated = set()
+        for doc_id, entry in enumerate(self.entries):
+            category_docs.setdefault(entry.category_id, set()).add(doc_id)
+            if not entry.is_translated:
+                untranslated.add(doc_id)
+        self.category_docs = category_docs
+        self.untranslated = untranslated
+        self.untranslated_counts = {category_id: len(docs & untranslated)
+                                    for category_id, docs in category_docs.items()}
+
+    def _build_corpus(self, snapshot: IndexSnapshot):
+        """Будує корпус записів знімка, якщо його ще немає, і ставить у знімок та індекс.
+
+        Записи, змінені під час побудови, вже є в overrides, тож корпус
+        можна будувати без _lock, не блокуючи збереження.
+        """
+        if snapshot.corpus is not None:
+            return
+        with self._corpus_lock:
+            with self._lock:
+                ready = self.entries is snapshot.entries and self.corpus is not None
+                if ready:
+                    snapshot.corpus, snapshot.offsets = self.corpus, self.offsets
+            if ready:
+                return
+            documents = [self._document(entry) for entry in snapshot.entries]
+            offsets = array('Q', [0])
+            offsets.extend(accumulate(len(document) + 1 for document in documents))
+            snapshot.corpus, snapshot.offsets = '\n'.join(documents) + '\n', offsets
+            with self._lock:
+                if self.entries is snapshot.entries:
+                    self.corpus, self.offsets = snapshot.corpus, snapshot.offsets
+
+    def prepare(self):
+        """Будує корпус і фільтри заздалегідь (GUI викликає це у фоновому потоці)."""
+        self._build_corpus(self.snapshot())
+
+    def update(self, entry: LocalizationEntry):
+        """Враховує нове значення та статус запису без перебудови корпусу."""
+        doc_id = self.doc_ids.get(entry)
+        if doc_id is None:
+            return
+
+        with self._lock:
+            # Нові об'єкти замість змін на місці: їх може читати пошук у фоні.
+            # Ще не побудовані фільтри візьмуть статус із самого запису
+            untranslated = self.untranslated
+            if untranslated is not None:
+                if entry.is_translated and doc_id in untranslated:
+                    self.untranslated = untranslated - {doc_id}
+                    self.untranslated_counts[entry.category_id] -= 1
+                elif not entry.is_translated and doc_id not in untranslated:
+                    self.untranslated = untranslated | {doc_id}
+                    self.untranslated_counts[entry.category_id] += 1
+
+            # Корпус може саме будуватися з попереднього значення, тож зміна запам'ятовується завжди
+            self.overrides = {**self.overrides, doc_id: self._document(entry)}
+            # Нове значення може містити нові варіанти слів і змінює його місце в сортуванні
+            self._fuzzy_cache = {}
+            for column in ('value', 'status'):
+                sort_order = self._sort_orders.get(column)
+                if sort_order is not None:
+                    sort_order.move(doc_id, self._sort_key(column)(entry))
+        if len(self.overrides) > self.MAX_OVERRIDES:
+            self.build(self.entries)
+
+    def set_outdated(self, outdated: Set[int], unverified: Set[int]):
+        with self._lock:
+            self.outdated = outdated
+            self.unverified = unverified
+
+    def discard_outdated(self, entry: LocalizationEntry):
+        """Запис звірено з поточним оригіналом: він не застарілий і не без звірки."""
+        doc_id = self.doc_ids.get(entry)
+        with self._lock:
+            if doc_id in self.outdated:
+                self.outdated = self.outdated - {doc_id}
+            if doc_id in self.unverified:
+                self.unverified = self.unverified - {doc_id}
+
+    def snapshot(self) -> IndexSnapshot:
+        """Поточний стан індексу для пошуку (див. IndexSnapshot), з фільтрами."""
+        with self._lock:
+            if self.category_docs is None:
+                self._build_facets()
+            return IndexSnapshot(self.entries, self.doc_ids, self.corpus, self.offsets,
+                                 self.overrides, self.category_docs, self.untranslated,
+                                 self.outdated, self._fuzzy_cache)
+
+    def supports(self, query: str) -> bool:
+        """Чи варто шукати запит через корпус (роздільники в запиті — ні)."""
+        return (len(query) >= self.MIN_QUERY_LENGTH
+                and '\t' not in query and '\n' not in query)
+
+    def _expired(self, cancel: Optional[threading.Event], deadline: Optional[float]) -> Optional[str]:
+        """'cancel' — пошук скасовано, 'deadline' — вичерпано бюджет часу."""
+        return budget_state(cancel, deadline)
+
+    def find_ids(self, query: str, limit: Optional[int] = None,
+                 cancel: Optional[threading.Event] = None,
+                 deadline: Optional[float] = None,
+                 snapshot: Optional[IndexSnapshot] = None) -> Optional[SearchResults]:
+        """Повертає номери записів, ключ або значення яких містять query.
+
+        limit — зупинитися після стількох збігів; None — якщо пошук скасовано.
+        snapshot — стан індексу, в якому шукати (за замовчуванням поточний).
+        """
+        if snapshot is None:
+            snapshot = self.snapshot()
+        self._build_corpus(snapshot)
+        query = query.lower()
+        corpus_find = snapshot.corpus.find
+        offsets = snapshot.offsets
+        overrides = snapshot.overrides
+        doc_ids = SearchResults()
+
+        pos = corpus_find(query)
+        next_check = pos + self.CHECK_CHARS
+        while pos != -1:
+            doc_id = bisect_right(offsets, pos) - 1
+            if doc_id not in overrides:
+                doc_ids.append(doc_id)
+                if len(doc_ids) == limit:
+                    break
+            # Перевірка за пройденим текстом, а не за збігами: рідкісний запит теж можна скасувати
+            if pos >= next_check:
+                next_check = pos + self.CHECK_CHARS
+                expired = self._expired(cancel, deadline)
+                if expired == 'cancel':
+                    return None
+                if expired:
+                    doc_ids.truncated = True
+                    break
+            # Далі шукаємо з наступного запису
+            pos = corpus_find(query, offsets[doc_id + 1])
+
+        if overrides:
+            doc_ids.extend(doc_id for doc_id, document in overrides.items() if query in document)
+            doc_ids.sort()
+            if limit is not None:
+                del doc_ids[limit:]
+
+        return doc_ids
+
+    def _filter(self, snapshot: IndexSnapshot, candidates: List[LocalizationEntry], match,
+                untranslated_only: bool, limit: Optional[int], cancel: Optional[threading.Event],
+                deadline: Optional[float], outdated_only: bool = False) -> Optional[SearchResults]:
+        """Перевіряє кандидатів напряму, частинами, щоб пошук можна було перервати."""
+        results = SearchResults()
+        for start in range(0, len(candidates), self.CHUNK_SIZE):
+            expired = self._expired(cancel, deadline)
+            if expired == 'cancel':
+                return None
+            if expired:
+                results.truncated = True
+                return results
+            for entry in candidates[start:start + self.CHUNK_SIZE]:
+                if untranslated_only and entry.is_translated:
+                    continue
+                if outdated_only and snapshot.doc_ids.get(entry) not in snapshot.outdated:
+                    continue
+                if match is not None and not match(entry):
+                    continue
+                results.append(entry)
+            if limit is not None and len(results) >= limit:
+                del results[limit:]
+                return results
+        return results
+
+    def _vocabulary(self, snapshot: IndexSnapshot) -> str:
+        """Усі різні слова корпусу, по одному в рядку (будується при першому запиті)."""
+        self._build_corpus(snapshot)
+        cached = self._vocabulary_text
+        if cached is None or cached[0] is not snapshot.corpus:
+            cached = self._vocabulary_text = (
+                snapshot.corpus, '\n'.join(set(WORD_PATTERN.findall(snapshot.corpus))))
+        return cached[1]
+
+    def _fuzzy_variants(self, snapshot: IndexSnapshot, word: str) -> Tuple[str, ...]:
+        """Слова корпусу, що відрізняються від word не більше ніж на допустимі помилки."""
+        word = word.lower()
+        variants = snapshot.fuzzy_cache.get(word)
+        if variants is not None:
+            return variants
+
+        max_distance = fuzzy_max_distance(word)
+        found = {word}
+        if max_distance:
+            # Слово з k помилками містить без змін хоча б один з k+1 шматків запиту,
+            # тож відстань рахується лише для слів словника з таким шматком
+            size = len(word) // (max_distance + 1)
+            pieces = {word[i * size:(i + 1) * size] for i in range(max_distance)}
+            pieces.add(word[max_distance * size:])
+            candidates_pattern = re.compile(
+                r'^[^\n]*(?:' + '|'.join(map(re.escape, pieces)) + r')[^\n]*$', re.MULTILINE)
+            candidates = candidates_pattern.findall(self._vocabulary(snapshot))
+            for document in snapshot.overrides.values():
+                candidates.extend(WORD_PATTERN.findall(document))
+            found.update(candidate for candidate in candidates
+                         if abs(len(candidate) - len(word)) <= max_distance
+                         and edit_distance(word, candidate) <= max_distance)
+
+        variants = tuple(sorted(found, key=len, reverse=True))
+        snapshot.fuzzy_cache[word] = variants
+        return variants
+
+    def _matcher(self, snapshot: IndexSnapshot, query: str, mode: str):
+        """Повертає (перевірка запису, підрядки для відбору кандидатів у корпусі).
+
+        Перевірка None — запит порожній; підрядки None — кандидати
+        перевіряються всі.
+        """
+        if not query:
+            return None, None
+
+        if mode == SEARCH_TEXT:
+            query_lower = query.lower()
+            return (lambda entry: query_lower in entry.key.lower() or query_lower in entry.value.lower(),
+                    (query,) if self.supports(query) else None)
+
+        if mode == SEARCH_FUZZY:
+            words = WORD_PATTERN.findall(query)
+            if not words:
+                return self._matcher(snapshot, query, SEARCH_TEXT)
+            all_variants = [self._fuzzy_variants(snapshot, word) for word in words]
+            # Межі слова — як у WORD_PATTERN: лише літери
+            patterns = [re.compile(r'(?<![^\W\d_])(?:' + '|'.join(map(re.escape, variants))
+                                   + r')(?![^\W\d_])', re.IGNORECASE)
+                        for variants in all_variants]
+            # Кандидати — записи з будь-яким варіантом найдовшого слова
+            prefilter = max(all_variants, key=lambda variants: len(variants[-1]))
+            if not all(self.supports(variant) for variant in prefilter):
+                prefilter = None
+            return (lambda entry: all(pattern.search(entry.key) or pattern.search(entry.value)
+                                      for pattern in patterns),
+                    prefilter)
+
+        pattern = compile_search_pattern(query, mode)
+        # Ціле слово — це також підрядок, тож кандидатів відбирає корпус
+        prefilter = (query,) if mode == SEARCH_WORD and self.supports(query) else None
+        return (lambda entry: pattern.search(entry.key) is not None or pattern.search(entry.value) is not None,
+                prefilter)
+
+    def search(self, query: str = "", category_id: Optional[int] = None,
+               untranslated_only: bool = False,
+               within: Optional[List[LocalizationEntry]] = None,
+               limit: Optional[int] = None,
+               cancel: Optional[threading.Event] = None,
+               mode: str = SEARCH_TEXT,
+               deadline: Optional[float] = None,
+               outdated_only: bool = False) -> Optional[SearchResults]:
+        """Шукає записи; category_id None — усі категорії.
+
+        within — результати попереднього запиту з тими ж фільтрами, який є
+        частиною цього: тоді звужуємо їх, а не шукаємо знову. limit — лише
+        перші результати. mode — SEARCH_TEXT/WORD/REGEX/FUZZY. Після deadline
+        (time.monotonic()) повертаються вже знайдені результати з
+        truncated=True. outdated_only — лише застарілі переклади. Повертає
+        None, якщо cancel встановлено.
+        """
+        if cancel is not None and cancel.is_set():
+            return None
+
+        snapshot = self.snapshot()
+        match, prefilter = self._matcher(snapshot, query, mode)
+
+        if within is not None and len(within) <= self.FACET_SCAN_LIMIT:
+            # Статус міг змінитися після збереження, тому перевіряємо його знову
+            return self._filter(snapshot, within, match, untranslated_only, limit, cancel,
+                                deadline, outdated_only)
+
+        facets = []
+        if category_id is not None:
+            facets.append(snapshot.category_docs.get(category_id, set()))
+        if untranslated_only:
+            facets.append(snapshot.untranslated)
+        if outdated_only:
+            facets.append(snapshot.outdated)
+
+        facets.sort(key=len)
+
+        entries = snapshot.entries
+        if prefilter is not None and not (facets and len(facets[0]) <= self.FACET_SCAN_LIMIT):
+            # Збіг у корпусі точний лише для звичайного тексту, інакше це кандидати
+            exact = mode == SEARCH_TEXT
+            found = []
+            for substring in prefilter:
+                doc_ids = self.find_ids(substring, limit if exact and not facets else None,
+                                        cancel, deadline, snapshot)
+                if doc_ids is None:
+                    return None
+                found.append(doc_ids)
+            truncated = any(doc_ids.truncated for doc_ids in found)
+            doc_ids = found[0] if len(found) == 1 else sorted(set().union(*found))
+            for docs in facets:
+                doc_ids = [doc_id for doc_id in doc_ids if doc_id in docs]
+            candidates = [entries[doc_id] for doc_id in doc_ids]
+            if exact:
+                results = SearchResults(candidates[:limit])
+            else:
+                results = self._filter(snapshot, candidates, match, False, limit, cancel, deadline)
+                if results is None:
+                    return None
+            results.truncated = results.truncated or truncated
+            return results
+
+        if facets:
+            doc_ids = sorted(facets[0].intersection(*facets[1:]))
+            candidates = [entries[doc_id] for doc_id in doc_ids]
+        elif match is None:
+            return SearchResults(entries[:limit])
+        else:
+            candidates = entries
+
+        # Фасети вже враховано, лишається лише запит
+        return self._filter(snapshot, candidates, match, False, limit, cancel, deadline)
+
+    def _sort_key(self, column: str):
+        """Ключ сортування запису для колонки результатів."""
+        if column == 'key':
+            return lambda entry: collation_key(entry.key)
+        if column == 'value':
+            return lambda entry: collation_key(entry.value)
+        if column == 'category':
+            return lambda entry: collation_key(CATEGORIES[entry.category_id])
+        if column == 'file':
+            names: Dict[int, str] = {}
+
+            def file_name(entry: LocalizationEntry) -> str:
+                name = names.get(entry.file_id)
+                if name is None:
+                    name = names[entry.file_id] = collation_key(Path(entry.file_path).name)
+                return name
+            return file_name
+        return lambda entry: entry.is_translated
+
+    def _sort_order(self, column: str) -> SortOrder:
+        """Повертає порядок усіх записів за колонкою.
+
+        Рахується один раз на колонку, ключ — один раз на запис; збереження
+        запису лише переносить його в готовому порядку (див. update).
+        """
+        cached = self._sort_orders.get(column)
+        if cached is None:
+            key = self._sort_key(column)
+            keys = [key(entry) for entry in self.entries]
+            # Стабільне сортування: рівні ключі — за номером запису, як і в SortOrder.move
+            order = array('I', sorted(range(len(keys)), key=keys.__getitem__))
+            cached = self._sort_orders[column] = SortOrder(keys, order)
+        return cached
+
+    def sort(self, results: List[LocalizationEntry], column: str,
+             reverse: bool = False) -> List[LocalizationEntry]:
+        """Сортує результати за колонкою ('key', 'value', 'category', 'file', 'status').
+
+        Великі вибірки беруться з готового порядку колонки одним проходом,
+        малі — сортуються за цілим місцем запису в ньому.
+        """
+        sort_order = self._sort_order(column)
+        order = sort_order.order
+        doc_ids = self.doc_ids
+        entries = self.entries
+        if len(results) == len(order):
+            ordered = [entries[doc_id] for doc_id in order]
+        elif len(results) > len(order) // self.SORT_MERGE_RATIO:
+            wanted = {doc_ids[entry] for entry in results}
+            ordered = [entries[doc_id] for doc_id in order if doc_id in wanted]
+        else:
+            rank = sort_order.ranks()
+            ordered = sorted(results, key=lambda entry: rank[doc_ids[entry]])
+        if reverse:
+            ordered.reverse()
+        return ordered
+
+    def get_counts(self) -> Dict[int, Tuple[int, int]]:
+        """Повертає {категорія: (всього, неперекладено)}.
+
+        Без побудованих фільтрів рахує напряму, не будуючи їх.
+        """
+        with self._lock:
+            if self.category_docs is not None:
+                return {category_id: (len(docs), self.untranslated_counts[category_id])
+                        for category_id, docs in self.category_docs.items()}
+            entries = self.entries
+        counts: Dict[int, List[int]] = {}
+        for entry in entries:
+            category_counts = counts.setdefault(entry.category_id, [0, 0])
+            category_counts[0] += 1
+            if not entry.is_translated:
+                category_counts[1] += 1
+        return {category_id: tuple(category_counts) for category_id, category_counts in counts.items()}
+
+    def count_untranslated(self) -> int:
+        with self._lock:
+            if self.untranslated is not None:
+                return len(self.untranslated)
+            entries = self.entries
+        return sum(not entry.is_translated for entry in entries)
+
+
+class SaveQueue:
+    """Черга відкладеного запису змін у файли локалізації.
+
+    Зміни ставляться в чергу миттєво, а фоновий потік пише їх у файли.
+    Кілька змін одного файлу, що накопичились за час очікування,
+    записуються разом, одним записом. Запис — через тимчасовий файл з
+    fsync і атомарною заміною, тож обрив посеред запису не обрізає файл.
+    """
+
+    def __init__(self, on_written=None, delay: float = 0.3):
+        # Файл -> {номер рядка: (key, нове значення)}
+        self._pending: Dict[str, Dict[int, Tuple[str, str]]] = {}
+        # Файл -> найбільший номер запису журналу серед змін у черзі
+        self._seqs: Dict[str, int] = {}
+        self._writing: Optional[str] = None
+        # Скільки потоків чекають у flush() — тоді запис починається без затримки
+        self._flush_requests = 0
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        # on_written(файл, помилка або None, seq) — викликається з фонового потоку
+        # поза блокуванням черги; seq — найбільший номер запису журналу серед записаних змін
+        self.on_written = on_written
+        self.delay = delay
+        self.errors: List[Tuple[str, str]] = []
+
+    def put(self, file_path: str, line_number: int, key: str, value: str):
+        """Ставить зміну рядка в чергу."""
+        self.put_file(file_path, {line_number: (key, value)})
+
+    def put_file(self, file_path: str, edits: Dict[int, Tuple[str, str]], seq: int = 0):
+        """Ставить в чергу кілька змін одного файлу, що будуть записані разом.
+
+        seq — номер запису журналу з цими змінами (передається в on_written).
+        """
+        with self._condition:
+            self._pending.setdefault(file_path, {}).update(edits)
+            self._seqs[file_path] = max(self._seqs.get(file_path, 0), seq)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._condition.notify_all()
+
+    def is_pending(self, file_path: str) -> bool:
+        with self._condition:
+            return file_path in self._pending or file_path == self._writing
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Чекає, доки всі зміни буде записано. False — не встигли за timeout."""
+        with self._condition:
+            self._flush_requests += 1
+            self._condition.notify_all()
+            try:
+                return self._condition.wait_for(
+                    lambda: not self._pending and self._writing is None, timeout)
+            finally:
+                self._flush_requests -= 1
+
+    def take_errors(self) -> List[Tuple[str, str]]:
+        """Повертає й очищує список (файл, помилка) невдалих записів."""
+        with self._condition:
+            errors, self.errors = self.errors, []
+            return errors
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending)
+                # Чекаємо ще трохи, щоб наступні зміни того ж файлу потрапили в той самий запис
+                self._condition.wait_for(lambda: self._flush_requests, self.delay)
+                file_path, edits = next(iter(self._pending.items()))
+                del self._pending[file_path]
+                seq = self._seqs.pop(file_path, 0)
+                self._writing = file_path
+
+            error = None
+            try:
+                self._write(file_path, edits)
+            except Exception as e:
+                error = e
+                print(f"Помилка збереження {file_path}: {e}", file=sys.stderr)
+
+            # Поза блокуванням і до зняття _writing: flush() повертається вже після
+            # обробки запису, а помилка обробника не зупиняє потік і не вішає flush()
+            if self.on_written:
+                try:
+                    self.on_written(file_path, error, seq)
+                except Exception as e:
+                    print(f"Помилка обробки запису {file_path}: {e}", file=sys.stderr)
+
+            with self._condition:
+                if error is not None:
+                    self.errors.append((file_path, str(error)))
+                self._writing = None
+                self._condition.notify_all()
+
+    @staticmethod
+    def _write(file_path: str, edits: Dict[int, Tuple[str, str]]):
+        with open(file_path, 'rb') as f:
+            raw = f.read()
+
+        # None, якщо файл змінили ззовні після сканування і ключ зсунувся
+        content = replace_yml_values(raw, edits)
+        if content is None:
+            raise ValueError("рядки файлу не збігаються з відсканованими (файл змінено ззовні?)")
+
+        atomic_write(file_path, content)
+
+
+class EditJournal:
+    """Журнал збережених змін (JSON Lines, лише дописування).
+
+    Кожне збереження — один дописаний рядок із fsync, тож воно надійне
+    одразу, ще до перезапису yml (SaveQueue пише файли згодом):
+    {"seq", "time", "action", "edits": [[файл, рядок, key, old, new], ...]}.
+    Після запису yml додається позначка {"written": файл, "seq": n}.
+    Записи, не позначені записаними, після збою повертає pending(), а
+    compact() прибирає з журналу все, що вже є у файлах.
+    """
+
+    # Після стількох дописаних байтів порожній журнал обрізається
+    COMPACT_SIZE = 1 << 20
+
+    def __init__(self, path: Path = JOURNAL_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = None
+        self._seq = 0
+        self._appended = 0
+        # seq -> запис, зміни якого ще не всі у файлах
+        self._unwritten: Dict[int, dict] = {}
+        # seq -> файли запису, ще не записані
+        self._waiting: Dict[int, Set[str]] = {}
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            print(f"Помилка читання журналу {self.path}: {e}", file=sys.stderr)
+            return
+
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # Рядок, обірваний збоєм посеред дописування
+                continue
+            self._seq = max(self._seq, record['seq'])
+            if 'written' in record:
+                self._mark(record['written'], record['seq'])
+            else:
+                self._unwritten[record['seq']] = record
+                self._waiting[record['seq']] = {edit[0] for edit in record['edits']}
+
+    def _open(self):
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding='utf-8')
+        return self._file
+
+    def _append(self, record: dict, sync: bool):
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        f = self._open()
+        f.write(line)
+        f.flush()
+        if sync:
+            os.fsync(f.fileno())
+        self._appended += len(line)
+
+    def record(self, edits: List[Tuple[str, int, str, str, str]], action: str = 'edit') -> int:
+        """Дописує групу змін (файл, рядок, key, old, new); повертає її seq.
+
+        0 — журнал недоступний (зміна буде надійною лише після запису файлу).
+        """
+        with self._lock:
+            self._seq += 1
+            record = {'seq': self._seq, 'time': round(time.time(), 3), 'action': action,
+                      'edits': [list(edit) for edit in edits]}
+            try:
+                self._append(record, sync=True)
+            except OSError as e:
+                print(f"Помилка запису журналу {self.path}: {e}", file=sys.stderr)
+                return 0
+            self._unwritten[self._seq] = record
+            self._waiting[self._seq] = {edit[0] for edit in edits}
+            return self._seq
+
+    def _mark(self, file_path: str, seq: int):
+        for record_seq in [record_seq for record_seq in self._waiting if record_seq <= seq]:
+            files = self._waiting[record_seq]
+            files.discard(file_path)
+            if not files:
+                del self._waiting[record_seq]
+                del self._unwritten[record_seq]
+
+    def mark_written(self, file_path: str, seq: int):
+        """Позначає, що зміни файлу з записів до seq включно вже у файлі."""
+        with self._lock:
+            self._mark(file_path, seq)
+            try:
+                # Без fsync: загублена позначка лише змусить перевірити зміну ще раз
+                self._append({'written': file_path, 'seq': seq}, sync=False)
+            except OSError as e:
+                print(f"Помилка запису журналу {self.path}: {e}", file=sys.stderr)
+                return
+            if not self._unwritten and self._appended >= self.COMPACT_SIZE:
+                self._compact()
+
+    def pending(self) -> List[dict]:
+        """Записи, зміни яких могли не потрапити у файли (у порядку seq)."""
+        with self._lock:
+            return [self._unwritten[seq] for seq in sorted(self._unwritten)]
+
+    def resolve(self, seqs: List[int]):
+        """Прибирає записи з pending() (їх зміни відновлено або вони застаріли)."""
+        with self._lock:
+            for seq in seqs:
+                self._unwritten.pop(seq, None)
+                self._waiting.pop(seq, None)
+
+    def compact(self):
+        """Переписує журнал, лишаючи лише ще не записані у файли зміни."""
+        with self._lock:
+            self._compact()
+
+    def _compact(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        data = ''.join(json.dumps(self._unwritten[seq], ensure_ascii=False) + '\n'
+                       for seq in sorted(self._unwritten))
+        try:
+            atomic_write(str(self.path), data.encode('utf-8'))
+        except OSError as e:
+            print(f"Помилка стиснення журналу {self.path}: {e}", file=sys.stderr)
+            return
+        self._appended = len(data)
+
+
+def source_hash(text: str) -> int:
+    """Короткий хеш тексту оригіналу (лише для порівняння з попереднім)."""
+    return zlib.crc32(text.encode('utf-8'))
+
+
+class SourceHashes:
+    """Хеші оригіналів (SOURCE_LANGUAGE) на момент перекладу ключів.
+
+    Файл — рядки "key\tхеш", відсортовані за ключем, тож зміни в git
+    займають по рядку на ключ. path None — лише в пам'яті.
+    """
+
+    def __init__(self, path: Optional[Path]):
+        self.path = path
+        self.hashes: Dict[str, int] = {}
+        self.dirty = False
+        # Файл записано з моменту останнього git commit
+        self.written = False
+
+    def load(self):
+        self.hashes = {}
+        if self.path is None:
+            return
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                for line in f:
+                    key, _, digest = line.rstrip('\n').partition('\t')
+                    if digest:
+                        self.hashes[key] = int(digest, 16)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"Помилка читання {self.path}: {e}", file=sys.stderr)
+        self.dirty = False
+
+    def set(self, key: str, digest: int):
+        if self.hashes.get(key) != digest:
+            self.hashes[key] = digest
+            self.dirty = True
+
+    def save(self):
+        if not self.dirty or self.path is None:
+            return
+        data = ''.join(f'{key}\t{self.hashes[key]:08x}\n' for key in sorted(self.hashes))
+        try:
+            atomic_write(str(self.path), data.encode('utf-8'))
+        except OSError as e:
+            print(f"Помилка збереження {self.path}: {e}", file=sys.stderr)
+            return
+        self.dirty = False
+        self.written = True
+
+
+@dataclass
+class MemoryMatch:
+    """Пропозиція пам'яті перекладів."""
+    score: float  # 1.0 — точний збіг оригіналу
+    source: str
+    translation: str
+    key: str
+
+
+class TranslationMemory:
+    """Пам'ять перекладів: пари (оригінал SOURCE_LANGUAGE, перекладене значення).
+
+    Однакові оригінали зберігаються один раз. Кандидати нечіткого збігу —
+    оригінали з найрідкіснішими словами запиту (інвертований індекс
+    слово -> номери оригіналів), а схожість рахується SequenceMatcher по
+    словах лише для кількох десятків кандидатів, тож запит триває мілісекунди.
+    """
+
+    # Скільки найрідкісніших слів запиту відбирають кандидатів
+    QUERY_WORDS = 6
+    # Слова з довшими списками (службові) кандидатів не відбирають
+    MAX_POSTINGS = 5000
+    # Скільки кандидатів з найбільшою кількістю спільних слів перевіряється
+    CANDIDATES = 50
+    MIN_SCORE = 0.6
+
+    def __init__(self):
+        self.sources: List[str] = []  # номер -> оригінал
+        self.source_ids: Dict[str, int] = {}  # нормалізований оригінал -> номер
+        self.source_keys: List[List[str]] = []  # номер -> ключі з цим оригіналом
+        self.key_sources: Dict[str, int] = {}
+        self.translations: Dict[str, str] = {}  # key -> переклад
+        self.postings: Dict[str, List[int]] = {}  # слово -> номери оригіналів
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        return ' '.join(text.lower().split())
+
+    def __len__(self) -> int:
+        return len(self.translations)
+
+    def update(self, key: str, source: Optional[str], translation: Optional[str]):
+        """Додає або замінює пару ключа; translation None — прибирає її."""
+        old = self.key_sources.pop(key, None)
+        if old is not None:
+            self.source_keys[old].remove(key)
+            del self.translations[key]
+        if source is None or translation is None:
+            return
+
+        normalized = self._normalize(source)
+        source_id = self.source_ids.get(normalized)
+        if source_id is None:
+            source_id = self.source_ids[normalized] = len(self.sources)
+            self.sources.append(source)
+            self.source_keys.append([])
+            for word in set(WORD_PATTERN.findall(normalized)):
+                self.postings.setdefault(word, []).append(source_id)
+        self.source_keys[source_id].append(key)
+        self.key_sources[key] = source_id
+        self.translations[key] = translation
+
+    def search(self, source: str, limit: int = 5, exclude_key: Optional[str] = None
+               ) -> List[MemoryMatch]:
+        """Найкращі переклади схожих оригіналів, від найсхожішого."""
+        normalized = self._normalize(source)
+        exact_id = self.source_ids.get(normalized)
+        scored: List[Tuple[float, int]] = []
+        if exact_id is not None:
+            scored.append((1.0, exact_id))
+
+        words = WORD_PATTERN.findall(normalized)
+        postings = sorted((self.postings[word] for word in set(words) if word in self.postings),
+                          key=len)
+        postings = [ids for ids in postings[:self.QUERY_WORDS] if len(ids) <= self.MAX_POSTINGS] \
+            or postings[:1]
+        counts = Counter()
+        for ids in postings:
+            counts.update(ids)
+
+        fuzzy = []
+        for source_id, _ in counts.most_common(self.CANDIDATES):
+            if source_id == exact_id or not self.source_keys[source_id]:
+                continue
+            matcher = SequenceMatcher(None, words, WORD_PATTERN.findall(self.sources[source_id].lower()),
+                                      autojunk=False)
+            if matcher.real_quick_ratio() < self.MIN_SCORE or matcher.quick_ratio() < self.MIN_SCORE:
+                continue
+            score = matcher.ratio()
+            if score >= self.MIN_SCORE:
+                # Ті самі слова, але інша пунктуація чи числа — не точний збіг
+                fuzzy.append((min(score, 0.99), source_id))
+        fuzzy.sort(key=lambda item: -item[0])
+        scored.extend(fuzzy)
+
+        matches = []
+        seen = set()
+        for score, source_id in scored:
+            for key in self.source_keys[source_id]:
+                translation = self.translations[key]
+                if key == exclude_key or translation in seen:
+                    continue
+                seen.add(translation)
+                matches.append(MemoryMatch(score, self.sources[source_id], translation, key))
+                if len(matches) == limit:
+                    return matches
+        return matches
+
+
+def trie_pattern(words) -> str:
+    """Регулярний вираз, що збігається з будь-яким зі слів, зі спільними префіксами.
+
+    Альтернативи згруповано деревом префіксів (як автомат Aho-Corasick),
+    тож re на кожній позиції тексту проходить одне дерево, а не перебирає
+    слова по черзі. Найдовше слово має перевагу.
+    """
+    trie: dict = {}
+    for word in words:
+        if word:
+            node = trie
+            for char in word:
+                node = node.setdefault(char, {})
+            node[''] = {}
+
+    def to_pattern(node: dict) -> str:
+        branches = [re.escape(char) + to_pattern(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f'(?:{body})?' if '' in node else body
+
+    return to_pattern(trie)
+
+
+class Glossary:
+    """Глосарій проєкту: англійський термін -> схвалені українські форми.
+
+    Файл — JSON {"термін": ["форма", ...]}; варіанти терміна (однина,
+    множина) — через "|" у ключі. Форма шукається з початку слова
+    перекладу без урахування регістру, тож можна вказати основу
+    ("претензі" для претензія/претензії/претензію) або початок фрази
+    ("Лівонського Орден").
+    """
+
+    def __init__(self, terms: Dict[str, List[str]]):
+        self.terms: List[Tuple[str, List[str]]] = [(term, forms) for term, forms in terms.items()
+                                                   if forms]
+        self._variants: Dict[str, int] = {}
+        for term_id, (term, _) in enumerate(self.terms):
+            for variant in term.split('|'):
+                if variant.strip():
+                    self._variants[variant.strip().lower()] = term_id
+        # Шукається в тексті в нижньому регістрі: без IGNORECASE і без перевірки межі
+        # слова перед збігом re перебирає позиції в кілька разів швидше (межу див. _terms)
+        self._term_pattern = None
+        if self._variants:
+            self._term_pattern = re.compile('(?:' + trie_pattern(self._variants) + r')(?!\w)')
+        self._form_patterns = [
+            re.compile(r'(?<!\w)(?:' + trie_pattern(form.lower() for form in forms) + ')',
+                       re.IGNORECASE)
+            for _, forms in self.terms
+        ]
+
+    @classmethod
+    def load(cls, path: Path) -> Optional['Glossary']:
+        """Завантажує глосарій; None — файлу немає. Некоректний файл піднімає ValueError."""
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        if not isinstance(data, dict):
+            raise ValueError("очікується об'єкт {\"термін\": [\"форма\", ...]}")
+        return cls({term: [forms] if isinstance(forms, str) else list(forms)
+                    for term, forms in data.items()})
+
+    def _terms(self, text: str):
+        """(позиція, номер терміна) для кожного терміна в тексті (text — у нижньому регістрі)."""
+        variants = self._variants
+        for match in self._term_pattern.finditer(text):
+            start = match.start()
+            if start and (text[start - 1].isalnum() or text[start - 1] == '_'):
+                continue
+            yield start, variants[match.group()]
+
+    @staticmethod
+    def _prose(text: str) -> str:
+        """Текст без розмітки: $VAR$, #TOOLTIP:... тощо не є вживанням терміна.
+
+        Зі скриптів лишаються рядкові аргументи ([Concept('claim','Claim')|e]).
+        """
+        parts = []
+        pos = 0
+        for kind, start, end in tokenize_markup(text):
+            parts.append(text[pos:start])
+            if kind == TAG_SCRIPT:
+                parts.append(' '.join(QUOTED_PATTERN.findall(text, start, end)))
+            parts.append(' ')
+            pos = end
+        parts.append(text[pos:])
+        return ''.join(parts)
+
+    def _violations(self, term_ids, translation: str) -> List[int]:
+        return [term_id for term_id in sorted(term_ids)
+                if not self._form_patterns[term_id].search(translation)]
+
+    def check(self, source: str, translation: str) -> List[int]:
+        """Терміни оригіналу, жодної схваленої форми яких немає в перекладі."""
+        if self._term_pattern is None:
+            return []
+        term_ids = {term_id for _, term_id in self._terms(self._prose(source).lower())}
+        return self._violations(term_ids, translation)
+
+    def check_all(self, sources: List[Optional[str]], translations: List[str]) -> Dict[int, List[int]]:
+        """Перевіряє всі пари одним проходом по оригіналах: {номер пари: терміни}."""
+        if self._term_pattern is None:
+            return {}
+        # Оригінали — один рядок, номер пари за позицією збігу шукається бінарним пошуком
+        texts = [source.lower() if source else '' for source in sources]
+        offsets = array('Q', [0])
+        offsets.extend(accumulate(len(text) + 1 for text in texts))
+        found: Dict[int, Set[int]] = {}
+        for start, term_id in self._terms('\n'.join(texts)):
+            found.setdefault(bisect_right(offsets, start) - 1, set()).add(term_id)
+
+        result = {}
+        for index, term_ids in found.items():
+            # Розмітку відкидаємо лише там, де щось знайдено: таких рядків небагато
+            if MARKUP_CHARS_PATTERN.search(sources[index]):
+                term_ids = {term_id for _, term_id in self._terms(self._prose(sources[index]).lower())}
+                if not term_ids:
+                    continue
+            violations = self._violations(term_ids, translations[index])
+            if violations:
+                result[index] = violations
+        return result
+
+
+class Lexicon:
+    """Заборонена лексика: російські літери, слова, основи та кальки.
+
+    Файл — JSON {"слово": "як краще"}; ключ із "*" у кінці — основа
+    ("исследовател*" для всіх відмінків), без "*" — ціле слово чи фраза.
+    Літери RUSSIAN_LETTERS (яких немає в українській) шукаються завжди.
+    Правило збігу — ключ без "*" або сама літера.
+    """
+
+    RUSSIAN_LETTERS = 'ыэёъ'
+
+    def __init__(self, rules: Dict[str, str]):
+        self.suggestions: Dict[str, str] = {letter: "російська літера"
+                                            for letter in self.RUSSIAN_LETTERS}
+        words, stems = [], []
+        for rule, suggestion in rules.items():
+            rule = rule.strip().lower()
+            if rule.endswith('*'):
+                rule = rule[:-1]
+                stems.append(rule)
+            else:
+                words.append(rule)
+            if rule:
+                self.suggestions[rule] = suggestion
+
+        # Текст — у нижньому регістрі. Апостроф теж частина слова: "з'являється" — не русизм.
+        # Літери шукаються окремо: в одному виразі з деревом слів пошук удвічі повільніший
+        alternatives = []
+        if words:
+            alternatives.append('(?:' + trie_pattern(words) + r")(?![\w'’ʼ])")
+        if stems:
+            alternatives.append(trie_pattern(stems))
+        self._words = None
+        if alternatives:
+            self._words = re.compile(r"(?<![\w'’ʼ])(?:" + '|'.join(alternatives) + ')')
+        self._letters = re.compile(f'[{self.RUSSIAN_LETTERS}]')
+
+    @classmethod
+    def load(cls, path: Path) -> 'Lexicon':
+        """Завантажує лексикон; без файлу — лише російські літери."""
+        try:
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return cls({})
+        if not isinstance(data, dict):
+            raise ValueError("очікується об'єкт {\"слово\": \"як краще\"}")
+        return cls({str(rule): str(suggestion) for rule, suggestion in data.items()})
+
+    def _hits(self, text: str):
+        """(позиція, правило) для кожного збігу (text — у нижньому регістрі)."""
+        if self._words is not None:
+            for match in self._words.finditer(text):
+                yield match.start(), match.group()
+        for match in self._letters.finditer(text):
+            yield match.start(), match.group()
+
+    def check(self, text: str) -> List[str]:
+        """Правила, що спрацювали в тексті (без повторів)."""
+        return list(dict.fromkeys(rule for _, rule in self._hits(text.lower())))
+
+    def check_all(self, texts: List[str]) -> Dict[int, List[str]]:
+        """Перевіряє всі тексти одним проходом: {номер тексту: правила}."""
+        lowered = [text.lower() for text in texts]
+        offsets = array('Q', [0])
+        offsets.extend(accumulate(len(text) + 1 for text in lowered))
+        found: Dict[int, List[str]] = {}
+        for start, rule in self._hits('\n'.join(lowered)):
+            rules = found.setdefault(bisect_right(offsets, start) - 1, [])
+            if rule not in rules:
+                rules.append(rule)
+        return found
+
+
+@dataclass
+class TagIssue:
+    """Розбіжність тегів перекладу з оригіналом (див. tag_parity)."""
+    entry: 'LocalizationEntry'
+    missing: Tuple[str, ...]
+    extra: Tuple[str, ...]
+    reordered: bool
+    unbalanced: bool
+
+    @property
+    def summary(self) -> str:
+        parts = []
+        if self.missing:
+            parts.append(f"немає: {' '.join(self.missing)}")
+        if self.extra:
+            parts.append(f"зайві: {' '.join(self.extra)}")
+        if self.unbalanced:
+            parts.append("незакриті [ ], $ або #!")
+        if self.reordered and not parts:
+            parts.append("інший порядок тегів")
+        return "; ".join(parts)
+
+
+class TagCache:
+    """Результати перевірки тегів між запусками.
+
+    {файл: {номер рядка: (хеш оригіналу, хеш перекладу, результат tag_parity)}}.
+    Ключі в межах файлу можуть повторюватись, тож запис — за номером рядка.
+    Результат залежить лише від пари текстів, тож незмінена пара не
+    перевіряється знову, навіть якщо рядок зсунувся.
+    """
+
+    VERSION = 2
+
+    def __init__(self, cache_file: Path = TAGS_CACHE_FILE):
+        self.cache_file = cache_file
+        self.results: Dict[str, Dict[int, Tuple[int, int, Optional[tuple]]]] = {}
+        self.dirty = False
+
+    def load(self):
+        """Завантажує кеш з диску. Пошкоджений або застарілий кеш ігнорується."""
+        self.results = {}
+        try:
+            if self.cache_file.exists():
+                with open(self.cache_file, 'rb') as f:
+                    data = pickle.load(f)
+                if data.get('version') == self.VERSION:
+                    self.results = data['results']
+        except Exception as e:
+            print(f"Помилка читання кешу {self.cache_file}: {e}", file=sys.stderr)
+            self.results = {}
+
+    def save(self):
+        """Зберігає кеш на диск (атомарно, через тимчасовий файл)."""
+        if not self.dirty:
+            return
+        try:
+            atomic_write(str(self.cache_file), pickle.dumps(
+                {'version': self.VERSION, 'results': self.results},
+                protocol=pickle.HIGHEST_PROTOCOL))
+            self.dirty = False
+        except Exception as e:
+            print(f"Помилка збереження кешу {self.cache_file}: {e}", file=sys.stderr)
+
+
+@dataclass
+class ExchangeUnit:
+    """Рядок у файлі обміну: id — ключ (з номером рядка, якщо ключ у файлі не єдиний)."""
+    id: str
+    file: str  # шлях відносно папки мода
+    line: int  # з 1
+    source: Optional[str]
+    target: str
+    translated: bool = True
+
+    @property
+    def key(self) -> str:
+        return self.id.partition(':')[0]
+
+
+def po_quote(text: str) -> str:
+    return '"' + (text.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+                  .replace('\r', '\\r').replace('\t', '\\t')) + '"'
+
+
+PO_ESCAPES = {'n': '\n', 'r': '\r', 't': '\t', '"': '"', '\\': '\\'}
+PO_ESCAPE_PATTERN = re.compile(r'\\(.)')
+
+
+def po_unquote(text: str) -> str:
+    text = text.strip()
+    if len(text) < 2 or text[0] != '"' or text[-1] != '"':
+        raise ValueError(f"очікується рядок у лапках: {text}")
+    return PO_ESCAPE_PATTERN.sub(lambda m: PO_ESCAPES.get(m.group(1), m.group(1)), text[1:-1])
+
+
+def write_xliff(units: Iterable[ExchangeUnit], out: TextIO, source_language: str):
+    out.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+    out.write(f'<xliff xmlns="{XLIFF_NAMESPACE}" version="2.0" '
+              f'srcLang="{source_language}" trgLang="{TARGET_LANGUAGE_CODE}">\n')
+    # Одиниці йдуть за файлами; той самий файл пізніше — новий <file> з тим же original
+    current = None
+    files = 0
+    for unit in units:
+        if unit.file != current:
+            if current is not None:
+                out.write('  </file>\n')
+            current = unit.file
+            files += 1
+            out.write(f'  <file id="f{files}" original={quoteattr(unit.file)}>\n')
+        state = 'translated' if unit.translated else 'initial'
+        out.write(f'    <unit id={quoteattr(unit.id)} xml:space="preserve">\n'
+                  f'      <notes><note category="location">{unit.line}</note></notes>\n'
+                  f'      <segment state="{state}">\n'
+                  f'        <source>{escape(unit.source or "")}</source>\n'
+                  f'        <target>{escape(unit.target)}</target>\n'
+                  f'      </segment>\n'
+                  f'    </unit>\n')
+    if current is not None:
+        out.write('  </file>\n')
+    out.write('</xliff>\n')
+
+
+def write_po(units: Iterable[ExchangeUnit], out: TextIO, source_language: str):
+    out.write('msgid ""\nmsgstr ""\n'
+              '"Content-Type: text/plain; charset=UTF-8\\n"\n'
+              f'"Language: {TARGET_LANGUAGE_CODE}\\n"\n'
+              f'"X-Source-Language: {source_language}\\n"\n')
+    for unit in units:
+        # msgid не може бути порожнім (це заголовок), тож без оригіналу — ключ
+        out.write(f'\n#: {unit.file}:{unit.line}\n')
+        if not unit.translated:
+            out.write('#, fuzzy\n')
+        out.write(f'msgctxt {po_quote(unit.file + ":" + unit.id)}\n'
+                  f'msgid {po_quote(unit.source or unit.key)}\n'
+                  f'msgstr {po_quote(unit.target)}\n')
+
+
+def write_csv(units: Iterable[ExchangeUnit], out: TextIO, source_language: str):
+    writer = csv.writer(out)
+    writer.writerow(CSV_COLUMNS)
+    for unit in units:
+        writer.writerow([unit.id, unit.file, unit.line, unit.source or '', unit.target])
+
+
+def read_xliff(path: Path) -> Iterator[ExchangeUnit]:
+    file_name = ''
+    context = ElementTree.iterparse(str(path), events=('start', 'end'))
+    for event, elem in context:
+        tag = elem.tag.rpartition('}')[2]
+        if event == 'start':
+            if tag == 'file':
+                file_name = elem.get('original', '')
+            continue
+        if tag == 'unit':
+            sources, targets, line, ready = [], [], 0, []
+            for child in elem.iter():
+                name = child.tag.rpartition('}')[2]
+                if name == 'source':
+                    sources.append(''.join(child.itertext()))
+                elif name == 'target':
+                    targets.append(''.join(child.itertext()))
+                elif name == 'note' and child.get('category') == 'location':
+                    line = int(child.text) if (child.text or '').isdigit() else 0
+                elif name == 'segment':
+                    state = child.get('state')
+                    if state is None:
+                        # state необов'язковий: без нього сегмент готовий, якщо перекладений
+                        ready.append(any(part.tag.rpartition('}')[2] == 'target' and ''.join(part.itertext())
+                                         for part in child))
+                    else:
+                        ready.append(state != 'initial')
+            # Без <target> перекладу немає
+            if targets:
+                yield ExchangeUnit(elem.get('id', ''), file_name, line, ''.join(sources),
+                                   ''.join(targets), all(ready))
+            # Оброблені одиниці не тримаються в пам'яті
+            elem.clear()
+        elif tag == 'file':
+            elem.clear()
+
+
+def read_po(path: Path) -> Iterator[ExchangeUnit]:
+    with open(path, encoding='utf-8') as f:
+        fields: Dict[str, str] = {}
+        comments: List[str] = []
+        name = None
+        # Порожній рядок у кінці завершує останній запис
+        for text in chain(f, ['']):
+            text = text.strip()
+            if text.startswith('#~'):
+                continue  # застарілі записи
+            # Запис закінчується на першому рядку після msgstr, що його не продовжує
+            if 'msgstr' in fields and not text.startswith(('"', 'msgstr')):
+                yield from po_unit(fields, comments)
+                fields, comments, name = {}, [], None
+            if not text:
+                continue
+            if text.startswith('#'):
+                comments.append(text)
+            elif text.startswith('"'):
+                if name is not None:
+                    fields[name] += po_unquote(text)
+            else:
+                name, _, value = text.partition(' ')
+                fields[name] = po_unquote(value)
+
+
+def po_unit(fields: Dict[str, str], comments: List[str]) -> Iterator[ExchangeUnit]:
+    if not fields.get('msgid'):
+        return  # заголовок
+    line = 0
+    flags = ''
+    for comment in comments:
+        if comment.startswith('#:'):
+            number = comment.rpartition(':')[2]
+            line = int(number) if number.isdigit() else 0
+        elif comment.startswith('#,'):
+            flags += comment
+    # Шлях файлу без ":", тож усе після першої — id (він може містити ":рядок")
+    file_name, _, unit_id = fields.get('msgctxt', '').partition(':')
+    # Розмиті (fuzzy) переклади gettext не вважає готовими
+    yield ExchangeUnit(unit_id, file_name, line, fields['msgid'], fields['msgstr'],
+                       'fuzzy' not in flags)
+
+
+def read_csv(path: Path) -> Iterator[ExchangeUnit]:
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        for row in csv.DictReader(f):
+            line = row.get('line') or '0'
+            yield ExchangeUnit(row.get('id') or '', row.get('file') or '',
+                               int(line) if line.isdigit() else 0,
+                               row.get('original'), row.get('translation') or '')
+
+
+EXCHANGE_WRITERS = {'xliff': write_xliff, 'po': write_po, 'csv': write_csv}
+EXCHANGE_READERS = {'xliff': read_xliff, 'po': read_po, 'csv': read_csv}
+
+
+def exchange_format(path: Path) -> Optional[str]:
+    """Формат обміну за розширенням файлу."""
+    return EXCHANGE_FORMATS.get(Path(path).suffix.lower())
+
+
+def write_exchange(units: Iterable[ExchangeUnit], path: Path, fmt: str,
+                   source_language: str = SOURCE_LANGUAGE) -> int:
+    """Записує одиниці у файл по одній (пам'ять не залежить від кількості). Повертає кількість."""
+    count = 0
+
+    def counted():
+        nonlocal count
+        for unit in units:
+            count += 1
+            yield unit
+
+    # BOM — щоб Excel відкрив CSV як UTF-8
+    encoding = 'utf-8-sig' if fmt == 'csv' else 'utf-8'
+    with open(path, 'w', encoding=encoding, newline='' if fmt == 'csv' else '\n') as out:
+        EXCHANGE_WRITERS[fmt](counted(), out, LANGUAGE_CODES.get(source_language, source_language))
+    return count
+
+
+def read_exchange(path: Path, fmt: str) -> Iterator[ExchangeUnit]:
+    """Читає одиниці з файлу по одній. Пошкоджений файл піднімає ValueError."""
+    try:
+        yield from EXCHANGE_READERS[fmt](path)
+    except (ElementTree.ParseError, csv.Error) as e:
+        raise ValueError(f"{Path(path).name}: {e}") from e
+
+
+@dataclass
+class ImportResult:
+    """Підсумок імпорту перекладів (див. LocalizationDatabase.import_units)."""
+    applied: List['LocalizationEntry'] = field(default_factory=list)
+    unchanged: int = 0
+    skipped: int = 0  # позначені перекладачем як неготові
+    unknown: List[ExchangeUnit] = field(default_factory=list)
+    rejected: List[Tuple[ExchangeUnit, str]] = field(default_factory=list)
+
+
+def substitute_values(pattern: 're.Pattern', replacement, values: List[str]) -> List[Tuple[int, str, int]]:
+    """Заміна в пакеті значень: (номер у пакеті, нове значення, кількість) для змінених.
+
+    На рівні модуля, щоб виконуватись і в окремому процесі (див. plan_replace).
+    """
+    changed = []
+    for i, value in enumerate(values):
+        new_value, count = pattern.subn(replacement, value)
+        if count and new_value != value:
+            changed.append((i, new_value, count))
+    return changed
+
+
+@dataclass
+class ReplaceChange:
+    """Запланована заміна в значенні запису (див. LocalizationDatabase.plan_replace)."""
+    entry: LocalizationEntry
+    old_value: str
+    new_value: str
+    count: int  # скільки збігів замінено у значенні
+    missing_tags: List[str]  # теги, яких після заміни стало менше
+    extra_tags: List[str]  # теги, яких після заміни стало більше
+
+    @property
+    def tags_changed(self) -> bool:
+        return bool(self.missing_tags or self.extra_tags)
+
+    @property
+    def breaks_line(self) -> bool:
+        """Заміна вставила справжній перенос рядка (у yml — лише розмітка \\n).
+
+        Такий рядок розірвав би запис у файлі, тож apply_replace його пропускає.
+        """
+        return '\n' in self.new_value or '\r' in self.new_value
+
+
+class LocalizationDatabase:
+    """База даних локалізації."""
+
+    # Скільки груп змін можна скасувати
+    MAX_UNDO = 1000
+    # Значень за один крок масової заміни (між перевірками бюджету часу)
+    REPLACE_BATCH_SIZE = 4096
+    # Як часто перевіряти бюджет часу, поки процес заміни працює над пакетом, с
+    REPLACE_POLL_INTERVAL = 0.05
+
+    def __init__(self, root_dir: Path, use_mmap: bool = False, save_delay: float = 0.3,
+                 journal_file: Optional[Path] = JOURNAL_FILE,
+                 sources_file: Optional[Path] = SOURCES_FILE,
+                 glossary_file: Optional[Path] = GLOSSARY_FILE,
+                 lexicon_file: Optional[Path] = LEXICON_FILE):
+        self.root_dir = root_dir
+        self.glossary_file = glossary_file
+        self.lexicon_file = lexicon_file
+        self.entries: List[LocalizationEntry] = []
+        # Вміст файлів завантажується ліниво, при першому зверненні.
+        # use_mmap: тримати лише індекс зсувів рядків і читати файл через mmap
+        self.use_mmap = use_mmap
+        self.file_cache: Dict[str, Union[FileLines, MappedFileLines]] = {}
+        self.file_stats: Dict[str, Tuple[int, int]] = {}
+        # file_cache і file_stats змінює й потік запису (_on_file_written);
+        # _file_writes — скільки разів файл перезаписано, щоб не кешувати прочитане до запису
+        self._file_lock = threading.Lock()
+        self._file_writes: Dict[str, int] = {}
+        self.index = SearchIndex()
+        # Зміни пишуться у файли у фоновому потоці
+        self.save_queue = SaveQueue(self._on_file_written, save_delay)
+        # Кожне збереження спершу дописується в журнал; None — без журналу
+        self.journal = EditJournal(journal_file) if journal_file else None
+        self._journal_recovered = False
+        # Групи змін [(запис, старе значення, нове значення)] для скасування й повтору
+        self.undo_stack: List[List[Tuple[LocalizationEntry, str, str]]] = []
+        self.redo_stack: List[List[Tuple[LocalizationEntry, str, str]]] = []
+        # Скільки незаписаних змін відновлено з журналу при першому скануванні
+        self.recovered = 0
+        # Оригінали гри (задає GUI) і хеші оригіналів на момент перекладу
+        self.originals: Optional[OriginalTextsDatabase] = None
+        self.sources = SourceHashes(sources_file)
+        self.sources.load()
+        # Глосарій проєкту і записи, переклад яких його порушує: запис -> номери термінів
+        self.glossary: Optional[Glossary] = None
+        self.glossary_error: Optional[str] = None
+        self.glossary_issues: Dict[LocalizationEntry, List[int]] = {}
+        # Заборонена лексика (перевіряється scan_lexicon() і перед збереженням)
+        self.lexicon: Optional[Lexicon] = None
+        self.lexicon_error: Optional[str] = None
+        # Пам'ять перекладів (будується build_memory() у фоні, ставиться install_memory())
+        self.memory: Optional[TranslationMemory] = None
+        # Записи, змінені поки пам'яті немає (будується) — їх повторює install_memory()
+        self._memory_log: List[LocalizationEntry] = []
+
+    def scan(self, progress_callback=None, cache: Optional[ScanCache] = None,
+             workers: int = 1) -> int:
+        """Сканує всі файли локалізації."""
+        self.flush()
+        self.entries.clear()
+        self.file_cache.clear()
+        self.file_stats.clear()
+
+        yml_files = list(self.root_dir.rglob('*_l_english.yml'))
+
+        results = scan_files('mod', yml_files, parse_mod_file,
+                             progress_callback, cache, workers, self.file_stats)
+
+        for yml_file, rows in zip(yml_files, results):
+            if rows is not None:
+                self.entries.extend(self._make_entries(str(yml_file), rows))
+
+        self.index.build(self.entries)
+        self.memory = None
+        self._memory_log = []
+
+        # Нові об'єкти записів — старі групи скасування до них не застосовні
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        if not self._journal_recovered:
+            self._journal_recovered = True
+            self.recovered = self._recover_journal()
+        self.load_glossary()
+        self.load_lexicon()
+        self.check_sources()
+        self.check_glossary()
+        return len(self.entries)
+
+    def check_sources(self) -> int:
+        """Позначає застарілими переклади, оригінал яких змінився після перекладу.
+
+        Нічого не записує: переклади без збереженого хешу (нові ключі, ще
+        не звірені) позначаються як "без звірки" (index.unverified), а не
+        як актуальні — інакше перша перевірка після патча гри прийняла б
+        новий оригінал за звірений. Без оригіналів SOURCE_LANGUAGE
+        застарілих немає. Повертає кількість застарілих записів.
+        """
+        originals = self.originals
+        outdated: Set[int] = set()
+        unverified: Set[int] = set()
+        if originals is not None and originals.is_loaded(SOURCE_LANGUAGE):
+            hashes = self.sources.hashes
+            entries = self.index.entries
+            sources = originals.get_all([entry.key for entry in entries], SOURCE_LANGUAGE)
+            for doc_id, (entry, source) in enumerate(zip(entries, sources)):
+                if source is None or not entry.is_translated:
+                    continue
+                stored = hashes.get(entry.key)
+                if stored is None:
+                    unverified.add(doc_id)
+                elif stored != source_hash(source):
+                    outdated.add(doc_id)
+        self.index.set_outdated(outdated, unverified)
+        return len(outdated)
+
+    def accept_sources(self, include_outdated: bool = False) -> int:
+        """Вважає поточні оригінали звіреними для перекладів без звірки.
+
+        include_outdated — також для застарілих (після перегляду їх
+        перекладів). Хеші одразу записуються у файл. Повертає кількість
+        прийнятих записів.
+        """
+        originals = self.originals
+        if originals is None or not originals.is_loaded(SOURCE_LANGUAGE):
+            return 0
+        index = self.index
+        doc_ids = sorted(index.unverified | index.outdated if include_outdated else index.unverified)
+        entries = [index.entries[doc_id] for doc_id in doc_ids]
+        sources = originals.get_all([entry.key for entry in entries], SOURCE_LANGUAGE)
+        for entry, source in zip(entries, sources):
+            self.sources.set(entry.key, source_hash(source))
+        self.sources.save()
+        self.check_sources()
+        return len(entries)
+
+    def is_unverified(self, entry: LocalizationEntry) -> bool:
+        return self.index.doc_ids.get(entry) in self.index.unverified
+
+    def load_glossary(self):
+        """Перечитує глосарій проєкту (помилка — у glossary_error)."""
+        self.glossary = None
+        self.glossary_error = None
+        if self.glossary_file is None:
+            return
+        try:
+            self.glossary = Glossary.load(self.glossary_file)
+        except (OSError, ValueError) as e:
+            self.glossary = None
+            self.glossary_error = str(e)
+            print(f"Помилка читання глосарію: {e}", file=sys.stderr)
+
+    def load_lexicon(self):
+        """Перечитує лексикон (помилка — у lexicon_error, перевіряються лише літери)."""
+        self.lexicon_error = None
+        try:
+            self.lexicon = Lexicon.load(self.lexicon_file) if self.lexicon_file else Lexicon({})
+        except (OSError, ValueError) as e:
+            self.lexicon = Lexicon({})
+            self.lexicon_error = str(e)
+            print(f"Помилка читання лексикону: {e}", file=sys.stderr)
+
+    def scan_lexicon(self) -> List[Tuple[str, List[LocalizationEntry]]]:
+        """Звіт про заборонену лексику: (правило, записи), найчастіші правила першими.
+
+        Перевіряються лише перекладені записи.
+        """
+        if self.lexicon is None:
+            return []
+        entries = [entry for entry in self.entries if entry.is_translated]
+        by_rule: Dict[str, List[LocalizationEntry]] = {}
+        for index, rules in self.lexicon.check_all([entry.value for entry in entries]).items():
+            for rule in rules:
+                by_rule.setdefault(rule, []).append(entries[index])
+        return sorted(by_rule.items(), key=lambda item: (-len(item[1]), item[0]))
+
+    def relative_path(self, file_path: str) -> str:
+        """Шлях файлу відносно папки мода (з "/"), як у файлах обміну."""
+        path = Path(file_path)
+        try:
+            path = path.relative_to(self.root_dir)
+        except ValueError:
+            pass
+        return path.as_posix()
+
+    def exchange_units(self, entries: Iterable[LocalizationEntry],
+                       language: str = SOURCE_LANGUAGE) -> Iterator[ExchangeUnit]:
+        """Одиниці для експорту: ключ, оригінал мовою language, значення, файл і рядок."""
+        # Ключ, що повторюється у файлі, отримує номер рядка, щоб id був унікальним
+        counts = Counter((entry.file_id, entry.key) for entry in self.entries)
+        paths = {file_id: self.relative_path(FILE_PATHS[file_id])
+                 for file_id in {entry.file_id for entry in self.entries}}
+        originals = self.originals
+        for entry in entries:
+            unit_id = entry.key
+            if counts[(entry.file_id, entry.key)] > 1:
+                unit_id = f"{entry.key}:{entry.line_number + 1}"
+            source = originals.get(entry.key, language) if originals else None
+            yield ExchangeUnit(unit_id, paths[entry.file_id], entry.line_number + 1,
+                               source, entry.value, entry.is_translated)
+
+    def import_units(self, units: Iterable[ExchangeUnit], check_tags: bool = True) -> ImportResult:
+        """Застосовує переклади з файлу обміну однією групою скасування.
+
+        Одиниці читаються по одній; у пам'яті лишаються тільки зміни. Теги
+        перевіряються з оригіналом SOURCE_LANGUAGE (або поточним значенням,
+        якщо оригіналу немає). Кожен змінений файл записується один раз.
+        """
+        result = ImportResult()
+        by_file: Dict[str, Dict[str, List[LocalizationEntry]]] = {}
+        paths = {file_id: self.relative_path(FILE_PATHS[file_id])
+                 for file_id in {entry.file_id for entry in self.entries}}
+        for entry in self.entries:
+            by_file.setdefault(paths[entry.file_id], {}).setdefault(entry.key, []).append(entry)
+
+        edits: Dict[LocalizationEntry, str] = {}
+        for unit in units:
+            candidates = by_file.get(unit.file, {}).get(unit.key, [])
+            _, _, line = unit.id.partition(':')
+            if line:
+                candidates = [entry for entry in candidates if str(entry.line_number + 1) == line]
+            if len(candidates) != 1:
+                result.unknown.append(unit)
+                continue
+            entry = candidates[0]
+            value = unit.target
+            if not value or value == edits.get(entry, entry.value):
+                result.unchanged += 1
+                continue
+            if not unit.translated:
+                result.skipped += 1
+                continue
+            if '\n' in value or '\r' in value:
+                result.rejected.append((unit, "перенос рядка (у yml — \\n)"))
+                continue
+            if check_tags:
+                source = self.originals.get(entry.key, SOURCE_LANGUAGE) if self.originals else None
+                parity = tag_parity(source or entry.value, value)
+                if parity and (parity[0] or parity[1] or parity[3]):
+                    result.rejected.append((unit, TagIssue(entry, *parity).summary))
+                    continue
+            edits[entry] = value
+
+        edits = {entry: value for entry, value in edits.items() if value != entry.value}
+        if edits:
+            self._push_undo(self._apply_edits(list(edits.items()), 'import'))
+        result.applied = list(edits)
+        return result
+
+    def check_tags(self, cache: Optional[TagCache] = None,
+                   workers: int = 1) -> List[TagIssue]:
+        """Порівнює теги всіх перекладених записів з оригіналами SOURCE_LANGUAGE.
+
+        Пари, яких немає в кеші, перевіряються в пулі процесів (файл
+        за файлом). Повертає розбіжності, впорядковані за файлом і рядком.
+        """
+        originals = self.originals
+        if originals is None or not originals.is_loaded(SOURCE_LANGUAGE):
+            return []
+        entries = [entry for entry in self.entries if entry.is_translated]
+        sources = originals.get_all([entry.key for entry in entries], SOURCE_LANGUAGE)
+
+        cached = cache.results if cache else {}
+        results: Dict[str, Dict[int, Tuple[int, int, Optional[tuple]]]] = {}
+        checked: List[Tuple[LocalizationEntry, Optional[tuple]]] = []
+        # Записи, які треба перевірити, з хешами пар — окремою партією для кожного файлу
+        misses: Dict[str, List[Tuple[LocalizationEntry, str, int, int]]] = {}
+        for file_id, group in groupby(zip(entries, sources), key=lambda pair: pair[0].file_id):
+            file_path = FILE_PATHS[file_id]
+            file_cached = cached.get(file_path, {})
+            file_results = results.setdefault(file_path, {})
+            for entry, source in group:
+                if source is None:
+                    continue
+                source_digest, value_digest = source_hash(source), source_hash(entry.value)
+                record = file_cached.get(entry.line_number)
+                if record is not None and record[0] == source_digest and record[1] == value_digest:
+                    file_results[entry.line_number] = record
+                    checked.append((entry, record[2]))
+                else:
+                    misses.setdefault(file_path, []).append(
+                        (entry, source, source_digest, value_digest))
+
+        batches = list(misses.items())
+        pairs = [[(source, entry.value) for entry, source, _, _ in batch] for _, batch in batches]
+        executor = None
+        if workers > 1 and sum(map(len, pairs)) >= PARALLEL_MIN_TAG_PAIRS:
+            executor = ProcessPoolExecutor(max_workers=workers)
+            parities = executor.map(check_tag_pairs, pairs)
+        else:
+            parities = map(check_tag_pairs, pairs)
+        try:
+            for (file_path, batch), batch_parities in zip(batches, parities):
+                file_results = results[file_path]
+                for (entry, _, source_digest, value_digest), parity in zip(batch, batch_parities):
+                    file_results[entry.line_number] = (source_digest, value_digest, parity)
+                    checked.append((entry, parity))
+        finally:
+            if executor:
+                executor.shutdown()
+
+        if cache and results != cached:
+            cache.results = results
+            cache.dirty = True
+
+        issues = [TagIssue(entry, *parity) for entry, parity in checked if parity is not None]
+        issues.sort(key=lambda issue: (issue.entry.file_path, issue.entry.line_number))
+        return issues
+
+    def check_glossary(self) -> int:
+        """Перевіряє всі перекладені записи за глосарієм; повертає кількість порушень."""
+        self.glossary_issues = {}
+        originals = self.originals
+        if self.glossary is None or originals is None or not originals.is_loaded(SOURCE_LANGUAGE):
+            return 0
+        entries = [entry for entry in self.entries if entry.is_translated]
+        sources = originals.get_all([entry.key for entry in entries], SOURCE_LANGUAGE)
+        issues = self.glossary.check_all(sources, [entry.value for entry in entries])
+        self.glossary_issues = {entries[index]: term_ids for index, term_ids in issues.items()}
+        return len(self.glossary_issues)
+
+    def _check_glossary_entry(self, entry: LocalizationEntry):
+        self.glossary_issues.pop(entry, None)
+        if self.glossary is None or not entry.is_translated or not self.originals:
+            return
+        source = self.originals.get(entry.key, SOURCE_LANGUAGE)
+        if source is not None:
+            term_ids = self.glossary.check(source, entry.value)
+            if term_ids:
+                self.glossary_issues[entry] = term_ids
+
+    def build_memory(self) -> Optional[TranslationMemory]:
+        """Будує пам'ять перекладів з перекладених записів, що мають оригінал.
+
+        Можна викликати у фоновому потоці; результат передається в
+        install_memory(). Застарілі переклади до пам'яті не потрапляють.
+        None — немає оригіналів SOURCE_LANGUAGE.
+        """
+        originals = self.originals
+        if originals is None or not originals.is_loaded(SOURCE_LANGUAGE):
+            return None
+        entries = list(self.entries)
+        sources = originals.get_all([entry.key for entry in entries], SOURCE_LANGUAGE)
+        memory = TranslationMemory()
+        for entry, source in zip(entries, sources):
+            if source is not None and entry.is_translated and not self.is_outdated(entry):
+                memory.update(entry.key, source, entry.value)
+        return memory
+
+    def install_memory(self, memory: Optional[TranslationMemory]):
+        """Ставить побудовану пам'ять, дооновивши записи, змінені під час побудови."""
+        self.memory = memory
+        if memory is not None:
+            log, self._memory_log = self._memory_log, []
+            for entry in log:
+                self._update_memory(entry)
+
+    def _update_memory(self, entry: LocalizationEntry):
+        if self.memory is None:
+            self._memory_log.append(entry)
+            return
+        source = None
+        # Видалені з індексу (при перечитуванні файлів) записи прибираються з пам'яті
+        if entry.is_translated and self.originals and entry in self.index.doc_ids:
+            source = self.originals.get(entry.key, SOURCE_LANGUAGE)
+        self.memory.update(entry.key, source, entry.value)
+
+    def is_outdated(self, entry: LocalizationEntry) -> bool:
+        return self.index.doc_ids.get(entry) in self.index.outdated
+
+    def _recover_journal(self) -> int:
+        """Повторює зміни з журналу, що не потрапили у файли (збій до запису)."""
+        if not self.journal:
+            return 0
+        records = self.journal.pending()
+        if not records:
+            return 0
+
+        by_line = {(entry.file_path, entry.line_number): entry for entry in self.entries}
+        edits: Dict[int, Tuple[LocalizationEntry, str]] = {}
+        resolved = []
+        for record in records:
+            if not any(edit[0] in self.file_stats for edit in record['edits']):
+                # Файли іншого мода — лишаємо в журналі
+                continue
+            resolved.append(record['seq'])
+            for file_path, line_number, key, old_value, new_value in record['edits']:
+                entry = by_line.get((file_path, line_number))
+                if entry is None or entry.key != key:
+                    continue
+                pending = edits.get(id(entry))
+                current = pending[1] if pending else entry.value
+                # Інакше зміна вже у файлі або файл відтоді змінено ззовні
+                if current == old_value:
+                    edits[id(entry)] = (entry, new_value)
+
+        changed = [(entry, new_value) for entry, new_value in edits.values()
+                   if entry.value != new_value]
+        if changed:
+            self._apply_edits(changed, 'recover')
+        self.journal.resolve(resolved)
+        return len(changed)
+
+    def _make_entries(self, file_path: str, rows: list) -> List[LocalizationEntry]:
+        """Створює записи з розпарсених рядків файлу."""
+        file_id = FILE_PATHS.intern(file_path)
+        category_id = CATEGORIES.intern(get_category(file_path))
+        # Версій у файлі одна-дві: інтернуємо кожну раз, а не на кожен запис
+        version_ids = {version: VERSIONS.intern(version) for version in {row[2] for row in rows}}
+
+        return [
+            LocalizationEntry(file_id, line_num, key, version_ids[version], value,
+                              category_id, translated)
+            for line_num, key, version, value, translated in rows
+        ]
+
+    def detect_changes(self) -> FileChanges:
+        """Шукає змінені, нові та видалені файли мода."""
+        return detect_changes(self.root_dir, '*_l_english.yml', dict(self.file_stats))
+
+    def refresh(self, changes: Optional[FileChanges] = None, cache: Optional[ScanCache] = None
+                ) -> Tuple[FileChanges, List[LocalizationEntry], List[LocalizationEntry]]:
+        """Перечитує лише змінені файли та вбудовує їх записи в entries.
+
+        Записи незмінених ключів оновлюються на місці (ті самі об'єкти), тож
+        поточні результати пошуку і виділення в GUI лишаються дійсними.
+        Повертає (зміни, оновлені записи, видалені записи).
+        """
+        # Інакше ще не записані зміни загубилися б при перечитуванні файлу
+        self.flush()
+        if changes is None:
+            changes = self.detect_changes()
+        if not changes:
+            return changes, [], []
+
+        by_file: Dict[str, List[LocalizationEntry]] = {}
+        for entry in self.entries:
+            by_file.setdefault(entry.file_id, []).append(entry)
+
+        updated: List[LocalizationEntry] = []
+        removed: List[LocalizationEntry] = []
+        added: List[LocalizationEntry] = []
+
+        for path in changes.deleted:
+            removed.extend(by_file.pop(FILE_PATHS.intern(path), []))
+            self.file_cache.pop(path, None)
+            self.file_stats.pop(path, None)
+
+        to_parse = changes.changed + changes.added
+        results = scan_files('mod', to_parse, parse_mod_file,
+                             cache=cache, signatures=self.file_stats)
+
+        for yml_file, rows in zip(to_parse, results):
+            path = str(yml_file)
+            self.file_cache.pop(path, None)
+            # Ключ може повторюватись у файлі, тому зіставляємо по черзі
+            old_by_key: Dict[str, List[LocalizationEntry]] = {}
+            file_id = FILE_PATHS.intern(path)
+            for entry in by_file.get(file_id, []):
+                old_by_key.setdefault(entry.key, []).append(entry)
+            new_entries = []
+            for entry in self._make_entries(path, rows or []):
+                same_key = old_by_key.get(entry.key)
+                old = same_key.pop(0) if same_key else None
+                if old is None:
+                    new_entries.append(entry)
+                    added.append(entry)
+                    continue
+                if (old.line_number, old.version_id, old.value) != (entry.line_number, entry.version_id, entry.value):
+                    old.line_number = entry.line_number
+                    old.version_id = entry.version_id
+                    old.value = entry.value
+                    old.is_translated = entry.is_translated
+                    updated.append(old)
+                new_entries.append(old)
+            for rest in old_by_key.values():
+                removed.extend(rest)
+            by_file[file_id] = new_entries
+
+        self.entries = [entry for yml_file in changes.files
+                        for entry in by_file.get(FILE_PATHS.intern(str(yml_file)), [])]
+        self.index.build(self.entries)
+        self.check_sources()
+        self.check_glossary()
+        for entry in removed + updated + added:
+            self._update_memory(entry)
+        return changes, updated, removed
+
+    def _get_file(self, file_path: str) -> Optional[Union[FileLines, MappedFileLines]]:
+        """Повертає рядки файлу, читаючи його з диску за потреби."""
+        with self._file_lock:
+            lines = self.file_cache.get(file_path)
+            writes = self._file_writes.get(file_path, 0)
+        if lines is None:
+            try:
+                file_class = MappedFileLines if self.use_mmap else FileLines
+                lines = file_class(file_path)
+            except Exception as e:
+                print(f"Помилка читання {file_path}: {e}", file=sys.stderr)
+                return None
+            with self._file_lock:
+                # Файл перезаписали, поки його читали: до кешу прочитане не йде
+                if self._file_writes.get(file_path, 0) == writes:
+                    self.file_cache[file_path] = lines
+        return lines
+
+    def search(self, query: str = "", category: str = "all",
+               untranslated_only: bool = False,
+               within: Optional[List[LocalizationEntry]] = None,
+               limit: Optional[int] = None,
+               cancel: Optional[threading.Event] = None,
+               mode: str = SEARCH_TEXT,
+               deadline: Optional[float] = None,
+               outdated_only: bool = False) -> Optional[SearchResults]:
+        """Шукає рядки за критеріями (параметри див. SearchIndex.search)."""
+        category_id = None
+        if category != "all":
+            category_id = CATEGORIES.get_id(category)
+            if category_id is None:
+                return SearchResults()
+
+        return self.index.search(query, category_id, untranslated_only, within, limit, cancel,
+                                 mode, deadline, outdated_only)
+
+    def get_context(self, entry: LocalizationEntry, lines_count: int = 3) -> List[Tuple[int, str, bool]]:
+        """Отримує контекст навколо рядка."""
+        lines = self._get_file(entry.file_path)
+        if lines is None:
+            return []
+
+        start = max(0, entry.line_number - lines_count)
+        end = min(len(lines), entry.line_number + lines_count + 1)
+
+        result = []
+        for i, line in enumerate(lines.get(start, end), start):
+            is_current = (i == entry.line_number)
+            result.append((i + 1, line.rstrip(), is_current))
+
+        return result
+
+    def update_entry(self, entry: LocalizationEntry, new_value: str) -> bool:
+        """Оновлює значення рядка.
+
+        Запис у пам'яті оновлюється одразу, зміна дописується в журнал, а у
+        файл потрапляє через save_queue. Помилки запису — у save_queue.take_errors().
+        """
+        self._push_undo(self._apply_edits([(entry, new_value)]))
+        return True
+
+    def _apply_edits(self, edits: List[Tuple[LocalizationEntry, str]], action: str = 'edit'
+                     ) -> List[Tuple[LocalizationEntry, str, str]]:
+        """Записує групу змін: журнал, черга запису файлів (по одному запису на файл), пам'ять.
+
+        Повертає групу [(запис, старе значення, нове значення)].
+        """
+        group = [(entry, entry.value, new_value) for entry, new_value in edits]
+        seq = 0
+        if self.journal:
+            seq = self.journal.record([(entry.file_path, entry.line_number, entry.key, old, new)
+                                       for entry, old, new in group], action)
+
+        by_file: Dict[str, Dict[int, Tuple[str, str]]] = {}
+        for entry, old, new in group:
+            by_file.setdefault(entry.file_path, {})[entry.line_number] = (entry.key, new)
+        for file_path, file_edits in by_file.items():
+            self.save_queue.put_file(file_path, file_edits, seq)
+
+        for entry, old, new in group:
+            self._set_value(entry, new)
+        return group
+
+    def _push_undo(self, group: List[Tuple[LocalizationEntry, str, str]]):
+        self.undo_stack.append(group)
+        del self.undo_stack[:-self.MAX_UNDO]
+        self.redo_stack.clear()
+
+    def undo(self) -> List[LocalizationEntry]:
+        """Скасовує останню групу збережених змін; повертає змінені записи.
+
+        Записи, змінені відтоді інакше (наприклад, ззовні), не чіпаються.
+        """
+        if not self.undo_stack:
+            return []
+        group = self.undo_stack.pop()
+        edits = [(entry, old) for entry, old, new in group if entry.value == new]
+        if edits:
+            self._apply_edits(edits, 'undo')
+        self.redo_stack.append(group)
+        return [entry for entry, value in edits]
+
+    def redo(self) -> List[LocalizationEntry]:
+        """Повторює останню скасовану групу змін; повертає змінені записи."""
+        if not self.redo_stack:
+            return []
+        group = self.redo_stack.pop()
+        edits = [(entry, new) for entry, old, new in group if entry.value == old]
+        if edits:
+            self._apply_edits(edits, 'redo')
+        self.undo_stack.append(group)
+        return [entry for entry, value in edits]
+
+    def _set_value(self, entry: LocalizationEntry, new_value: str):
+        entry.value = new_value
+        entry.is_translated = is_translated(new_value)
+        self.index.update(entry)
+
+        # Збережений переклад вважається звіреним з поточним оригіналом
+        source = self.originals.get(entry.key, SOURCE_LANGUAGE) if self.originals else None
+        if entry.is_translated and source is not None:
+            self.sources.set(entry.key, source_hash(source))
+            self.index.discard_outdated(entry)
+        self._update_memory(entry)
+        self._check_glossary_entry(entry)
+
+    def plan_replace(self, find: str, replacement: str, regex: bool = False,
+                     ignore_case: bool = False, category: str = "all",
+                     file_pattern: str = "", key_pattern: str = "",
+                     cancel: Optional[threading.Event] = None,
+                     deadline: Optional[float] = None) -> Optional[SearchResults]:
+        """Готує масову заміну в значеннях, нічого не змінюючи (попередній перегляд).
+
+        regex — find і replacement як у re.sub (з \\1 тощо), інакше звичайний
+        текст. file_pattern — маска імені файлу (*.yml), key_pattern —
+        регулярний вираз для ключа. Некоректний вираз піднімає re.error.
+        Повертає список ReplaceChange; None — скасовано (cancel). Після
+        deadline повертає вже знайдені заміни з truncated = True.
+        """
+        pattern = re.compile(find if regex else re.escape(find), re.IGNORECASE if ignore_case else 0)
+        key_re = re.compile(key_pattern) if key_pattern else None
+        template = replacement if regex else (lambda match: replacement)
+
+        # Звичайний текст відбирає індекс (без урахування регістру — це надмножина)
+        candidates = self.search("" if regex else find, category, cancel=cancel, deadline=deadline)
+        if candidates is None:
+            return None
+
+        file_matches: Dict[int, bool] = {}
+        selected = []
+        for entry in candidates:
+            if file_pattern:
+                matches = file_matches.get(entry.file_id)
+                if matches is None:
+                    matches = file_matches[entry.file_id] = fnmatch(Path(entry.file_path).name,
+                                                                    file_pattern)
+                if not matches:
+                    continue
+            if key_re and not key_re.search(entry.key):
+                continue
+            selected.append(entry)
+
+        changes = SearchResults()
+        changes.truncated = candidates.truncated
+        size = self.REPLACE_BATCH_SIZE
+        batches = [selected[start:start + size] for start in range(0, len(selected), size)]
+        # Значення беруться один раз: старе значення заміни — саме те, з якого її пораховано
+        values = [[entry.value for entry in batch] for batch in batches]
+        substitute = partial(substitute_values, pattern, template)
+        pool = None
+        if regex and batches:
+            # Вираз користувача може виконуватись як завгодно довго, не відпускаючи GIL
+            # (і не даючи працювати GUI), тож він працює в окремому процесі, який можна зупинити
+            pool = multiprocessing.Pool(1)
+            batch_results = pool.imap(substitute, values)
+        try:
+            for batch, batch_values in zip(batches, values):
+                state = budget_state(cancel, deadline)
+                if pool is None:
+                    changed = None if state else substitute(batch_values)
+                else:
+                    changed = None
+                    while not state:
+                        try:
+                            changed = batch_results.next(self.REPLACE_POLL_INTERVAL)
+                            break
+                        except multiprocessing.TimeoutError:
+                            state = budget_state(cancel, deadline)
+                if state == 'cancel':
+                    return None
+                if state:
+                    changes.truncated = True
+                    break
+
+                for i, new_value, count in changed:
+                    old_value = batch_values[i]
+                    old_tags = Counter(find_tags(old_value))
+                    new_tags = Counter(find_tags(new_value))
+                    changes.append(ReplaceChange(batch[i], old_value, new_value, count,
+                                                 sorted((old_tags - new_tags).elements()),
+                                                 sorted((new_tags - old_tags).elements())))
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+        return changes
+
+    def apply_replace(self, changes: List[ReplaceChange]) -> List[ReplaceChange]:
+        """Застосовує заплановані заміни; кожен файл переписується один раз.
+
+        Записи, значення яких змінилось після планування, і заміни з
+        переносом рядка (breaks_line) пропускаються. Повертає застосовані заміни.
+        """
+        applied = [change for change in changes
+                   if change.entry.value == change.old_value and not change.breaks_line]
+        if applied:
+            self._push_undo(self._apply_edits(
+                [(change.entry, change.new_value) for change in applied], 'replace'))
+        return applied
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Чекає, доки всі зміни буде записано у файли, і стискає журнал."""
+        done = self.save_queue.flush(timeout)
+        self.sources.save()
+        # До відновлення журнал ще містить зміни, які треба повторити
+        if done and self.journal and self._journal_recovered:
+            self.journal.compact()
+        return done
+
+    def _on_file_written(self, file_path: str, error: Optional[Exception], seq: int = 0):
+        """Викликається з потоку запису (SaveQueue) після кожного запису файлу."""
+        signature = None
+        if error is None:
+            try:
+                signature = file_signature(os.stat(file_path))
+            except OSError as e:
+                print(f"Помилка читання {file_path}: {e}", file=sys.stderr)
+        with self._file_lock:
+            self._file_writes[file_path] = self._file_writes.get(file_path, 0) + 1
+            self.file_cache.pop(file_path, None)
+            if signature is not None:
+                # Власний запис не має вважатися зовнішньою зміною
+                self.file_stats[file_path] = signature
+            else:
+                # Файл вважатиметься новим і перечитається при наступній перевірці змін,
+                # тож записи в пам'яті повернуться до вмісту диска
+                self.file_stats.pop(file_path, None)
+        if error is None and self.journal and seq:
+            self.journal.mark_written(file_path, seq)
+
+    def get_stats(self) -> Tuple[int, int]:
+        """Повертає (всього, перекладено)."""
+        total = len(self.entries)
+        translated = total - self.index.count_untranslated()
+        return total, translated
+
+    def get_category_stats(self) -> Dict[str, Tuple[int, int]]:
+        """Повертає {категорія: (всього, неперекладено)} з індексу."""
+        return {CATEGORIES[category_id]: counts
+                for category_id, counts in self.index.get_counts().items()}
@@ -4,328 +4,42 @@ GUI інструмент для редагування локалізації EU
 Використовує Tkinter для простоти встановлення.
 """
 
+import os
 import re
 import sys
 import json
-import codecs
+import threading
+import time
 import subprocess
+import multiprocessing
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 from pathlib import Path
-from typing import List, Optional, Tuple, Dict
-from dataclasses import dataclass
-
-
-@dataclass
-class LocalizationEntry:
-    """Рядок локалізації."""
-    file_path: str
-    line_number: int
-    key: str
-    version: str
-    value: str
-    category: str
-    is_translated: bool
-
-
-# Regex patterns
-# Формат:  KEY:0 "value" або  KEY: "value" (без версії)
-LINE_PATTERN = re.compile(r'^(\s*)([A-Za-z0-9_]+):(\d*)\s*"(.*)"\s*$')
-CYRILLIC_PATTERN = re.compile(r'[а-яА-ЯіІїЇєЄґҐ]')
-TAG_PATTERNS = [
-    re.compile(r'\$[^$]+\$'),  # $VAR$, $flavor_eng.240.historical_info$, $var|format$ тощо
-    re.compile(r'\[.*?\]'),  # [GetName], [ROOT.GetCountry.Custom('...')] тощо
-    re.compile(r'#[A-Z]+(?::[^\s\]]+)?'),  # #R, #ONCLICK:..., #TOOLTIP:... тощо
-    re.compile(r'#!'),  # #! закриваючий тег
-    re.compile(r'@[a-z_]+!'),  # @icon!
-    re.compile(r'\\n'),  # \n переноси рядків
-]
-
-# Шлях до файлу конфігурації
-CONFIG_FILE = Path(__file__).parent / '.localization_gui_config.json'
-
-# Доступні мови для референсу
-AVAILABLE_LANGUAGES = ['english', 'french', 'german', 'spanish', 'russian', 'chinese', 'japanese', 'korean']
-
-
-def is_technical_string(value: str) -> bool:
-    """Перевіряє чи рядок є технічним (не потребує перекладу)."""
-    stripped = value.strip()
-
-    if not stripped:
-        return True
-
-    # Перевіряємо чи рядок складається тільки з тегів
-    clean = stripped
-    for pattern in TAG_PATTERNS:
-        clean = pattern.sub('', clean)
-
-    # Видаляємо пробіли та пунктуацію що залишились між тегами
-    clean = re.sub(r'[\s\,\.\:\;\-\+\=\%\(\)\/\\\'\"]+', '', clean)
+from typing import List, Optional, Tuple, Dict, Set
 
-    if not clean:
-        return True
-
-    # UPPER_SNAKE_CASE
-    if re.match(r'^[A-Z][A-Z0-9_]*$', clean):
-        return True
-
-    # lower_snake_case
-    if re.match(r'^[a-z][a-z0-9_]*$', clean):
-        return True
-
-    # Mixed case without spaces - code identifier
-    if re.match(r'^[A-Za-z][A-Za-z0-9_]*$', clean) and ' ' not in stripped:
-        return True
-
-    # Тільки цифри
-    if re.match(r'^[\d]+$', clean):
-        return True
-
-    return False
-
-
-def get_category(file_path: str) -> str:
-    """Визначає категорію файла."""
-    path_lower = file_path.lower().replace('\\', '/')
-
-    if '/events/dhe/' in path_lower:
-        return 'events/DHE'
-    elif '/events/character/' in path_lower:
-        return 'events/character'
-    elif '/events/culture/' in path_lower:
-        return 'events/culture'
-    elif '/events/' in path_lower:
-        return 'events/other'
-    elif '/interfaces/' in path_lower:
-        return 'interfaces'
-    elif '/locations/' in path_lower:
-        return 'locations'
-    elif '/missions/' in path_lower:
-        return 'missions'
-    elif '/government/' in path_lower:
-        return 'government'
-    elif '/modifiers/' in path_lower:
-        return 'modifiers'
-    elif '/units/' in path_lower:
-        return 'units'
-    else:
-        return 'other'
-
-
-def is_translated(value: str) -> bool:
-    """Перевіряє чи рядок перекладений або не потребує перекладу."""
-    if is_technical_string(value):
-        return True
-
-    if CYRILLIC_PATTERN.search(value):
-        return True
-
-    clean = value
-    for pattern in TAG_PATTERNS:
-        clean = pattern.sub('', clean)
-    clean = re.sub(r'[\s\d\W]', '', clean)
-
-    if not clean:
-        return True
-
-    return False
-
-
-def find_tags(text: str) -> List[str]:
-    """Знаходить теги в тексті."""
-    tags = []
-    for pattern in TAG_PATTERNS:
-        tags.extend(pattern.findall(text))
-    return tags
-
-
-class OriginalTextsDatabase:
-    """База даних оригінальних текстів з гри."""
-
-    def __init__(self):
-        self.texts: Dict[str, str] = {}  # key -> value
-
-    def scan(self, root_dir: Path, language: str = 'english', progress_callback=None) -> int:
-        """Сканує оригінальні файли локалізації."""
-        self.texts.clear()
-
-        # Шукаємо файли для обраної мови
-        pattern = f'*_l_{language}.yml'
-        yml_files = list(root_dir.rglob(pattern))
-        total = len(yml_files)
-
-        for i, yml_file in enumerate(yml_files):
-            if progress_callback:
-                progress_callback(i + 1, total, str(yml_file.name))
-
-            self._parse_file(yml_file)
-
-        return len(self.texts)
-
-    def _parse_file(self, file_path: Path):
-        """Парсить один YML файл."""
-        try:
-            with open(file_path, 'rb') as f:
-                raw = f.read()
-
-            has_bom = raw.startswith(codecs.BOM_UTF8)
-            content = raw[3:].decode('utf-8') if has_bom else raw.decode('utf-8')
-
-            for line in content.splitlines():
-                match = LINE_PATTERN.match(line)
-                if match:
-                    key = match.group(2)
-                    value = match.group(4)
-                    # Зберігаємо тільки якщо ще немає (перший знайдений має пріоритет)
-                    if key not in self.texts:
-                        self.texts[key] = value
-
-        except Exception as e:
-            print(f"Помилка читання {file_path}: {e}", file=sys.stderr)
-
-    def get(self, key: str) -> Optional[str]:
-        """Повертає оригінальний текст за ключем."""
-        return self.texts.get(key)
-
-
-class LocalizationDatabase:
-    """База даних локалізації."""
-
-    def __init__(self, root_dir: Path):
-        self.root_dir = root_dir
-        self.entries: List[LocalizationEntry] = []
-        self.file_cache: Dict[str, Tuple[List[str], bool]] = {}
-
-    def scan(self, progress_callback=None) -> int:
-        """Сканує всі файли локалізації."""
-        self.entries.clear()
-        self.file_cache.clear()
-
-        yml_files = list(self.root_dir.rglob('*_l_english.yml'))
-        total = len(yml_files)
-
-        for i, yml_file in enumerate(yml_files):
-            if progress_callback:
-                progress_callback(i + 1, total, str(yml_file.name))
-
-            self._parse_file(yml_file)
-
-        return len(self.entries)
-
-    def _parse_file(self, file_path: Path):
-        """Парсить один YML файл."""
-        try:
-            with open(file_path, 'rb') as f:
-                raw = f.read()
-
-            has_bom = raw.startswith(codecs.BOM_UTF8)
-            content = raw[3:].decode('utf-8') if has_bom else raw.decode('utf-8')
-            lines = content.splitlines(keepends=True)
-
-            self.file_cache[str(file_path)] = (lines, has_bom)
-
-            category = get_category(str(file_path))
-
-            for line_num, line in enumerate(lines):
-                match = LINE_PATTERN.match(line)
-                if match:
-                    key = match.group(2)
-                    version = match.group(3)
-                    value = match.group(4)
-
-                    entry = LocalizationEntry(
-                        file_path=str(file_path),
-                        line_number=line_num,
-                        key=key,
-                        version=version,
-                        value=value,
-                        category=category,
-                        is_translated=is_translated(value)
-                    )
-                    self.entries.append(entry)
-
-        except Exception as e:
-            print(f"Помилка читання {file_path}: {e}", file=sys.stderr)
-
-    def search(self, query: str = "", category: str = "all",
-               untranslated_only: bool = False) -> List[LocalizationEntry]:
-        """Шукає рядки за критеріями."""
-        results = []
-        query_lower = query.lower()
-
-        for entry in self.entries:
-            if category != "all" and entry.category != category:
-                continue
-
-            if untranslated_only and entry.is_translated:
-                continue
-
-            if query:
-                if (query_lower not in entry.key.lower() and
-                    query_lower not in entry.value.lower()):
-                    continue
-
-            results.append(entry)
-
-        return results
-
-    def get_context(self, entry: LocalizationEntry, lines_count: int = 3) -> List[Tuple[int, str, bool]]:
-        """Отримує контекст навколо рядка."""
-        if entry.file_path not in self.file_cache:
-            return []
-
-        lines, _ = self.file_cache[entry.file_path]
-        start = max(0, entry.line_number - lines_count)
-        end = min(len(lines), entry.line_number + lines_count + 1)
-
-        result = []
-        for i in range(start, end):
-            is_current = (i == entry.line_number)
-            result.append((i + 1, lines[i].rstrip(), is_current))
-
-        return result
-
-    def update_entry(self, entry: LocalizationEntry, new_value: str) -> bool:
-        """Оновлює значення рядка."""
-        if entry.file_path not in self.file_cache:
-            return False
-
-        lines, has_bom = self.file_cache[entry.file_path]
-
-        match = LINE_PATTERN.match(lines[entry.line_number])
-        if not match:
-            return False
-
-        indent = match.group(1)
-        new_line = f'{indent}{entry.key}:{entry.version} "{new_value}"\n'
-        lines[entry.line_number] = new_line
-
-        try:
-            content = ''.join(lines)
-            with open(entry.file_path, 'wb') as f:
-                if has_bom:
-                    f.write(codecs.BOM_UTF8)
-                f.write(content.encode('utf-8'))
-
-            entry.value = new_value
-            entry.is_translated = is_translated(new_value)
-
-            return True
-        except Exception as e:
-            print(f"Помилка збереження: {e}", file=sys.stderr)
-            return False
-
-    def get_stats(self) -> Tuple[int, int]:
-        """Повертає (всього, перекладено)."""
-        total = len(self.entries)
-        translated = sum(1 for e in self.entries if e.is_translated)
-        return total, translated
+from localization_core import (
+    AVAILABLE_LANGUAGES, CATEGORY_NAMES, CONFIG_FILE, NO_LANGUAGE, SEARCH_MODES,
+    SEARCH_REGEX, SEARCH_TEXT, SEARCH_WORD, SOURCE_LANGUAGE, STATE_DIR, FileChanges,
+    LocalizationDatabase, LocalizationEntry, MemoryMatch, OriginalTextsDatabase,
+    ScanCache, SearchResults, TagCache, TagIssue, compile_search_pattern,
+    exchange_format, find_tags, read_exchange, tag_parity, tokenize_markup, write_exchange,
+)
 
 
 class LocalizationApp:
     """Головний клас GUI застосунку."""
 
+    # Скільки результатів шукається першою сторінкою, щоб показати їх одразу
+    RESULTS_PAGE_SIZE = 1000
+    # Скільки рядків прокручує коліщатко миші
+    WHEEL_ROWS = 3
+    # Скільки рядків показує попередній перегляд масової заміни
+    REPLACE_PREVIEW_LIMIT = 2000
+    # Скільки пропозицій пам'яті перекладів показується (і клавіш Ctrl+1…)
+    MEMORY_SUGGESTIONS = 5
+    # Формати обміну з перекладацькими програмами (XLIFF, PO, CSV)
+    EXCHANGE_FILETYPES = [("XLIFF", "*.xlf *.xliff"), ("PO", "*.po"), ("CSV", "*.csv")]
+
     def __init__(self, root: tk.Tk):
         self.root = root
         self.root.title("EU5 Локалізація - Редактор")
@@ -337,18 +51,59 @@ class LocalizationApp:
         self.modified_files: set = set()
         self.has_unsaved_changes: bool = False
         self.original_value: str = ""
-        self._previous_selection: Optional[str] = None
+        # Дерево показує лише видиме вікно current_results, починаючи з results_offset
+        self.results_offset = 0
+        self.selected_index: Optional[int] = None
+        self._visible_rows = 1
+        # (висота заголовка, висота рядка) дерева, уточнюється після першого показу
+        self._row_metrics = (25, 20)
+
+        # Відстеження змін файлів (опитування stat у фоновому потоці)
+        self._watch_thread: Optional[threading.Thread] = None
+        self._watch_result = None
+
+        # (база оригіналів, мова), що довантажуються у фоновому потоці
+        self._loading_languages: Set[Tuple[OriginalTextsDatabase, str]] = set()
+
+        # Пам'ять перекладів будується у фоновому потоці
+        self._memory_thread: Optional[threading.Thread] = None
+        self._memory_rebuild = False
+
+        # Оновлення списку порушень глосарію, поки його вікно відкрите
+        self._glossary_refresh = None
+        # Кеш перевірки тегів (завантажується при першій перевірці)
+        self.tag_cache: Optional[TagCache] = None
+        self.memory_matches: List[MemoryMatch] = []
+
+        # Пошук у фоновому потоці; застарілі результати відкидаються за поколінням
+        self._search_thread: Optional[threading.Thread] = None
+        self._search_lock = threading.Lock()
+        self._search_generation = 0
+        self._search_cancel: Optional[threading.Event] = None
+        self._search_result = None
+        self._search_after: Optional[str] = None
+        # (db, запит, категорія, (тільки неперекладені, тільки застарілі), режим, результати)
+        # останнього пошуку
+        self._last_search = None
 
         # Сортування
         self.sort_column: str = ""
         self.sort_reverse: bool = False
 
         self._load_config()
+
+        # Кеш сканування: теплий старт перечитує лише змінені файли
+        self.scan_cache: Optional[ScanCache] = None
+        if self.config.get('scan_cache', True):
+            self.scan_cache = ScanCache(verify_hash=self.config.get('scan_cache_verify_hash', False))
+            self.scan_cache.load()
+
         self._setup_ui()
         self._setup_context_menus()
         self._bind_events()
         self._auto_detect_directories()
         self.root.after(500, self._auto_scan_on_startup)
+        self._schedule_watch()
         self.root.protocol("WM_DELETE_WINDOW", self._on_close)
 
     def _load_config(self):
@@ -358,7 +113,16 @@ class LocalizationApp:
             'mod_directory': '',
             'game_directory': '',
             'reference_language': 'english',
+            'second_reference_language': '',  # показується поруч з основною
             'auto_scan': True,
+            'scan_cache': True,
+            'scan_cache_verify_hash': False,
+            'scan_workers': 0,  # 0 = кількість ядер, 1 = без паралельності
+            'watch_interval_ms': 2000,  # 0 = не відстежувати зміни файлів
+            'mmap_files': True,  # читати контекст через mmap замість кешу рядків
+            'search_debounce_ms': 250,  # 0 = шукати лише за Enter
+            'search_time_budget_ms': 2000,  # пошук довше цього зупиняється
+            'save_delay_ms': 2000,  # зміни одного файлу за цей час пишуться разом (вони вже в журналі)
         }
         try:
             if CONFIG_FILE.exists():
@@ -378,6 +142,7 @@ class LocalizationApp:
             self.config['mod_directory'] = self.mod_dir_var.get()
             self.config['game_directory'] = self.game_dir_var.get()
             self.config['reference_language'] = self.lang_var.get()
+            self.config['second_reference_language'] = self._second_language()
             with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
                 json.dump(self.config, f, indent=2)
         except Exception:
@@ -395,6 +160,10 @@ class LocalizationApp:
             if result:
                 self._save_entry()
 
+        if not self._flush_saves():
+            if not messagebox.askyesno("Помилка збереження", "Вийти, не зберігши ці зміни?"):
+                return
+
         # Попередження про незакомічені файли
         if self.modified_files:
             files_count = len(self.modified_files)
@@ -406,6 +175,8 @@ class LocalizationApp:
             if not result:
                 return
 
+        if self.scan_cache:
+            self.scan_cache.save()
         self._save_config()
         self.root.destroy()
 
@@ -429,7 +200,8 @@ class LocalizationApp:
 
         ttk.Label(mod_row, text="Папка мода:", width=15).pack(side=tk.LEFT)
         self.mod_dir_var = tk.StringVar(value=self.config.get('mod_directory', ''))
-        ttk.Entry(mod_row, textvariable=self.mod_dir_var, width=70).pack(side=tk.LEFT, padx=5)
+        self.mod_dir_entry = ttk.Entry(mod_row, textvariable=self.mod_dir_var, width=70)
+        self.mod_dir_entry.pack(side=tk.LEFT, padx=5)
         ttk.Button(mod_row, text="Огляд...", command=self._browse_mod_directory).pack(side=tk.LEFT)
 
         # Рядок 2: Папка гри (оригінали)
@@ -438,7 +210,8 @@ class LocalizationApp:
 
         ttk.Label(game_row, text="Папка гри:", width=15).pack(side=tk.LEFT)
         self.game_dir_var = tk.StringVar(value=self.config.get('game_directory', ''))
-        ttk.Entry(game_row, textvariable=self.game_dir_var, width=70).pack(side=tk.LEFT, padx=5)
+        self.game_dir_entry = ttk.Entry(game_row, textvariable=self.game_dir_var, width=70)
+        self.game_dir_entry.pack(side=tk.LEFT, padx=5)
         ttk.Button(game_row, text="Огляд...", command=self._browse_game_directory).pack(side=tk.LEFT)
 
         # Рядок 3: Мова референсу + Сканувати
@@ -450,6 +223,16 @@ class LocalizationApp:
         lang_combo = ttk.Combobox(lang_row, textvariable=self.lang_var, values=AVAILABLE_LANGUAGES,
                                    state='readonly', width=15)
         lang_combo.pack(side=tk.LEFT, padx=5)
+        lang_combo.bind('<<ComboboxSelected>>', lambda e: self._on_reference_language_changed())
+
+        ttk.Label(lang_row, text="Друга мова:").pack(side=tk.LEFT, padx=(10, 0))
+        self.second_lang_var = tk.StringVar(
+            value=self.config.get('second_reference_language') or NO_LANGUAGE)
+        second_lang_combo = ttk.Combobox(lang_row, textvariable=self.second_lang_var,
+                                         values=[NO_LANGUAGE] + AVAILABLE_LANGUAGES,
+                                         state='readonly', width=15)
+        second_lang_combo.pack(side=tk.LEFT, padx=5)
+        second_lang_combo.bind('<<ComboboxSelected>>', lambda e: self._on_reference_language_changed())
 
         ttk.Button(lang_row, text="Сканувати (F5)", command=self._scan_all).pack(side=tk.LEFT, padx=20)
 
@@ -468,21 +251,38 @@ class LocalizationApp:
         self.search_entry = ttk.Entry(search_row1, textvariable=self.search_var, width=40)
         self.search_entry.pack(side=tk.LEFT, padx=5)
 
+        self.search_mode_var = tk.StringVar(value=SEARCH_MODES[SEARCH_TEXT])
+        self.search_mode_combo = ttk.Combobox(search_row1, textvariable=self.search_mode_var,
+                                              width=16, state='readonly',
+                                              values=list(SEARCH_MODES.values()))
+        self.search_mode_combo.pack(side=tk.LEFT, padx=5)
+
         ttk.Label(search_row1, text="Категорія:").pack(side=tk.LEFT, padx=(10, 0))
         self.category_var = tk.StringVar(value="all")
-        self.category_combo = ttk.Combobox(search_row1, textvariable=self.category_var, width=20,
+        self.category_combo = ttk.Combobox(search_row1, textvariable=self.category_var, width=30,
                                            state='readonly')
-        self.category_combo['values'] = [
-            'all', 'events/DHE', 'events/character', 'events/culture', 'events/other',
-            'interfaces', 'locations', 'missions', 'government', 'modifiers', 'units', 'other'
-        ]
+        # Підпис у списку (з лічильником) -> назва категорії
+        self.category_labels: Dict[str, str] = {}
+        self._update_category_counts()
         self.category_combo.pack(side=tk.LEFT, padx=5)
 
         self.untranslated_var = tk.BooleanVar(value=True)
         ttk.Checkbutton(search_row1, text="Тільки неперекладені",
-                        variable=self.untranslated_var).pack(side=tk.LEFT, padx=10)
+                        variable=self.untranslated_var,
+                        command=lambda: self._on_status_filter(self.outdated_var)).pack(side=tk.LEFT, padx=10)
+
+        # Перекладені, оригінал яких змінився з часу перекладу (напр. після патча гри)
+        self.outdated_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(search_row1, text="Тільки застарілі",
+                        variable=self.outdated_var,
+                        command=lambda: self._on_status_filter(self.untranslated_var)).pack(side=tk.LEFT)
 
         ttk.Button(search_row1, text="Пошук", command=self._do_search).pack(side=tk.LEFT, padx=5)
+        ttk.Button(search_row1, text="Замінити...", command=self._replace_dialog).pack(side=tk.LEFT)
+        ttk.Button(search_row1, text="Глосарій...",
+                   command=self._glossary_dialog).pack(side=tk.LEFT, padx=5)
+        ttk.Button(search_row1, text="Русизми...", command=self._lexicon_dialog).pack(side=tk.LEFT)
+        ttk.Button(search_row1, text="Теги...", command=self._tags_dialog).pack(side=tk.LEFT, padx=5)
 
         # Прогрес-бар
         self.progress_frame = ttk.Frame(search_frame)
@@ -523,8 +323,10 @@ class LocalizationApp:
         self.results_tree.column('file', width=150)
         self.results_tree.column('status', width=70)
 
-        v_scrollbar = ttk.Scrollbar(tree_container, orient=tk.VERTICAL, command=self.results_tree.yview)
-        self.results_tree.configure(yscrollcommand=v_scrollbar.set)
+        # Прокрутка віртуальна: смуга рухає вікно по current_results, а не дерево
+        self.results_scrollbar = ttk.Scrollbar(tree_container, orient=tk.VERTICAL,
+                                               command=self._on_results_scroll)
+        v_scrollbar = self.results_scrollbar
 
         h_scrollbar = ttk.Scrollbar(tree_container, orient=tk.HORIZONTAL, command=self.results_tree.xview)
         self.results_tree.configure(xscrollcommand=h_scrollbar.set)
@@ -538,6 +340,8 @@ class LocalizationApp:
 
         self.results_tree.tag_configure('translated', background='#d4edda')
         self.results_tree.tag_configure('untranslated', background='#f8d7da')
+        self.results_tree.tag_configure('outdated', background='#fff3cd')
+        self.results_tree.tag_configure('unverified', background='#e2e3e5')
 
         self.results_count_label = ttk.Label(results_frame, text="")
         self.results_count_label.pack(side=tk.BOTTOM, fill=tk.X)
@@ -585,12 +389,26 @@ class LocalizationApp:
         orig_header = ttk.Frame(orig_frame)
         orig_header.pack(fill=tk.X)
         ttk.Label(orig_header, text="Оригінал (з гри):").pack(side=tk.LEFT)
-        self.orig_lang_label = ttk.Label(orig_header, text="[english]", foreground='gray')
+        self.orig_lang_label = ttk.Label(orig_header, text=self._reference_languages_label(),
+                                         foreground='gray')
         self.orig_lang_label.pack(side=tk.RIGHT)
 
-        self.original_text = tk.Text(orig_frame, height=5, font=('Consolas', 11),
+        # Основна і друга мова референсу поруч
+        orig_texts = ttk.Frame(orig_frame)
+        orig_texts.pack(fill=tk.BOTH, expand=True)
+        orig_texts.grid_rowconfigure(0, weight=1)
+        orig_texts.grid_columnconfigure(0, weight=1, uniform="originals")
+        orig_texts.grid_columnconfigure(1, weight=1, uniform="originals")
+
+        self.original_text = tk.Text(orig_texts, height=5, font=('Consolas', 11),
                                       state=tk.DISABLED, wrap=tk.WORD, bg='#f5f5f5')
-        self.original_text.pack(fill=tk.BOTH, expand=True)
+        self.original_text.grid(row=0, column=0, sticky='nsew')
+
+        self.original2_text = tk.Text(orig_texts, height=5, font=('Consolas', 11),
+                                       state=tk.DISABLED, wrap=tk.WORD, bg='#f5f5f5')
+        self.original2_text.grid(row=0, column=1, sticky='nsew', padx=(5, 0))
+        if not self._second_language():
+            self.original2_text.grid_remove()
 
         # Переклад (editable)
         trans_frame = ttk.Frame(editor_row)
@@ -606,6 +424,20 @@ class LocalizationApp:
                                          wrap=tk.WORD, undo=True)
         self.translation_text.pack(fill=tk.BOTH, expand=True)
 
+        # Пам'ять перекладів
+        memory_frame = ttk.Frame(edit_frame)
+        memory_frame.pack(fill=tk.X, pady=(0, 5))
+        ttk.Label(memory_frame,
+                  text="Пам'ять перекладів (Ctrl+1…Ctrl+5 або подвійний клік — вставити):"
+                  ).pack(anchor=tk.W)
+        self.memory_tree = ttk.Treeview(memory_frame, columns=('n', 'score', 'translation', 'source'),
+                                        show='headings', height=3, selectmode='browse')
+        for column, title, width in (('n', "#", 30), ('score', "Збіг", 50),
+                                     ('translation', "Переклад", 400), ('source', "Оригінал", 400)):
+            self.memory_tree.heading(column, text=title)
+            self.memory_tree.column(column, width=width, stretch=column in ('translation', 'source'))
+        self.memory_tree.pack(fill=tk.X)
+
         # Теги
         tags_row = ttk.Frame(edit_frame)
         tags_row.pack(fill=tk.X)
@@ -626,6 +458,10 @@ class LocalizationApp:
         ttk.Button(buttons_frame, text="← (Ctrl+P)", command=self._prev_entry).pack(side=tk.LEFT, padx=10)
         ttk.Button(buttons_frame, text="(Ctrl+N) →", command=self._next_entry).pack(side=tk.LEFT)
         ttk.Button(buttons_frame, text="Git Commit...", command=self._git_commit).pack(side=tk.RIGHT)
+        ttk.Button(buttons_frame, text="Прийняти оригінали...",
+                   command=self._accept_sources).pack(side=tk.RIGHT, padx=5)
+        ttk.Button(buttons_frame, text="Імпорт...", command=self._import_translations).pack(side=tk.RIGHT, padx=5)
+        ttk.Button(buttons_frame, text="Експорт...", command=self._export_results).pack(side=tk.RIGHT)
         ttk.Button(buttons_frame, text="Відкрити у редакторі",
                    command=self._open_in_editor).pack(side=tk.RIGHT, padx=5)
 
@@ -644,6 +480,7 @@ class LocalizationApp:
 
         # Теги для підсвічування
         self.original_text.tag_configure('tag', foreground='#0066cc', font=('Consolas', 11, 'bold'))
+        self.original2_text.tag_configure('tag', foreground='#0066cc', font=('Consolas', 11, 'bold'))
         self.translation_text.tag_configure('tag', foreground='#0066cc', font=('Consolas', 11, 'bold'))
         self.context_text.tag_configure('current', background='#ffffcc')
 
@@ -658,6 +495,11 @@ class LocalizationApp:
         self.translation_menu.add_separator()
         self.translation_menu.add_command(label="Скасувати (Ctrl+Z)", command=self._undo)
         self.translation_menu.add_command(label="Повторити (Ctrl+Y)", command=self._redo)
+        self.translation_menu.add_separator()
+        self.translation_menu.add_command(label="Скасувати збереження (Ctrl+Alt+Z)",
+                                          command=self._undo_save)
+        self.translation_menu.add_command(label="Повторити збереження (Ctrl+Alt+Y)",
+                                          command=self._redo_save)
 
         self.readonly_menu = tk.Menu(self.root, tearoff=0)
         self.readonly_menu.add_command(label="Копіювати (Ctrl+C)", command=self._copy_from_readonly)
@@ -668,8 +510,17 @@ class LocalizationApp:
         self.results_tree.bind('<Double-1>', self._on_double_click)
         self.results_tree.bind('<Up>', self._on_tree_key_up)
         self.results_tree.bind('<Down>', self._on_tree_key_down)
+        self.results_tree.bind('<Prior>', lambda e: self._move_selection(-self._visible_rows))
+        self.results_tree.bind('<Next>', lambda e: self._move_selection(self._visible_rows))
+        self.results_tree.bind('<MouseWheel>', self._on_results_wheel)
+        self.results_tree.bind('<Button-4>', self._on_results_wheel)
+        self.results_tree.bind('<Button-5>', self._on_results_wheel)
+        self.results_tree.bind('<Configure>', self._on_results_resize)
 
         self.search_entry.bind('<Return>', lambda e: self._do_search())
+        self.search_var.trace_add('write', lambda *args: self._schedule_search())
+        self.category_combo.bind('<<ComboboxSelected>>', lambda e: self._schedule_search(0))
+        self.search_mode_combo.bind('<<ComboboxSelected>>', lambda e: self._schedule_search(0))
 
         self.root.bind('<Control-s>', lambda e: self._save_entry())
         self.root.bind('<Control-n>', lambda e: self._next_entry())
@@ -677,6 +528,21 @@ class LocalizationApp:
         self.root.bind('<Control-Return>', lambda e: self._save_and_next())
         self.root.bind('<F5>', lambda e: self._scan_all())
         self.root.bind('<Control-f>', lambda e: self._focus_search())
+        self.root.bind('<Control-h>', lambda e: self._replace_dialog())
+        # У полях введення Ctrl+H — це ще й Backspace (прив'язка класу Text/TEntry,
+        # що спрацьовує раніше за вікно); 'break' не дає видалити символ
+        for widget in (self.translation_text, self.search_entry,
+                       self.mod_dir_entry, self.game_dir_entry):
+            widget.bind('<Control-h>', lambda e: self._replace_dialog() or 'break')
+        self.root.bind('<Control-g>', lambda e: self._glossary_dialog())
+        self.root.bind('<Control-r>', lambda e: self._lexicon_dialog())
+        self.root.bind('<Control-Alt-z>', lambda e: self._undo_save())
+        for number in range(1, self.MEMORY_SUGGESTIONS + 1):
+            self.root.bind(f'<Control-Key-{number}>',
+                           lambda e, index=number - 1: self._apply_suggestion(index))
+        self.memory_tree.bind('<Double-1>', lambda e: self._apply_suggestion(
+            self.memory_tree.index(self.memory_tree.focus()) if self.memory_tree.focus() else -1))
+        self.root.bind('<Control-Alt-y>', lambda e: self._redo_save())
         self.root.bind('<Control-Home>', lambda e: self._go_to_first())
         self.root.bind('<Control-End>', lambda e: self._go_to_last())
         self.root.bind('<Escape>', lambda e: self._on_escape())
@@ -690,6 +556,7 @@ class LocalizationApp:
 
         self.translation_text.bind('<Button-3>', self._show_translation_menu)
         self.original_text.bind('<Button-3>', self._show_readonly_menu)
+        self.original2_text.bind('<Button-3>', self._show_readonly_menu)
 
         self.translation_text.bind('<KeyRelease>', self._on_translation_change)
         self.translation_text.bind('<KeyRelease>', self._highlight_tags_in_translation, add='+')
@@ -762,25 +629,15 @@ class LocalizationApp:
         self.translation_text.tag_add('sel', '1.0', 'end')
 
     def _on_tree_key_up(self, event):
-        selection = self.results_tree.selection()
-        if selection:
-            item = selection[0]
-            prev_item = self.results_tree.prev(item)
-            if prev_item:
-                self.results_tree.selection_set(prev_item)
-                self.results_tree.see(prev_item)
-                self._on_result_select(None)
-        return 'break'
+        return self._move_selection(-1)
 
     def _on_tree_key_down(self, event):
-        selection = self.results_tree.selection()
-        if selection:
-            item = selection[0]
-            next_item = self.results_tree.next(item)
-            if next_item:
-                self.results_tree.selection_set(next_item)
-                self.results_tree.see(next_item)
-                self._on_result_select(None)
+        return self._move_selection(1)
+
+    def _move_selection(self, step: int):
+        """Зсуває виділення на step рядків у межах усіх результатів."""
+        if self.selected_index is not None:
+            self._select_index(self.selected_index + step)
         return 'break'
 
     def _on_escape(self):
@@ -802,45 +659,19 @@ class LocalizationApp:
 
     def _go_to_first(self):
         """Переходить до першого результату (Ctrl+Home)."""
-        children = self.results_tree.get_children()
-        if children:
-            first_item = children[0]
-            self.results_tree.selection_set(first_item)
-            self.results_tree.see(first_item)
-            self._on_result_select(None)
+        self._select_index(0)
         return 'break'
 
     def _go_to_last(self):
         """Переходить до останнього результату (Ctrl+End)."""
-        children = self.results_tree.get_children()
-        if children:
-            last_item = children[-1]
-            self.results_tree.selection_set(last_item)
-            self.results_tree.see(last_item)
-            self._on_result_select(None)
+        self._select_index(len(self.current_results) - 1)
         return 'break'
 
     def _prev_entry(self):
-        selection = self.results_tree.selection()
-        if not selection:
-            return
-        item = selection[0]
-        prev_item = self.results_tree.prev(item)
-        if prev_item:
-            self.results_tree.selection_set(prev_item)
-            self.results_tree.see(prev_item)
-            self._on_result_select(None)
+        self._move_selection(-1)
 
     def _next_entry(self):
-        selection = self.results_tree.selection()
-        if not selection:
-            return
-        item = selection[0]
-        next_item = self.results_tree.next(item)
-        if next_item:
-            self.results_tree.selection_set(next_item)
-            self.results_tree.see(next_item)
-            self._on_result_select(None)
+        self._move_selection(1)
 
     # === Редактор ===
 
@@ -871,11 +702,8 @@ class LocalizationApp:
     def _highlight_tags_in_translation(self, event=None):
         self.translation_text.tag_remove('tag', '1.0', tk.END)
         text = self.translation_text.get('1.0', tk.END)
-        for pattern in TAG_PATTERNS:
-            for match in pattern.finditer(text):
-                start_idx = f"1.0+{match.start()}c"
-                end_idx = f"1.0+{match.end()}c"
-                self.translation_text.tag_add('tag', start_idx, end_idx)
+        for _, start, end in tokenize_markup(text):
+            self.translation_text.tag_add('tag', f"1.0+{start}c", f"1.0+{end}c")
 
     def _update_title(self):
         title = "EU5 Локалізація - Редактор"
@@ -918,52 +746,141 @@ class LocalizationApp:
 
     def _sort_column(self, col):
         if self.sort_column == col:
+            # Той самий стовпець — лише змінюємо напрямок
             self.sort_reverse = not self.sort_reverse
+            self.current_results.reverse()
         else:
             self.sort_column = col
             self.sort_reverse = False
+            # До сканування сортувати нічого; порядок застосується до перших результатів
+            if self.db and self.current_results:
+                self.current_results = self.db.index.sort(self.current_results, col)
+
+        self._update_sort_headings()
 
+        # Виділений запис лишається виділеним на новому місці
+        self.selected_index = self._find_result_index(self.current_entry)
+        self.results_offset = 0
+        if self.selected_index is not None:
+            self._ensure_visible(self.selected_index)
+        self._refresh_results_display()
+
+    def _update_sort_headings(self):
         for c in ('key', 'value', 'category', 'file', 'status'):
             text = {'key': 'Ключ', 'value': 'Значення', 'category': 'Категорія',
                     'file': 'Файл', 'status': 'Статус'}[c]
-            if c == col:
+            if c == self.sort_column:
                 text += ' ▲' if self.sort_reverse else ' ▼'
             self.results_tree.heading(c, text=text)
 
-        if col == 'status':
-            self.current_results.sort(key=lambda e: e.is_translated, reverse=self.sort_reverse)
-        elif col == 'key':
-            self.current_results.sort(key=lambda e: e.key.lower(), reverse=self.sort_reverse)
-        elif col == 'value':
-            self.current_results.sort(key=lambda e: e.value.lower(), reverse=self.sort_reverse)
-        elif col == 'category':
-            self.current_results.sort(key=lambda e: e.category, reverse=self.sort_reverse)
-        elif col == 'file':
-            self.current_results.sort(key=lambda e: Path(e.file_path).name, reverse=self.sort_reverse)
+    def _find_result_index(self, entry: Optional[LocalizationEntry]) -> Optional[int]:
+        """Номер запису в current_results або None."""
+        if entry is not None:
+            for index, result in enumerate(self.current_results):
+                if result is entry:
+                    return index
+        return None
 
-        self._refresh_results_display()
+    def _result_row(self, entry: LocalizationEntry) -> Tuple[tuple, str]:
+        """Повертає (значення колонок, тег) рядка результатів."""
+        short_value = entry.value[:80] + "..." if len(entry.value) > 80 else entry.value
+        short_file = Path(entry.file_path).name
+        if self.db and self.db.is_outdated(entry):
+            status, tag = "⟳", 'outdated'
+        elif self.db and self.db.is_unverified(entry):
+            # Перекладено, але невідомо, з яким оригіналом звірено
+            status, tag = "?", 'unverified'
+        elif entry.is_translated:
+            status, tag = "✓", 'translated'
+        else:
+            status, tag = "✗", 'untranslated'
+        return (entry.key, short_value, entry.category, short_file, status), tag
 
     def _refresh_results_display(self):
+        """Материалізує лише видимі рядки, тож вартість не залежить від кількості результатів."""
+        total = len(self.current_results)
+        rows = self._visible_rows
+        self.results_offset = max(0, min(self.results_offset, total - rows))
+
         self.results_tree.delete(*self.results_tree.get_children())
-        for entry in self.current_results[:1000]:
-            short_value = entry.value[:80] + "..." if len(entry.value) > 80 else entry.value
-            short_file = Path(entry.file_path).name
-            status = "✓" if entry.is_translated else "✗"
-            tag = 'translated' if entry.is_translated else 'untranslated'
-            self.results_tree.insert('', tk.END, values=(
-                entry.key, short_value, entry.category, short_file, status
-            ), tags=(tag,))
+        for index in range(self.results_offset, min(total, self.results_offset + rows)):
+            values, tag = self._result_row(self.current_results[index])
+            # iid — номер у current_results
+            self.results_tree.insert('', tk.END, iid=str(index), values=values, tags=(tag,))
+
+        if self.selected_index is not None and self.results_tree.exists(str(self.selected_index)):
+            self.results_tree.selection_set(str(self.selected_index))
+            self.results_tree.focus(str(self.selected_index))
+
+        if total:
+            self.results_scrollbar.set(self.results_offset / total,
+                                       min(total, self.results_offset + rows) / total)
+        else:
+            self.results_scrollbar.set(0, 1)
+
+    def _scroll_results_to(self, offset: int):
+        total = len(self.current_results)
+        offset = max(0, min(offset, total - self._visible_rows))
+        if offset != self.results_offset:
+            self.results_offset = offset
+            self._refresh_results_display()
+
+    def _ensure_visible(self, index: int):
+        """Зсуває вікно так, щоб рядок index був видимий (без перемальовування)."""
+        if index < self.results_offset:
+            self.results_offset = index
+        elif index >= self.results_offset + self._visible_rows:
+            self.results_offset = index - self._visible_rows + 1
+
+    def _select_index(self, index: int):
+        """Виділяє результат за номером, прокручуючи до нього за потреби."""
+        if not self.current_results:
+            return
+        index = max(0, min(index, len(self.current_results) - 1))
+        offset = self.results_offset
+        self._ensure_visible(index)
+        if offset != self.results_offset:
+            self._refresh_results_display()
+        self.results_tree.selection_set(str(index))
+        self.results_tree.focus(str(index))
+        self._on_result_select(None)
+
+    def _on_results_scroll(self, *args):
+        """Обробник смуги прокрутки: moveto частка | scroll n units/pages."""
+        if args[0] == 'moveto':
+            self._scroll_results_to(int(float(args[1]) * len(self.current_results)))
+        elif args[0] == 'scroll':
+            step = int(args[1]) * (self._visible_rows if args[2] == 'pages' else 1)
+            self._scroll_results_to(self.results_offset + step)
+
+    def _on_results_wheel(self, event):
+        up = event.num == 4 or event.delta > 0
+        self._scroll_results_to(self.results_offset + (-self.WHEEL_ROWS if up else self.WHEEL_ROWS))
+        return 'break'
+
+    def _on_results_resize(self, event=None):
+        """Перераховує, скільки рядків уміщується в дереві."""
+        children = self.results_tree.get_children()
+        bbox = self.results_tree.bbox(children[0]) if children else ''
+        if bbox:
+            self._row_metrics = (bbox[1], bbox[3])
+        header, row_height = self._row_metrics
+        rows = max(1, (self.results_tree.winfo_height() - header) // max(1, row_height))
+        if rows != self._visible_rows:
+            self._visible_rows = rows
+            self._refresh_results_display()
 
     # === Директорії ===
 
     def _auto_detect_directories(self):
         """Автоматично визначає директорії."""
-        script_dir = Path(__file__).resolve().parent
+        script_dir = STATE_DIR.resolve()
 
-        # Папка мода
+        # Папка мода: tools/ у репозиторії або exe поруч з main_menu/ в архіві релізу
         if not self.mod_dir_var.get():
             possible_mod = [
                 script_dir.parent / 'main_menu' / 'localization' / 'dlc' / 'english',
+                script_dir / 'main_menu' / 'localization' / 'dlc' / 'english',
             ]
             for path in possible_mod:
                 if path.exists():
@@ -1028,20 +945,33 @@ class LocalizationApp:
             file_label['text'] = filename
             progress_window.update()
 
+        workers = self.config.get('scan_workers', 0) or os.cpu_count() or 1
+
         def scan():
+            if self.scan_cache:
+                self.scan_cache.reset_stats()
+
             # Скануємо оригінали гри
             if game_dir and Path(game_dir).exists():
                 progress_label['text'] = f"Сканування оригіналів ({lang})..."
                 self.originals_db = OriginalTextsDatabase()
-                orig_count = self.originals_db.scan(Path(game_dir), lang, update_progress)
+                orig_count = self.originals_db.scan(Path(game_dir), lang, update_progress,
+                                                    self.scan_cache, workers)
             else:
                 self.originals_db = None
                 orig_count = 0
 
-            # Скануємо мод
+            # Скануємо мод; зміни з черги старої бази мають потрапити у файли до сканування
             progress_label['text'] = "Сканування мода..."
-            self.db = LocalizationDatabase(Path(mod_dir))
-            mod_count = self.db.scan(update_progress)
+            if self.db:
+                self._flush_saves()
+            self.db = LocalizationDatabase(Path(mod_dir), self.config.get('mmap_files', True),
+                                           self.config.get('save_delay_ms', 2000) / 1000)
+            self.db.originals = self.originals_db
+            mod_count = self.db.scan(update_progress, self.scan_cache, workers)
+
+            if self.scan_cache:
+                self.scan_cache.save()
 
             progress_window.destroy()
 
@@ -1052,19 +982,136 @@ class LocalizationApp:
             status_parts = [f"Мод: {mod_count} рядків ({untranslated} неперекл.)"]
             if orig_count > 0:
                 status_parts.append(f"Оригінали: {orig_count}")
+            if self.scan_cache and self.scan_cache.hits:
+                status_parts.append(f"Кеш: {self.scan_cache.hits} файлів")
+            if self.db.recovered:
+                status_parts.append(f"Відновлено з журналу: {self.db.recovered}")
+            if self.db.index.outdated:
+                status_parts.append(f"Застарілі: {len(self.db.index.outdated)}")
+            if self.db.index.unverified:
+                status_parts.append(f"Без звірки з оригіналом: {len(self.db.index.unverified)}")
+            if self.db.glossary_issues:
+                status_parts.append(f"Глосарій: {len(self.db.glossary_issues)}")
+            if self.db.glossary_error:
+                status_parts.append("Глосарій: помилка файлу")
             self.status_label['text'] = " | ".join(status_parts)
 
             # Оновлюємо label мови
-            self.orig_lang_label['text'] = f"[{lang}]"
+            self._on_reference_language_changed()
 
             self._update_progress_display()
             self._do_search()
+            self._prepare_search_index()
+            self._build_memory()
 
         self.root.after(100, scan)
 
+    # === Відстеження змін файлів ===
+
+    def _schedule_watch(self):
+        interval = self.config.get('watch_interval_ms', 2000)
+        if interval > 0:
+            self.root.after(interval, self._poll_file_changes)
+
+    def _poll_file_changes(self):
+        """Запускає перевірку змінених файлів у фоновому потоці."""
+        self._check_save_errors()
+        if not self.db or self._watch_thread is not None:
+            self._schedule_watch()
+            return
+
+        db, originals_db = self.db, self.originals_db
+
+        def detect():
+            try:
+                orig_changes = originals_db.detect_changes() if originals_db else None
+                self._watch_result = (db, originals_db, db.detect_changes(), orig_changes)
+            except Exception as e:
+                print(f"Помилка перевірки змін: {e}", file=sys.stderr)
+                self._watch_result = None
+
+        self._watch_thread = threading.Thread(target=detect, daemon=True)
+        self._watch_thread.start()
+        self.root.after(50, self._check_watch_result)
+
+    def _check_watch_result(self):
+        if self._watch_thread.is_alive():
+            self.root.after(50, self._check_watch_result)
+            return
+
+        self._watch_thread = None
+        result, self._watch_result = self._watch_result, None
+        # Результат застарів, якщо тим часом було повне сканування
+        if result and result[0] is self.db and result[1] is self.originals_db:
+            self._apply_file_changes(result[2], result[3])
+        self._schedule_watch()
+
+    def _apply_file_changes(self, mod_changes: FileChanges,
+                            orig_changes: Optional[Dict[str, FileChanges]]):
+        """Перечитує змінені файли, зберігаючи поточні результати та виділення."""
+        if not mod_changes and not orig_changes:
+            return
+
+        updated, removed = [], []
+        if mod_changes:
+            _, updated, removed = self.db.refresh(mod_changes, self.scan_cache)
+            self._last_search = None
+            self._prepare_search_index()
+        if orig_changes:
+            self.originals_db.refresh(orig_changes, self.scan_cache)
+            if SOURCE_LANGUAGE in orig_changes:
+                self.db.check_sources()
+                self.db.check_glossary()
+                self._last_search = None
+                self._build_memory()
+
+        removed_ids = {id(e) for e in removed}
+        updated_ids = {id(e) for e in updated}
+
+        if removed_ids:
+            self.current_results = [entry for entry in self.current_results
+                                    if id(entry) not in removed_ids]
+            self.selected_index = self._find_result_index(self.current_entry)
+        # Оновлені записи — ті самі об'єкти, достатньо перемалювати видиме вікно
+        self._refresh_results_display()
+
+        if self.current_entry is not None:
+            if id(self.current_entry) in removed_ids:
+                self.current_entry = None
+            elif not self.has_unsaved_changes and (id(self.current_entry) in updated_ids or orig_changes):
+                self._show_entry(self.current_entry)
+        self._update_statusbar()
+
+        files_count = sum(len(c.changed) + len(c.added) + len(c.deleted)
+                          for c in [mod_changes, *(orig_changes or {}).values()] if c)
+        self.statusbar_status['text'] = f"Оновлено змінених файлів: {files_count}"
+        self.root.after(2000, lambda: self.statusbar_status.config(text=""))
+        self._update_progress_display()
+
+    def _update_category_counts(self):
+        """Оновлює список категорій з кількістю неперекладених рядків."""
+        stats = self.db.get_category_stats() if self.db else {}
+        current = self.category_labels.get(self.category_var.get(), self.category_var.get())
+
+        self.category_labels = {}
+        for category in ['all'] + CATEGORY_NAMES:
+            if category == 'all' and self.db:
+                total, translated = self.db.get_stats()
+                untranslated = total - translated
+            else:
+                untranslated = stats.get(category, (0, 0))[1]
+            label = f"{category} ({untranslated} неперекл.)" if self.db else category
+            self.category_labels[label] = category
+
+        self.category_combo['values'] = list(self.category_labels)
+        for label, category in self.category_labels.items():
+            if category == current:
+                self.category_var.set(label)
+
     def _update_progress_display(self):
         if not self.db:
             return
+        self._update_category_counts()
         total, translated = self.db.get_stats()
         if total == 0:
             return
@@ -1074,43 +1121,168 @@ class LocalizationApp:
         self.progress_bar['value'] = translated
         self.progress_percent['text'] = f"({percent:.1f}%)"
 
-    def _do_search(self):
+    def _schedule_search(self, delay: Optional[int] = None):
+        """Запускає пошук після паузи у введенні."""
+        if delay is None:
+            delay = self.config.get('search_debounce_ms', 250)
+            if delay <= 0:
+                return
+        if self._search_after is not None:
+            self.root.after_cancel(self._search_after)
+        self._search_after = self.root.after(delay, lambda: self._do_search(quiet=True))
+
+    def _on_status_filter(self, other: tk.BooleanVar):
+        """Фільтри "неперекладені" і "застарілі" взаємовиключні (застарілі — перекладені)."""
+        if self.untranslated_var.get() and self.outdated_var.get():
+            other.set(False)
+        self._schedule_search(0)
+
+    def _do_search(self, quiet: bool = False):
+        if self._search_after is not None:
+            self.root.after_cancel(self._search_after)
+            self._search_after = None
+
         if not self.db:
-            messagebox.showinfo("Інформація", "Спочатку проскануйте директорію")
+            if not quiet:
+                messagebox.showinfo("Інформація", "Спочатку проскануйте директорію")
             return
 
         query = self.search_var.get()
-        category = self.category_var.get()
+        category = self.category_labels.get(self.category_var.get(), self.category_var.get())
         untranslated_only = self.untranslated_var.get()
+        outdated_only = self.outdated_var.get()
+        mode = next((m for m, label in SEARCH_MODES.items()
+                     if label == self.search_mode_var.get()), SEARCH_TEXT)
+
+        if query and mode in (SEARCH_WORD, SEARCH_REGEX):
+            try:
+                compile_search_pattern(query, mode)
+            except re.error as e:
+                self.results_count_label['text'] = f"Помилка у виразі: {e}"
+                return
 
-        self.current_results = self.db.search(query, category, untranslated_only)
+        # Попередній пошук скасовується, його результати вже не потрібні
+        with self._search_lock:
+            if self._search_cancel is not None:
+                self._search_cancel.set()
+            cancel = threading.Event()
+            self._search_cancel = cancel
+            self._search_result = None
+            self._search_generation += 1
+            generation = self._search_generation
+
+        # Запит, що містить попередній, лише звужує його результати
+        within = None
+        last = self._last_search
+        if (mode == SEARCH_TEXT and last and last[0] is self.db and last[2] == category
+                and last[3] == (untranslated_only, outdated_only) and last[4] == mode
+                and last[1].lower() in query.lower() and not last[5].truncated):
+            within = last[5]
+
+        db = self.db
+        page_size = self.RESULTS_PAGE_SIZE
+        budget = self.config.get('search_time_budget_ms', 2000) / 1000
+
+        def publish(results, complete):
+            with self._search_lock:
+                if not cancel.is_set():
+                    self._search_result = (generation, results, complete)
+
+        def run():
+            try:
+                deadline = time.monotonic() + budget
+                # Спершу перша сторінка, щоб показати її одразу
+                page = db.search(query, category, untranslated_only, within, page_size, cancel,
+                                 mode, deadline, outdated_only)
+                if page is None:
+                    return
+                if len(page) < page_size or page.truncated:
+                    publish(page, True)
+                    return
+                publish(page, False)
+                results = db.search(query, category, untranslated_only, within, None, cancel,
+                                    mode, deadline, outdated_only)
+                if results is not None:
+                    publish(results, True)
+            except Exception as e:
+                print(f"Помилка пошуку: {e}", file=sys.stderr)
+                # Помилку показуємо замість результатів, інакше пошук просто "зависає"
+                publish(e, True)
 
-        self.sort_column = ""
-        for c in ('key', 'value', 'category', 'file', 'status'):
-            text = {'key': 'Ключ', 'value': 'Значення', 'category': 'Категорія',
-                    'file': 'Файл', 'status': 'Статус'}[c]
-            self.results_tree.heading(c, text=text)
+        self._search_thread = threading.Thread(target=run, daemon=True)
+        self._search_thread.start()
+        search = (self.db, query, category, (untranslated_only, outdated_only), mode)
+        self.root.after(10, lambda: self._check_search_result(generation, search))
+
+    def _check_search_result(self, generation: int, search: tuple, page_shown: bool = False):
+        if generation != self._search_generation:
+            return
+
+        alive = self._search_thread.is_alive()
+        with self._search_lock:
+            result, self._search_result = self._search_result, None
+
+        if result is not None and result[0] == generation:
+            _, results, complete = result
+            if isinstance(results, Exception):
+                self.results_count_label['text'] = f"Помилка пошуку: {results}"
+                return
+            self._show_search_results(results, complete, page_shown)
+            if complete:
+                self._last_search = search + (results,)
+                return
+            page_shown = True
+        elif not alive:
+            return
+
+        self.root.after(20, lambda: self._check_search_result(generation, search, page_shown))
+
+    def _show_search_results(self, results: SearchResults, complete: bool,
+                             page_shown: bool = False):
+        """Показує результати у вибраному порядку сортування.
+
+        Після першої сторінки зберігає прокрутку й виділення.
+        """
+        self.current_results = results
+        if self.sort_column:
+            self.current_results = self.db.index.sort(results, self.sort_column, self.sort_reverse)
+
+        if not page_shown:
+            self.results_offset = 0
+            self.selected_index = None
+        elif self.sort_column:
+            # Повні результати в іншому порядку, ніж перша сторінка
+            self.selected_index = self._find_result_index(self.current_entry)
 
         self._refresh_results_display()
 
-        count = len(self.current_results)
-        shown = min(count, 1000)
-        self.results_count_label['text'] = f"Знайдено: {count} (показано: {shown})"
+        more = "" if complete and not results.truncated else "+"
+        text = f"Знайдено: {len(self.current_results)}{more}"
+        if results.truncated:
+            text += " — пошук зупинено за часом"
+        self.results_count_label['text'] = text
 
     def _on_result_select(self, event):
         selection = self.results_tree.selection()
         if not selection:
             return
 
-        new_item = selection[0]
+        index = int(selection[0])
+        if index >= len(self.current_results):
+            return
+        # Повторне виділення того самого рядка (після перемальовування) — не перехід
+        if index == self.selected_index and self.current_results[index] is self.current_entry:
+            return
 
         if self.has_unsaved_changes:
             result = messagebox.askyesnocancel("Незбережені зміни", "Зберегти зміни перед переходом?")
             if result is None:
                 # Відновлюємо попереднє виділення при Cancel
-                if self._previous_selection:
-                    self.results_tree.selection_set(self._previous_selection)
-                    self.results_tree.see(self._previous_selection)
+                if self.selected_index is not None:
+                    self._ensure_visible(self.selected_index)
+                    self._refresh_results_display()
+                else:
+                    self.results_tree.selection_remove(*self.results_tree.selection())
                 return
             if result:
                 self._save_entry()
@@ -1118,27 +1290,202 @@ class LocalizationApp:
             self._update_title()
 
         # Зберігаємо поточне виділення
-        self._previous_selection = new_item
-        item = new_item
-        index = self.results_tree.index(item)
-
-        if index < len(self.current_results):
-            self.current_entry = self.current_results[index]
-            self._show_entry(self.current_entry)
-            self._update_statusbar()
+        self.selected_index = index
+        self.current_entry = self.current_results[index]
+        self._show_entry(self.current_entry)
+        self._update_statusbar()
 
     def _update_statusbar(self):
         if self.current_entry:
             self.statusbar_file['text'] = f"Файл: {Path(self.current_entry.file_path).name}"
-            selection = self.results_tree.selection()
-            if selection:
-                index = self.results_tree.index(selection[0])
+            if self.selected_index is not None:
                 total = len(self.current_results)
-                self.statusbar_position['text'] = f"Позиція: {index + 1} з {total}"
+                self.statusbar_position['text'] = f"Позиція: {self.selected_index + 1} з {total}"
         else:
             self.statusbar_file['text'] = "Файл: --"
             self.statusbar_position['text'] = "Позиція: --"
 
+    # === Мови референсу ===
+
+    def _second_language(self) -> str:
+        """Друга мова референсу або '', якщо її не показано."""
+        language = self.second_lang_var.get()
+        return '' if language == NO_LANGUAGE else language
+
+    def _reference_languages_label(self) -> str:
+        return f"[{' | '.join(lang for lang in (self.lang_var.get(), self._second_language()) if lang)}]"
+
+    def _on_reference_language_changed(self):
+        """Перемикає мови референсу миттєво; незавантажені довантажуються у фоні."""
+        second = self._second_language()
+        if second:
+            self.original2_text.grid()
+        else:
+            self.original2_text.grid_remove()
+
+        language = self.lang_var.get()
+        db = self.originals_db
+        if db:
+            # Мова SOURCE_LANGUAGE потрібна для пошуку застарілих перекладів
+            for lang in (language, second, SOURCE_LANGUAGE):
+                if lang and not db.is_loaded(lang):
+                    self._load_language(db, lang)
+            if db.is_loaded(language):
+                db.language = language
+
+        self.orig_lang_label['text'] = self._reference_languages_label()
+        if self.current_entry is not None:
+            self._show_originals(self.current_entry)
+
+    def _load_language(self, db: OriginalTextsDatabase, language: str):
+        if (db, language) in self._loading_languages:
+            return
+        self._loading_languages.add((db, language))
+        workers = self.config.get('scan_workers', 0) or os.cpu_count() or 1
+        cache = self.scan_cache
+
+        def load():
+            try:
+                db.load(language, cache=cache, workers=workers)
+            except Exception as e:
+                print(f"Помилка завантаження оригіналів ({language}): {e}", file=sys.stderr)
+
+        thread = threading.Thread(target=load, daemon=True)
+        thread.start()
+        self.statusbar_status['text'] = f"Завантаження оригіналів ({language})..."
+        self.root.after(100, lambda: self._check_language_loaded(db, language, thread))
+
+    def _check_language_loaded(self, db: OriginalTextsDatabase, language: str,
+                               thread: threading.Thread):
+        if thread.is_alive():
+            self.root.after(100, lambda: self._check_language_loaded(db, language, thread))
+            return
+
+        self._loading_languages.discard((db, language))
+        # База застаріла, якщо тим часом було повне сканування
+        if db is not self.originals_db:
+            return
+        if not db.is_loaded(language):
+            self.statusbar_status['text'] = f"Не вдалось завантажити оригінали ({language})"
+            return
+
+        if self.scan_cache:
+            self.scan_cache.save()
+        self.statusbar_status['text'] = f"Оригінали ({language}): {db.languages[language].count}"
+        self.root.after(2000, lambda: self.statusbar_status.config(text=""))
+        if language == SOURCE_LANGUAGE and self.db and self.db.originals is db:
+            self.db.check_sources()
+            self.db.check_glossary()
+            self._last_search = None
+            self._refresh_results_display()
+            self._build_memory()
+        self._on_reference_language_changed()
+
+    def _show_originals(self, entry: LocalizationEntry) -> Optional[str]:
+        """Показує оригінал мовою референсу і, якщо вибрано, другою мовою поруч.
+
+        Повертає оригінал мовою референсу.
+        """
+        panes = [(self.original_text, self.lang_var.get())]
+        if self._second_language():
+            panes.append((self.original2_text, self._second_language()))
+
+        reference_value = None
+        for widget, language in panes:
+            widget.config(state=tk.NORMAL)
+            widget.delete('1.0', tk.END)
+            original_value = None
+            if self.originals_db:
+                original_value = self.originals_db.get(entry.key, language)
+            if widget is self.original_text:
+                reference_value = original_value
+            if original_value:
+                self._insert_with_tags(widget, original_value)
+            elif self.originals_db and not self.originals_db.is_loaded(language):
+                widget.insert('1.0', "(завантаження оригіналів...)")
+            else:
+                widget.insert('1.0', "(не знайдено в оригіналах)")
+            widget.config(state=tk.DISABLED)
+        return reference_value
+
+    # === Пам'ять перекладів ===
+
+    def _prepare_search_index(self):
+        """Будує пошуковий корпус у фоні, щоб перший запит не чекав на нього."""
+        index = self.db.index
+
+        def prepare():
+            try:
+                index.prepare()
+            except Exception as e:
+                print(f"Помилка побудови пошукового індексу: {e}", file=sys.stderr)
+
+        threading.Thread(target=prepare, daemon=True).start()
+
+    def _build_memory(self):
+        """Будує пам'ять перекладів у фоновому потоці (повторно — після поточної побудови)."""
+        if not self.db:
+            return
+        if self._memory_thread is not None:
+            self._memory_rebuild = True
+            return
+
+        db = self.db
+        result = []
+
+        def build():
+            try:
+                result.append(db.build_memory())
+            except Exception as e:
+                print(f"Помилка побудови пам'яті перекладів: {e}", file=sys.stderr)
+
+        self._memory_rebuild = False
+        self._memory_thread = threading.Thread(target=build, daemon=True)
+        self._memory_thread.start()
+        self.root.after(100, lambda: self._check_memory_built(db, result))
+
+    def _check_memory_built(self, db: LocalizationDatabase, result: list):
+        if self._memory_thread.is_alive():
+            self.root.after(100, lambda: self._check_memory_built(db, result))
+            return
+
+        self._memory_thread = None
+        # База застаріла, якщо тим часом було повне сканування
+        if db is self.db and result and result[0] is not None:
+            db.install_memory(result[0])
+            self.statusbar_status['text'] = f"Пам'ять перекладів: {len(result[0])} пар"
+            self.root.after(2000, lambda: self.statusbar_status.config(text=""))
+            if self.current_entry is not None:
+                self._show_suggestions(self.current_entry)
+        if self._memory_rebuild:
+            self._build_memory()
+
+    def _show_suggestions(self, entry: LocalizationEntry):
+        """Показує переклади схожих оригіналів з пам'яті перекладів."""
+        self.memory_tree.delete(*self.memory_tree.get_children())
+        self.memory_matches = []
+        source = None
+        if self.db and self.db.memory is not None and self.originals_db:
+            source = self.originals_db.get(entry.key, SOURCE_LANGUAGE)
+        if source is None:
+            return
+
+        self.memory_matches = self.db.memory.search(source, self.MEMORY_SUGGESTIONS, entry.key)
+        for number, match in enumerate(self.memory_matches, 1):
+            self.memory_tree.insert('', tk.END, values=(
+                number, f"{match.score:.0%}", match.translation, match.source))
+
+    def _apply_suggestion(self, index: int):
+        """Замінює текст перекладу пропозицією пам'яті з номером index."""
+        if not self.current_entry or not 0 <= index < len(self.memory_matches):
+            return 'break'
+        self.translation_text.delete('1.0', tk.END)
+        self.translation_text.insert('1.0', self.memory_matches[index].translation)
+        self._highlight_tags_in_translation()
+        self._on_translation_change()
+        self.translation_text.focus_set()
+        return 'break'
+
     def _show_entry(self, entry: LocalizationEntry):
         """Показує рядок для редагування."""
         self.original_value = entry.value
@@ -1153,17 +1500,8 @@ class LocalizationApp:
             self.context_text.insert(tk.END, f"{line_num:4}: {line_text}\n", tag)
         self.context_text.config(state=tk.DISABLED)
 
-        # Оригінал з гри
-        self.original_text.config(state=tk.NORMAL)
-        self.original_text.delete('1.0', tk.END)
-        original_value = None
-        if self.originals_db:
-            original_value = self.originals_db.get(entry.key)
-        if original_value:
-            self._insert_with_tags(self.original_text, original_value)
-        else:
-            self.original_text.insert('1.0', "(не знайдено в оригіналах)")
-        self.original_text.config(state=tk.DISABLED)
+        original_value = self._show_originals(entry)
+        self._show_suggestions(entry)
 
         # Переклад - завантажуємо поточне значення з файлу
         self.translation_text.delete('1.0', tk.END)
@@ -1186,14 +1524,8 @@ class LocalizationApp:
 
     def _insert_with_tags(self, text_widget: tk.Text, text: str):
         """Вставляє текст з підсвічуванням тегів."""
-        tag_positions = []
-        for pattern in TAG_PATTERNS:
-            for match in pattern.finditer(text):
-                tag_positions.append((match.start(), match.end()))
-        tag_positions.sort()
-
         pos = 0
-        for start, end in tag_positions:
+        for _, start, end in tokenize_markup(text):
             if start > pos:
                 text_widget.insert(tk.END, text[pos:start])
             text_widget.insert(tk.END, text[start:end], 'tag')
@@ -1218,14 +1550,31 @@ class LocalizationApp:
         if not source:
             source = self.current_entry.value
 
-        original_tags = set(find_tags(source))
-        new_tags = set(find_tags(new_value))
+        # Теги з повторами; змінений порядок тегів при перекладі — нормальний
+        parity = tag_parity(source, new_value)
+        if parity and (parity[0] or parity[1] or parity[3]):
+            missing, extra, _, unbalanced = parity
+            problems = []
+            if missing:
+                problems.append(f"Відсутні теги: {', '.join(missing)}")
+            if extra:
+                problems.append(f"Зайві теги: {', '.join(extra)}")
+            if unbalanced:
+                problems.append("Незакриті дужки [ ], $ або зайві #! (пари #X ... #!)")
+            result = messagebox.askyesno(
+                "Попередження",
+                "\n".join(problems) + "\n\nЗберегти все одно?"
+            )
+            if not result:
+                return False
 
-        missing_tags = original_tags - new_tags
-        if missing_tags:
+        rules = self.db.lexicon.check(new_value) if self.db.lexicon else []
+        if rules:
+            suggestions = self.db.lexicon.suggestions
+            lines = "\n".join(f"{rule} -> {suggestions[rule]}" for rule in rules)
             result = messagebox.askyesno(
                 "Попередження",
-                f"Відсутні теги: {', '.join(missing_tags)}\n\nЗберегти все одно?"
+                f"Можливі русизми:\n{lines}\n\nЗберегти все одно?"
             )
             if not result:
                 return False
@@ -1242,22 +1591,644 @@ class LocalizationApp:
             # Оновлюємо дерево
             selection = self.results_tree.selection()
             if selection:
-                item = selection[0]
-                short_value = new_value[:80] + "..." if len(new_value) > 80 else new_value
-                status = "✓" if self.current_entry.is_translated else "✗"
-                tag = 'translated' if self.current_entry.is_translated else 'untranslated'
-                self.results_tree.item(item, values=(
-                    self.current_entry.key, short_value,
-                    self.current_entry.category, Path(self.current_entry.file_path).name,
-                    status
-                ), tags=(tag,))
+                values, tag = self._result_row(self.current_entry)
+                self.results_tree.item(selection[0], values=values, tags=(tag,))
 
+            # Змінене значення могло вийти з попередніх результатів
+            self._last_search = None
             self._update_progress_display()
+            if self._glossary_refresh:
+                self._glossary_refresh()
             return True
         else:
             messagebox.showerror("Помилка", "Не вдалось зберегти")
             return False
 
+    def _replace_dialog(self):
+        """Масова заміна: попередній перегляд збігів, потім запис (кожен файл — один раз)."""
+        if not self.db:
+            return
+
+        window = tk.Toplevel(self.root)
+        window.title("Масова заміна")
+        window.geometry("900x550")
+        window.transient(self.root)
+
+        form = ttk.Frame(window)
+        form.pack(fill=tk.X, padx=10, pady=5)
+        form.columnconfigure(1, weight=1)
+
+        find_var = tk.StringVar(value=self.search_var.get())
+        replace_var = tk.StringVar()
+        regex_var = tk.BooleanVar(value=False)
+        match_case_var = tk.BooleanVar(value=True)
+        category_var = tk.StringVar(value='all')
+        file_var = tk.StringVar()
+        key_var = tk.StringVar()
+        skip_tags_var = tk.BooleanVar(value=True)
+
+        ttk.Label(form, text="Знайти:").grid(row=0, column=0, sticky=tk.W)
+        find_entry = ttk.Entry(form, textvariable=find_var)
+        find_entry.grid(row=0, column=1, columnspan=5, sticky=tk.EW, pady=2)
+        ttk.Label(form, text="Замінити на:").grid(row=1, column=0, sticky=tk.W)
+        ttk.Entry(form, textvariable=replace_var).grid(row=1, column=1, columnspan=5,
+                                                      sticky=tk.EW, pady=2)
+
+        ttk.Label(form, text="Категорія:").grid(row=2, column=0, sticky=tk.W)
+        ttk.Combobox(form, textvariable=category_var, values=['all'] + CATEGORY_NAMES,
+                     state='readonly', width=20).grid(row=2, column=1, sticky=tk.W, pady=2)
+        ttk.Label(form, text="Файл (маска):").grid(row=2, column=2, sticky=tk.W, padx=(10, 0))
+        ttk.Entry(form, textvariable=file_var, width=20).grid(row=2, column=3, sticky=tk.W)
+        ttk.Label(form, text="Ключ (вираз):").grid(row=2, column=4, sticky=tk.W, padx=(10, 0))
+        ttk.Entry(form, textvariable=key_var, width=20).grid(row=2, column=5, sticky=tk.W)
+
+        options = ttk.Frame(form)
+        options.grid(row=3, column=0, columnspan=6, sticky=tk.W, pady=2)
+        ttk.Checkbutton(options, text="Регулярний вираз", variable=regex_var).pack(side=tk.LEFT)
+        ttk.Checkbutton(options, text="Враховувати регістр",
+                        variable=match_case_var).pack(side=tk.LEFT, padx=10)
+        ttk.Checkbutton(options, text="Пропускати рядки зі зміною тегів",
+                        variable=skip_tags_var).pack(side=tk.LEFT)
+
+        summary_label = ttk.Label(window, text="")
+        summary_label.pack(anchor=tk.W, padx=10)
+
+        preview_frame = ttk.Frame(window)
+        preview_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        columns = ('key', 'file', 'count', 'old', 'new', 'tags')
+        preview = ttk.Treeview(preview_frame, columns=columns, show='headings')
+        for column, title, width in (('key', "Ключ", 180), ('file', "Файл", 120),
+                                     ('count', "Збігів", 50), ('old', "Було", 220),
+                                     ('new', "Стане", 220), ('tags', "Теги", 100)):
+            preview.heading(column, text=title)
+            preview.column(column, width=width, stretch=column in ('old', 'new'))
+        preview.tag_configure('tags', foreground='red')
+        preview_scroll = ttk.Scrollbar(preview_frame, orient=tk.VERTICAL, command=preview.yview)
+        preview.configure(yscrollcommand=preview_scroll.set)
+        preview.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        preview_scroll.pack(side=tk.RIGHT, fill=tk.Y)
+
+        # Подія скасування плану, що зараз рахується у фоні
+        running: Optional[threading.Event] = None
+
+        def show_plan(changes: SearchResults):
+            for change in changes[:self.REPLACE_PREVIEW_LIMIT]:
+                tags = ""
+                if change.breaks_line:
+                    tags = "перенос рядка"
+                elif change.tags_changed:
+                    tags = " ".join([f"-{tag}" for tag in change.missing_tags] +
+                                    [f"+{tag}" for tag in change.extra_tags])
+                new_value = change.new_value[:200].replace('\r', '⏎').replace('\n', '⏎')
+                preview.insert('', tk.END, values=(
+                    change.entry.key, Path(change.entry.file_path).name, change.count,
+                    change.old_value[:200], new_value, tags,
+                ), tags=('tags',) if change.tags_changed or change.breaks_line else ())
+
+            matches = sum(change.count for change in changes)
+            files = len({change.entry.file_path for change in changes})
+            with_tags = sum(1 for change in changes if change.tags_changed)
+            with_breaks = sum(1 for change in changes if change.breaks_line)
+            text = f"{matches} збігів у {len(changes)} рядках, {files} файлах"
+            if changes.truncated:
+                text += " — пошук зупинено за часом, знайдено не все"
+            if with_tags:
+                text += f"; зі зміною тегів: {with_tags}"
+            if with_breaks:
+                # У шаблоні виразу \n — справжній перенос; розмітка гри — \\n
+                text += f"; з переносом рядка (не замінюються, пишіть \\\\n): {with_breaks}"
+            if len(changes) > self.REPLACE_PREVIEW_LIMIT:
+                text += f" (показано перші {self.REPLACE_PREVIEW_LIMIT})"
+            summary_label['text'] = text
+
+        # План рахується у фоновому потоці з бюджетом часу пошуку: вираз користувача
+        # може бути як завгодно повільним. then(план) викликається після його показу
+        def do_preview(then=None):
+            nonlocal running
+            if running is not None:
+                running.set()
+                running = None
+            preview.delete(*preview.get_children())
+            if not find_var.get():
+                summary_label['text'] = "Вкажіть, що шукати"
+                return
+
+            db = self.db
+            args = (find_var.get(), replace_var.get(), regex_var.get(), not match_case_var.get(),
+                    category_var.get(), file_var.get(), key_var.get())
+            budget = self.config.get('search_time_budget_ms', 2000) / 1000
+            cancel = running = threading.Event()
+            outcome = []
+
+            def run():
+                try:
+                    outcome.append(db.plan_replace(*args, cancel=cancel,
+                                                   deadline=time.monotonic() + budget))
+                except Exception as e:
+                    outcome.append(e)
+
+            thread = threading.Thread(target=run, daemon=True)
+            thread.start()
+            summary_label['text'] = "Пошук збігів..."
+
+            def check():
+                nonlocal running
+                if cancel.is_set():
+                    return
+                if thread.is_alive():
+                    window.after(20, check)
+                    return
+                running = None
+                result = outcome[0] if outcome else None
+                if isinstance(result, re.error):
+                    summary_label['text'] = f"Некоректний вираз: {result}"
+                elif isinstance(result, Exception):
+                    summary_label['text'] = f"Помилка: {result}"
+                elif result is not None:
+                    show_plan(result)
+                    if then:
+                        then(result)
+
+            window.after(20, check)
+
+        def confirm_and_apply(plan: SearchResults):
+            changes = [change for change in plan if not change.breaks_line
+                       and not (skip_tags_var.get() and change.tags_changed)]
+            if not changes:
+                messagebox.showinfo("Інформація", "Немає рядків для заміни", parent=window)
+                return
+            files = {change.entry.file_path for change in changes}
+            scope = f"{len(changes)} рядках ({len(files)} файлах)"
+            question = f"Замінити у {scope}?"
+            if plan.truncated:
+                question = f"Пошук збігів зупинено за часом, знайдено не все.\nЗамінити лише у знайдених {scope}?"
+            if not messagebox.askyesno("Підтвердження", question, parent=window):
+                return
+
+            applied = self.db.apply_replace(changes)
+            self._on_entries_changed([change.entry for change in applied],
+                                     f"Замінено у {len(applied)} рядках")
+            do_preview()
+
+        def close():
+            if running is not None:
+                running.set()
+            window.destroy()
+
+        buttons = ttk.Frame(window)
+        buttons.pack(fill=tk.X, padx=10, pady=(0, 10))
+        ttk.Button(buttons, text="Переглянути", command=do_preview).pack(side=tk.LEFT)
+        ttk.Button(buttons, text="Замінити все",
+                   command=lambda: do_preview(confirm_and_apply)).pack(side=tk.LEFT, padx=5)
+        ttk.Button(buttons, text="Закрити", command=close).pack(side=tk.RIGHT)
+        window.protocol("WM_DELETE_WINDOW", close)
+
+        find_entry.bind('<Return>', lambda e: do_preview())
+        find_entry.focus_set()
+
+    def _open_entry(self, entry: LocalizationEntry, entries: List[LocalizationEntry]):
+        """Виділяє запис у результатах; якщо його там немає — показує entries як результати."""
+        index = self._find_result_index(entry)
+        if index is None:
+            with self._search_lock:
+                if self._search_cancel is not None:
+                    self._search_cancel.set()
+                self._search_generation += 1
+            self._last_search = None
+            self._show_search_results(SearchResults(entries), True)
+            index = self._find_result_index(entry)
+        if index is not None:
+            self._select_index(index)
+
+    def _lexicon_dialog(self):
+        """Звіт про русизми та заборонену лексику в усьому моді, найчастіші першими."""
+        if not self.db:
+            return
+
+        window = tk.Toplevel(self.root)
+        window.title("Русизми та заборонена лексика")
+        window.geometry("900x500")
+        window.transient(self.root)
+
+        form = ttk.Frame(window)
+        form.pack(fill=tk.X, padx=10, pady=5)
+        filter_var = tk.StringVar()
+        ttk.Label(form, text="Фільтр:").pack(side=tk.LEFT)
+        filter_entry = ttk.Entry(form, textvariable=filter_var, width=30)
+        filter_entry.pack(side=tk.LEFT, padx=5)
+        summary_label = ttk.Label(form, text="")
+        summary_label.pack(side=tk.RIGHT)
+
+        list_frame = ttk.Frame(window)
+        list_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        columns = ('suggestion', 'file', 'value')
+        tree = ttk.Treeview(list_frame, columns=columns)
+        tree.heading('#0', text="Слово / ключ")
+        tree.column('#0', width=220)
+        for column, title, width in (('suggestion', "Як краще", 160), ('file', "Файл", 140),
+                                     ('value', "Переклад", 360)):
+            tree.heading(column, text=title)
+            tree.column(column, width=width, stretch=column == 'value')
+        scroll = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=tree.yview)
+        tree.configure(yscrollcommand=scroll.set)
+        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scroll.pack(side=tk.RIGHT, fill=tk.Y)
+
+        report: List[Tuple[str, List[LocalizationEntry]]] = []
+        shown: List[LocalizationEntry] = []
+        db = self.db
+
+        def show(*args):
+            shown.clear()
+            tree.delete(*tree.get_children())
+            text = filter_var.get().lower()
+            suggestions = db.lexicon.suggestions
+            for rule, entries in report:
+                if text and text not in rule:
+                    entries = [entry for entry in entries
+                               if text in entry.key.lower() or text in entry.value.lower()]
+                    if not entries:
+                        continue
+                parent = tree.insert('', tk.END, text=f"{rule} ({len(entries)})",
+                                     values=(suggestions.get(rule, ''), '', ''))
+                for entry in entries:
+                    # iid рядка запису — його номер у shown
+                    tree.insert(parent, tk.END, iid=str(len(shown)), text=entry.key, values=(
+                        '', Path(entry.file_path).name, entry.value[:300]))
+                    shown.append(entry)
+            summary_label['text'] = f"Рядків: {len(set(shown))}, слів: {len(tree.get_children())}"
+
+        def run():
+            report.clear()
+            tree.delete(*tree.get_children())
+            summary_label['text'] = "Перевірка..."
+            db.load_lexicon()
+            result: list = []
+            thread = threading.Thread(target=lambda: result.append(db.scan_lexicon()), daemon=True)
+            thread.start()
+            self.root.after(50, lambda: check(thread, result))
+
+        def check(thread: threading.Thread, result: list):
+            if thread.is_alive():
+                self.root.after(50, lambda: check(thread, result))
+                return
+            if not window.winfo_exists():
+                return
+            if db.lexicon_error:
+                messagebox.showerror("Помилка", f"Не вдалось прочитати {db.lexicon_file}:\n"
+                                     f"{db.lexicon_error}", parent=window)
+            report.extend(result[0] if result else [])
+            show()
+
+        def open_entry(event=None):
+            selection = tree.selection()
+            if selection and selection[0].isdigit():
+                # Після повного сканування записи звіту належать старій базі
+                if db is self.db:
+                    self._open_entry(shown[int(selection[0])], shown)
+
+        filter_var.trace_add('write', show)
+        tree.bind('<Double-1>', open_entry)
+        tree.bind('<Return>', open_entry)
+
+        buttons = ttk.Frame(window)
+        buttons.pack(fill=tk.X, padx=10, pady=(0, 10))
+        ttk.Button(buttons, text="Перевірити знову", command=run).pack(side=tk.LEFT)
+        ttk.Button(buttons, text="Закрити", command=window.destroy).pack(side=tk.RIGHT)
+
+        run()
+        filter_entry.focus_set()
+
+    def _tags_dialog(self):
+        """Звіт про розбіжності тегів з оригіналами в усьому моді, за файлами."""
+        if not self.db:
+            return
+        if not self.db.originals or not self.db.originals.is_loaded(SOURCE_LANGUAGE):
+            messagebox.showinfo("Інформація",
+                                f"Для перевірки тегів потрібні оригінали гри ({SOURCE_LANGUAGE})")
+            return
+
+        window = tk.Toplevel(self.root)
+        window.title("Перевірка тегів")
+        window.geometry("900x500")
+        window.transient(self.root)
+
+        form = ttk.Frame(window)
+        form.pack(fill=tk.X, padx=10, pady=5)
+        filter_var = tk.StringVar()
+        order_var = tk.BooleanVar(value=False)
+        ttk.Label(form, text="Фільтр:").pack(side=tk.LEFT)
+        filter_entry = ttk.Entry(form, textvariable=filter_var, width=30)
+        filter_entry.pack(side=tk.LEFT, padx=5)
+        ttk.Checkbutton(form, text="Змінений порядок тегів",
+                        variable=order_var).pack(side=tk.LEFT, padx=10)
+        summary_label = ttk.Label(form, text="")
+        summary_label.pack(side=tk.RIGHT)
+
+        list_frame = ttk.Frame(window)
+        list_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        columns = ('problem', 'value')
+        tree = ttk.Treeview(list_frame, columns=columns)
+        tree.heading('#0', text="Файл / ключ")
+        tree.column('#0', width=260)
+        for column, title, width in (('problem', "Проблема", 260), ('value', "Переклад", 340)):
+            tree.heading(column, text=title)
+            tree.column(column, width=width, stretch=column == 'value')
+        scroll = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=tree.yview)
+        tree.configure(yscrollcommand=scroll.set)
+        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scroll.pack(side=tk.RIGHT, fill=tk.Y)
+
+        issues: List[TagIssue] = []
+        shown: List[LocalizationEntry] = []
+        db = self.db
+
+        def show(*args):
+            shown.clear()
+            tree.delete(*tree.get_children())
+            text = filter_var.get().lower()
+            parent = None
+            file_path = None
+            files = 0
+            for issue in issues:
+                entry = issue.entry
+                if not (order_var.get() or issue.missing or issue.extra or issue.unbalanced):
+                    continue
+                if text and text not in entry.key.lower() and text not in entry.value.lower():
+                    continue
+                # Розбіжності впорядковані за файлом: новий файл — нова група
+                if entry.file_path != file_path:
+                    file_path = entry.file_path
+                    parent = tree.insert('', tk.END, text=Path(file_path).name, open=True)
+                    files += 1
+                tree.insert(parent, tk.END, iid=str(len(shown)), text=entry.key,
+                            values=(issue.summary, entry.value[:300]))
+                shown.append(entry)
+            summary_label['text'] = f"Рядків: {len(shown)}, файлів: {files}"
+
+        def run():
+            issues.clear()
+            tree.delete(*tree.get_children())
+            summary_label['text'] = "Перевірка..."
+            workers = self.config.get('scan_workers', 0) or os.cpu_count() or 1
+            result: list = []
+
+            def work():
+                if self.tag_cache is None:
+                    cache = TagCache()
+                    cache.load()
+                    self.tag_cache = cache
+                result.append(db.check_tags(self.tag_cache, workers))
+                self.tag_cache.save()
+
+            thread = threading.Thread(target=work, daemon=True)
+            thread.start()
+            self.root.after(50, lambda: check(thread, result))
+
+        def check(thread: threading.Thread, result: list):
+            if thread.is_alive():
+                self.root.after(50, lambda: check(thread, result))
+                return
+            if not window.winfo_exists():
+                return
+            issues.extend(result[0] if result else [])
+            show()
+
+        def open_entry(event=None):
+            selection = tree.selection()
+            if selection and selection[0].isdigit():
+                # Після повного сканування записи звіту належать старій базі
+                if db is self.db:
+                    self._open_entry(shown[int(selection[0])], shown)
+
+        filter_var.trace_add('write', show)
+        order_var.trace_add('write', show)
+        tree.bind('<Double-1>', open_entry)
+        tree.bind('<Return>', open_entry)
+
+        buttons = ttk.Frame(window)
+        buttons.pack(fill=tk.X, padx=10, pady=(0, 10))
+        ttk.Button(buttons, text="Перевірити знову", command=run).pack(side=tk.LEFT)
+        ttk.Button(buttons, text="Закрити", command=window.destroy).pack(side=tk.RIGHT)
+
+        run()
+        filter_entry.focus_set()
+
+    def _glossary_dialog(self):
+        """Переклади, що не вживають схваленої глосарієм форми терміна з оригіналу."""
+        if not self.db:
+            return
+        if self.db.glossary_error:
+            messagebox.showerror("Помилка", f"Не вдалось прочитати {self.db.glossary_file}:\n"
+                                 f"{self.db.glossary_error}")
+            return
+        if self.db.glossary is None:
+            messagebox.showinfo("Інформація",
+                                f"Глосарій не знайдено: {self.db.glossary_file}")
+            return
+
+        window = tk.Toplevel(self.root)
+        window.title("Глосарій")
+        window.geometry("900x500")
+        window.transient(self.root)
+
+        form = ttk.Frame(window)
+        form.pack(fill=tk.X, padx=10, pady=5)
+        filter_var = tk.StringVar()
+        term_var = tk.StringVar(value='all')
+        ttk.Label(form, text="Фільтр:").pack(side=tk.LEFT)
+        filter_entry = ttk.Entry(form, textvariable=filter_var, width=30)
+        filter_entry.pack(side=tk.LEFT, padx=5)
+        ttk.Label(form, text="Термін:").pack(side=tk.LEFT, padx=(10, 0))
+        glossary = self.db.glossary
+        terms = glossary.terms
+        ttk.Combobox(form, textvariable=term_var, state='readonly', width=25,
+                     values=['all'] + [term for term, _ in terms]).pack(side=tk.LEFT, padx=5)
+        summary_label = ttk.Label(form, text="")
+        summary_label.pack(side=tk.RIGHT)
+
+        list_frame = ttk.Frame(window)
+        list_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        columns = ('key', 'term', 'forms', 'value')
+        tree = ttk.Treeview(list_frame, columns=columns, show='headings')
+        for column, title, width in (('key', "Ключ", 200), ('term', "Термін", 120),
+                                     ('forms', "Схвалені форми", 180), ('value', "Переклад", 360)):
+            tree.heading(column, text=title)
+            tree.column(column, width=width, stretch=column == 'value')
+        scroll = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=tree.yview)
+        tree.configure(yscrollcommand=scroll.set)
+        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scroll.pack(side=tk.RIGHT, fill=tk.Y)
+
+        shown: List[LocalizationEntry] = []
+
+        def refresh(*args):
+            # Після повного сканування номери термінів належать іншому глосарію
+            if not self.db or self.db.glossary is not glossary:
+                on_close()
+                return
+            shown.clear()
+            tree.delete(*tree.get_children())
+            text = filter_var.get().lower()
+            term = term_var.get()
+            issues = sorted(self.db.glossary_issues.items(), key=lambda item: item[0].key)
+            for entry, term_ids in issues:
+                names = [terms[term_id][0] for term_id in term_ids]
+                if term != 'all' and term not in names:
+                    continue
+                if text and text not in entry.key.lower() and text not in entry.value.lower():
+                    continue
+                forms = ", ".join(form for term_id in term_ids for form in terms[term_id][1])
+                tree.insert('', tk.END, iid=str(len(shown)), values=(
+                    entry.key, ", ".join(names), forms, entry.value[:300]))
+                shown.append(entry)
+            summary_label['text'] = f"Порушень: {len(shown)} з {len(self.db.glossary_issues)}"
+
+        def open_entry(event=None):
+            selection = tree.selection()
+            if not selection:
+                return
+            self._open_entry(shown[int(selection[0])], shown)
+
+        def on_close():
+            self._glossary_refresh = None
+            window.destroy()
+
+        filter_var.trace_add('write', refresh)
+        term_var.trace_add('write', refresh)
+        tree.bind('<Double-1>', open_entry)
+        tree.bind('<Return>', open_entry)
+        window.protocol("WM_DELETE_WINDOW", on_close)
+        self._glossary_refresh = refresh
+        refresh()
+        filter_entry.focus_set()
+
+    def _undo_save(self):
+        """Скасовує останнє збереження або масову заміну (у т.ч. інших рядків)."""
+        if self.db:
+            changed = self.db.undo()
+            self._on_entries_changed(changed, f"Скасовано зміни {len(changed)} рядків")
+        return 'break'
+
+    def _redo_save(self):
+        if self.db:
+            changed = self.db.redo()
+            self._on_entries_changed(changed, f"Повторено зміни {len(changed)} рядків")
+        return 'break'
+
+    # === Обмін з перекладацькими програмами ===
+
+    def _export_results(self):
+        """Експортує знайдені записи в XLIFF/PO/CSV (формат — за розширенням файлу)."""
+        if not self.db or not self.current_results:
+            messagebox.showinfo("Експорт", "Немає знайдених рядків для експорту")
+            return
+        path = filedialog.asksaveasfilename(title="Експорт для перекладу", defaultextension='.xlf',
+                                            filetypes=self.EXCHANGE_FILETYPES)
+        if not path:
+            return
+        fmt = exchange_format(Path(path))
+        if fmt is None:
+            messagebox.showerror("Експорт", "Невідоме розширення: потрібно .xlf, .po або .csv")
+            return
+
+        # Оригінал — мовою референсу, якщо її вже завантажено
+        language = self.lang_var.get()
+        if not self.originals_db or not self.originals_db.is_loaded(language):
+            language = SOURCE_LANGUAGE
+        try:
+            count = write_exchange(self.db.exchange_units(self.current_results, language),
+                                   Path(path), fmt, language)
+        except OSError as e:
+            messagebox.showerror("Експорт", f"Не вдалося записати файл:\n{e}")
+            return
+        self.statusbar_status['text'] = f"Експортовано {count} рядків у {Path(path).name}"
+        self.root.after(3000, lambda: self.statusbar_status.config(text=""))
+
+    def _import_translations(self):
+        """Застосовує переклади з XLIFF/PO/CSV однією групою скасування."""
+        if not self.db:
+            return
+        path = filedialog.askopenfilename(title="Імпорт перекладів",
+                                          filetypes=self.EXCHANGE_FILETYPES + [("Усі файли", "*.*")])
+        if not path:
+            return
+        fmt = exchange_format(Path(path))
+        if fmt is None:
+            messagebox.showerror("Імпорт", "Невідоме розширення: потрібно .xlf, .po або .csv")
+            return
+        try:
+            result = self.db.import_units(read_exchange(Path(path), fmt))
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Імпорт", f"Не вдалося прочитати файл:\n{e}")
+            return
+
+        self._on_entries_changed(result.applied, f"Імпортовано {len(result.applied)} рядків")
+        lines = [f"Застосовано: {len(result.applied)}",
+                 f"Без змін: {result.unchanged}",
+                 f"Неготові (fuzzy/initial), пропущено: {result.skipped}",
+                 f"Ключів немає в моді: {len(result.unknown)}",
+                 f"Відхилено: {len(result.rejected)}"]
+        for unit, message in result.rejected[:10]:
+            lines.append(f"  {unit.file}:{unit.line} {unit.id}: {message}")
+        if len(result.rejected) > 10:
+            lines.append(f"  ... ще {len(result.rejected) - 10}")
+        if result.applied:
+            lines.append("\nСкасувати імпорт: Ctrl+Alt+Z")
+        show = messagebox.showwarning if result.rejected else messagebox.showinfo
+        show("Імпорт", "\n".join(lines))
+
+    def _accept_sources(self):
+        """Запам'ятовує поточні оригінали як звірені для перекладів без звірки."""
+        if not self.db:
+            return
+        if not self.originals_db or not self.originals_db.is_loaded(SOURCE_LANGUAGE):
+            messagebox.showinfo("Оригінали", "Спочатку проскануйте папку гри (англійські оригінали)")
+            return
+        unverified = len(self.db.index.unverified)
+        outdated = len(self.db.index.outdated)
+        if not unverified and not outdated:
+            messagebox.showinfo("Оригінали", "Усі переклади звірено з поточними оригіналами")
+            return
+
+        include_outdated = False
+        if unverified and not messagebox.askyesno(
+                "Оригінали", f"Перекладів без звірки: {unverified}.\n"
+                             "Вважати їх звіреними з поточними оригіналами гри?"):
+            return
+        if outdated:
+            include_outdated = messagebox.askyesno(
+                "Оригінали", f"Застарілих перекладів: {outdated}.\n"
+                             "Прийняти й нові оригінали для них? Лише якщо ці переклади вже переглянуто.",
+                default=messagebox.NO)
+            if not unverified and not include_outdated:
+                return
+
+        accepted = self.db.accept_sources(include_outdated)
+        self._last_search = None
+        self._refresh_results_display()
+        self.statusbar_status['text'] = f"Звірено з оригіналами: {accepted}"
+        self.root.after(3000, lambda: self.statusbar_status.config(text=""))
+
+    def _on_entries_changed(self, entries: List[LocalizationEntry], status: str):
+        """Оновлює показ після зміни кількох записів поза редактором."""
+        if not entries:
+            return
+        self.modified_files.update(entry.file_path for entry in entries)
+        if self._glossary_refresh:
+            self._glossary_refresh()
+
+        # Показаний запис міг змінитись; незбережене редагування не чіпаємо
+        if (self.current_entry and not self.has_unsaved_changes
+                and any(entry is self.current_entry for entry in entries)):
+            self._show_entry(self.current_entry)
+        self._last_search = None
+        self._refresh_results_display()
+        self._update_progress_display()
+
+        self.statusbar_status['text'] = status
+        self.root.after(2000, lambda: self.statusbar_status.config(text=""))
+
     def _open_in_editor(self):
         if not self.current_entry:
             return
@@ -1297,7 +2268,25 @@ class LocalizationApp:
             return current
         return None
 
+    def _flush_saves(self) -> bool:
+        """Дописує чергу змін у файли. False — якийсь запис не вдався (показує помилку)."""
+        if self.db:
+            self.db.flush()
+        return self._check_save_errors()
+
+    def _check_save_errors(self) -> bool:
+        """Показує помилки фонового запису. False — помилки були."""
+        errors = self.db.save_queue.take_errors() if self.db else []
+        if errors:
+            details = "\n".join(f"{Path(path).name}: {error}" for path, error in errors)
+            messagebox.showerror("Помилка", f"Не вдалось зберегти:\n{details}")
+        return not errors
+
     def _git_commit(self):
+        self._flush_saves()
+        # Хеші оригіналів змінюються разом з перекладом
+        if self.db and self.db.sources.written:
+            self.modified_files.add(str(self.db.sources.path))
         if not self.modified_files:
             messagebox.showinfo("Інформація", "Немає змін для commit")
             return
@@ -1327,6 +2316,10 @@ class LocalizationApp:
                 messagebox.showerror("Помилка", "Вкажіть commit message")
                 return
 
+            # Зміни, збережені поки відкрите це вікно, теж мають потрапити в commit
+            if not self._flush_saves():
+                return
+
             try:
                 for f in self.modified_files:
                     subprocess.run(['git', 'add', f], check=True, cwd=Path(f).parent)
@@ -1347,6 +2340,8 @@ class LocalizationApp:
                 if result.returncode == 0:
                     messagebox.showinfo("Успіх", "Commit створено!")
                     self.modified_files.clear()
+                    if self.db:
+                        self.db.sources.written = False
                     commit_window.destroy()
                 else:
                     messagebox.showerror("Помилка", f"Git error:\n{result.stderr}")
@@ -1364,4 +2359,6 @@ def main():
 
 
 if __name__ == '__main__':
+    # Потрібно для пулу процесів у зібраному PyInstaller exe
+    multiprocessing.freeze_support()
     main()
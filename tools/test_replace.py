@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Перевірка масової заміни (plan_replace/apply_replace): файл після заміни
+розбирається знову і містить ті самі ключі.
+
+    python -m pytest tools/test_replace.py
+    python -m unittest discover -s tools
+"""
+
+import codecs
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+from localization_core import LocalizationDatabase, parse_yml_bytes
+
+CONTENT = codecs.BOM_UTF8 + ('l_english:\n'
+                             ' A_KEY:0 "Перше речення. Друге речення."\n'
+                             ' B_KEY:0 "Третє. [Root.GetName] тут."\n').encode('utf-8')
+
+
+class ReplaceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.mod_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.mod_dir)
+        self.path = self.mod_dir / 'test_l_english.yml'
+        self.path.write_bytes(CONTENT)
+        self.db = LocalizationDatabase(self.mod_dir, journal_file=None, sources_file=None,
+                                       glossary_file=None, lexicon_file=None)
+        self.db.scan()
+
+    def rows(self):
+        self.db.flush()
+        return {key: value for _, key, _, value in parse_yml_bytes(self.path.read_bytes())}
+
+    def test_replace_rewrites_values(self):
+        changes = self.db.plan_replace('речення', 'фраза')
+        self.assertEqual([change.entry.key for change in changes], ['A_KEY'])
+        self.assertEqual(self.db.apply_replace(changes), changes)
+        self.assertEqual(self.rows(), {'A_KEY': 'Перше фраза. Друге фраза.',
+                                       'B_KEY': 'Третє. [Root.GetName] тут.'})
+
+    def test_line_break_is_not_written(self):
+        """Шаблон r'.\\n' дає справжній перенос: заміна показується, але не пишеться."""
+        changes = self.db.plan_replace(r'\. ', r'.\n', regex=True)
+        self.assertEqual(len(changes), 2)
+        self.assertTrue(all(change.breaks_line for change in changes))
+        self.assertEqual(self.db.apply_replace(changes), [])
+        self.assertEqual(self.path.read_bytes(), CONTENT)
+
+        # Розмітку гри \n (два символи) пише шаблон r'.\\n'
+        changes = self.db.plan_replace(r'\. ', r'.\\n', regex=True)
+        self.assertFalse(any(change.breaks_line for change in changes))
+        self.db.apply_replace(changes)
+        self.assertEqual(self.rows(), {'A_KEY': 'Перше речення.\\nДруге речення.',
+                                       'B_KEY': 'Третє.\\n[Root.GetName] тут.'})
+
+        # Після заміни файл і далі збігається з відсканованим
+        entry = next(entry for entry in self.db.entries if entry.key == 'B_KEY')
+        self.assertTrue(self.db.update_entry(entry, 'Інше'))
+        self.assertEqual(self.rows()['B_KEY'], 'Інше')
+        self.assertEqual(self.db.save_queue.take_errors(), [])
+
+    def test_slow_pattern_stops_at_deadline(self):
+        """Вираз з катастрофічним поверненням зупиняється за бюджетом часу або скасуванням."""
+        entry = self.db.entries[0]
+        self.db.update_entry(entry, 'а' * 40 + ' б')
+        slow = r'(\w+\s?)+$x'
+
+        started = time.monotonic()
+        changes = self.db.plan_replace(slow, 'y', regex=True, deadline=started + 0.3)
+        self.assertTrue(changes.truncated)
+        self.assertLess(time.monotonic() - started, 5)
+
+        cancel = threading.Event()
+        threading.Timer(0.2, cancel.set).start()
+        self.assertIsNone(self.db.plan_replace(slow, 'y', regex=True, cancel=cancel))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Перевірка парсера і запису yml на всіх файлах локалізації, що постачаються
+(main_menu/ та loading_screen/).
+
+    python -m pytest tools/test_yml_roundtrip.py
+    python -m unittest discover -s tools
+"""
+
+import codecs
+import unittest
+from pathlib import Path
+
+from localization_core import (
+    FileLines, MappedFileLines, iter_yml_entries, parse_yml_bytes, replace_yml_values,
+)
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+SHIPPED_DIRS = [REPO_DIR / 'main_menu', REPO_DIR / 'loading_screen']
+
+
+def shipped_files():
+    return sorted(path for directory in SHIPPED_DIRS for path in directory.rglob('*.yml'))
+
+
+class YmlRoundTripTest(unittest.TestCase):
+
+    def test_files_found(self):
+        self.assertTrue(shipped_files(), "не знайдено жодного yml")
+
+    def test_same_values_give_same_bytes(self):
+        """Запис усіх значень без змін відтворює файл байт у байт."""
+        for path in shipped_files():
+            with self.subTest(file=str(path.relative_to(REPO_DIR))):
+                raw = path.read_bytes()
+                values = {line_num: (key, value) for line_num, key, _, value in parse_yml_bytes(raw)}
+                self.assertEqual(replace_yml_values(raw, values), raw)
+
+    def test_rows_match_entry_spans(self):
+        """parse_yml_bytes і iter_yml_entries бачать ті самі записи, межі значень точні."""
+        for path in shipped_files():
+            with self.subTest(file=str(path.relative_to(REPO_DIR))):
+                raw = path.read_bytes()
+                spans = list(iter_yml_entries(raw))
+                self.assertEqual(parse_yml_bytes(raw), [span[:4] for span in spans])
+                for _, _, _, value, start, end in spans:
+                    self.assertEqual(raw[start:end].decode('utf-8'), value)
+
+    def test_line_numbers_match_readers(self):
+        """Номер рядка запису вказує на той самий рядок у FileLines і MappedFileLines."""
+        for path in shipped_files():
+            with self.subTest(file=str(path.relative_to(REPO_DIR))):
+                rows = parse_yml_bytes(path.read_bytes())
+                lines = FileLines(str(path))
+                mapped = MappedFileLines(str(path))
+                self.assertEqual(len(lines), len(mapped))
+                self.assertEqual(lines.get(0, len(lines)), mapped.get(0, len(mapped)))
+                for line_num, key, _, _ in rows:
+                    self.assertTrue(lines.get(line_num, line_num + 1)[0].lstrip().startswith(key + ':'))
+
+    def test_changed_value_keeps_other_bytes(self):
+        """Зміна одного значення не чіпає BOM, CRLF, відступи і сусідні рядки."""
+        raw = codecs.BOM_UTF8 + 'l_english:\r\n KEY:0 "old"\r\n  OTHER:1 "x" # коментар\r\n'.encode('utf-8')
+        result = replace_yml_values(raw, {1: ('KEY', 'нове "q"')})
+        self.assertEqual(result, raw.replace(b'"old"', '"нове "q""'.encode('utf-8')))
+        self.assertIsNone(replace_yml_values(raw, {1: ('OTHER', 'x')}))
+
+
+if __name__ == '__main__':
+    unittest.main()